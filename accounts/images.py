@@ -0,0 +1,192 @@
+"""
+Thumbnails of uploaded images (company logos and profile pictures)
+
+Every size in IMAGE_THUMBNAIL_SIZES is stored next to the original in WebP
+and JPEG, e.g. ``company_logos/acme.png`` gets ``company_logos/acme.small.webp``
+and ``company_logos/acme.small.jpg``. Uploads are processed in a background
+thread pool after the row is committed; ``generate_thumbnails`` backfills
+existing images. Once an image's thumbnails are written, its name is copied
+to the ``<field>_thumbnails`` column of the row. Templates pick a size with
+the ``thumbnail`` tag (accounts/templatetags/image_tags.py), which compares
+the two names instead of asking the storage, and falls back to the original
+until the thumbnails exist.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models import F
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+# Image fields with thumbnails
+IMAGE_FIELDS = (
+    ('companies.Company', 'company_logo'),
+    ('accounts.User', 'profile_image'),
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def derivative_name(name, size, fmt='webp'):
+    root, _ = os.path.splitext(name)
+    return f'{root}.{size}.{FORMATS[fmt][1]}'
+
+
+def _encode(image, fmt):
+    buffer = BytesIO()
+    if fmt == 'jpeg':
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.save(buffer, 'JPEG', quality=settings.IMAGE_THUMBNAIL_QUALITY, optimize=True, progressive=True)
+    else:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        image.save(buffer, 'WEBP', quality=settings.IMAGE_THUMBNAIL_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def generate(name, storage=None, force=False):
+    """
+    Write the missing thumbnails of one image; returns how many were written.
+    The original is decoded once and each size is scaled from the next larger one.
+    """
+    storage = storage or default_storage
+    sizes = sorted(settings.IMAGE_THUMBNAIL_SIZES.items(), key=lambda item: -item[1])
+    wanted = [
+        (size, pixels, fmt) for size, pixels in sizes for fmt in FORMATS
+        if force or not storage.exists(derivative_name(name, size, fmt))
+    ]
+    if not wanted:
+        return 0
+
+    with storage.open(name, 'rb') as f:
+        image = Image.open(f)
+        # JPEG can decode at a reduced scale, which is much faster for big photos
+        largest = sizes[0][1]
+        image.draft('RGB', (largest * 2, largest * 2))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    written = 0
+    for size, pixels in sizes:
+        image = image.copy()
+        image.thumbnail((pixels, pixels), Image.LANCZOS)
+        for wanted_size, _, fmt in wanted:
+            if wanted_size != size:
+                continue
+            thumb_name = derivative_name(name, size, fmt)
+            if storage.exists(thumb_name):
+                storage.delete(thumb_name)
+            storage.save(thumb_name, ContentFile(_encode(image, fmt)))
+            written += 1
+    return written
+
+
+def _generate_logged(name, storage=None, force=False):
+    """Like generate(), but returns None instead of raising if the image is unusable"""
+    try:
+        return generate(name, storage, force)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.exception('Could not create thumbnails of %s', name)
+        return None
+
+
+def mark_generated(names):
+    """Record on the rows using these images that their thumbnails exist"""
+    from django.apps import apps
+
+    names = list(names)
+    for model_label, field_name in IMAGE_FIELDS:
+        model = apps.get_model(model_label)
+        for start in range(0, len(names), 500):
+            model.objects.filter(**{f'{field_name}__in': names[start:start + 500]}).update(
+                **{f'{field_name}_thumbnails': F(field_name)}
+            )
+
+
+def generate_many(names, workers=1, force=False):
+    """
+    Thumbnails for many stored images, recorded on the rows using them; returns
+    (images processed, thumbnails written)
+    """
+    task = partial(_generate_logged, force=force)
+    names = list(names)
+    images = written = 0
+    done = []
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = zip(names, pool.map(task, names, chunksize=8))
+            for name, count in results:
+                images += 1
+                if count is not None:
+                    written += count
+                    done.append(name)
+    else:
+        for name in names:
+            images += 1
+            count = task(name)
+            if count is not None:
+                written += count
+                done.append(name)
+    mark_generated(done)
+    return images, written
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_THUMBNAIL_WORKERS, thread_name_prefix='thumbnails'
+            )
+    return _executor
+
+
+def _generate_and_mark(name, storage):
+    try:
+        if _generate_logged(name, storage) is not None:
+            mark_generated([name])
+    finally:
+        # Pool threads keep no database connection between tasks
+        connection.close()
+
+
+def schedule(fieldfile):
+    """Create the thumbnails of a just-saved image in the background"""
+    if fieldfile:
+        return _get_executor().submit(_generate_and_mark, fieldfile.name, fieldfile.storage)
+    return None
+
+
+def has_thumbnails(fieldfile):
+    """Whether the row says the thumbnails of this image were written (no storage lookup)"""
+    marker = getattr(fieldfile.instance, f'{fieldfile.field.name}_thumbnails', '')
+    return bool(marker) and marker == fieldfile.name
+
+
+def thumbnail_url(fieldfile, size='small', fmt='webp'):
+    """URL of a thumbnail, or of the original while the thumbnails are not there yet"""
+    if not fieldfile:
+        return ''
+    if size in settings.IMAGE_THUMBNAIL_SIZES and fmt in FORMATS and has_thumbnails(fieldfile):
+        return fieldfile.storage.url(derivative_name(fieldfile.name, size, fmt))
+    return fieldfile.url
@@ -0,0 +1,43 @@
+"""
+Management command to create thumbnails of existing logos and profile images
+"""
+import time
+from django.core.management.base import BaseCommand
+from accounts import images
+from accounts.models import User
+from companies.models import Company
+
+
+class Command(BaseCommand):
+    help = 'Create the missing thumbnails of company logos and profile images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes resizing images (default: 1)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Recreate thumbnails that already exist'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        names = [
+            name
+            for model, field_name in ((Company, 'company_logo'), (User, 'profile_image'))
+            for name in model.objects.exclude(**{field_name: ''}).exclude(
+                **{f'{field_name}__isnull': True}
+            ).values_list(field_name, flat=True).iterator()
+        ]
+
+        processed, written = images.generate_many(
+            names, workers=max(1, options['workers']), force=options['force']
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] {written} thumbnails written for {processed} images in {time.monotonic() - started:.2f}s'
+        ))
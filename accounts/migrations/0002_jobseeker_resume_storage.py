@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:01
+
+from django.db import migrations, models
+import jobs.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobseeker',
+            name='resume',
+            field=models.FileField(blank=True, null=True, storage=jobs.storage.get_resume_storage, upload_to='resumes/'),
+        ),
+    ]
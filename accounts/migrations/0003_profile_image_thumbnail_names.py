@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_jobseeker_resume_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_image_thumbnails',
+            field=models.CharField(blank=True, editable=False, help_text='Image whose thumbnails have been created', max_length=100),
+        ),
+    ]
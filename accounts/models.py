@@ -4,9 +4,50 @@ Supports three user types: Admin, Company, Job Seeker
 """
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.fields.files import FieldFile
+from jobs.storage import get_resume_storage
 import uuid
 
-class User(AbstractUser):
+
+class StoredValuesMixin:
+    """
+    Keeps the stored values of TRACKED_FIELDS (None: every column) in
+    ``_loaded_values``, taken in from_db and moved on only after a save has
+    sent its signals. Signal handlers compare against it to tell what a save
+    changed, whatever order they run in; a new row has no stored values.
+    """
+    TRACKED_FIELDS = None
+    
+    @classmethod
+    def _tracked_fields(cls):
+        if cls.TRACKED_FIELDS is None:
+            return [field.attname for field in cls._meta.concrete_fields]
+        return cls.TRACKED_FIELDS
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        tracked = cls._tracked_fields()
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if name in tracked
+        }
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        tracked = self._tracked_fields()
+        stored = dict(getattr(self, '_loaded_values', {}))
+        for field in self._meta.concrete_fields:
+            if field.attname not in tracked:
+                continue
+            if update_fields is None or field.name in update_fields or field.attname in update_fields:
+                value = getattr(self, field.attname)
+                stored[field.attname] = value.name if isinstance(value, FieldFile) else value
+        self._loaded_values = stored
+
+
+class User(StoredValuesMixin, AbstractUser):
     """Extended User model with role-based access"""
     
     USER_TYPE_CHOICES = (
@@ -19,11 +60,16 @@ class User(AbstractUser):
     user_type = models.CharField(max_length=20, choices=USER_TYPE_CHOICES, default='jobseeker')
     phone = models.CharField(max_length=15, blank=True)
     profile_image = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    profile_image_thumbnails = models.CharField(max_length=100, blank=True, editable=False,
+                                                help_text="Image whose thumbnails have been created")
     email = models.EmailField(unique=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Role and active flag for site statistics, the image for thumbnails
+    TRACKED_FIELDS = ('user_type', 'is_active', 'profile_image')
+    
     class Meta:
         db_table = 'users'
         verbose_name = 'User'
@@ -42,7 +88,7 @@ class User(AbstractUser):
         return self.user_type == 'jobseeker'
 
 
-class JobSeeker(models.Model):
+class JobSeeker(StoredValuesMixin, models.Model):
     """Profile for Job Seekers"""
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -52,7 +98,7 @@ class JobSeeker(models.Model):
     phone = models.CharField(max_length=20)
     address = models.TextField(blank=True)
     city = models.CharField(max_length=100, blank=True)
-    resume = models.FileField(upload_to='resumes/', blank=True, null=True)
+    resume = models.FileField(upload_to='resumes/', storage=get_resume_storage, blank=True, null=True)
     skills = models.TextField(blank=True, help_text="Comma-separated skills")
     education = models.TextField(blank=True)
     experience = models.TextField(blank=True)
@@ -60,6 +106,9 @@ class JobSeeker(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # The resume, for blob reference counts
+    TRACKED_FIELDS = ('resume',)
+    
     class Meta:
         db_table = 'jobseekers'
         verbose_name = 'Job Seeker'
@@ -67,3 +116,4 @@ class JobSeeker(models.Model):
     
     def __str__(self):
         return self.full_name
+
@@ -0,0 +1,62 @@
+"""
+Signal handlers for the accounts app
+
+Handlers tell what a save changed from ``_loaded_values`` (see
+StoredValuesMixin), which only moves on after all of them have run.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from jobs import site_stats, storage
+from . import images
+from .models import JobSeeker, User
+
+
+@receiver(post_save, sender=User)
+def update_site_stats_for_user(sender, instance, created=False, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if created:
+        was_counted = False
+    elif 'user_type' in loaded and 'is_active' in loaded:
+        was_counted = site_stats.jobseeker_counted(loaded['user_type'], loaded['is_active'])
+    else:
+        return  # Previous state unknown; left to reconcile_site_stats
+    is_counted = site_stats.jobseeker_counted(instance.user_type, instance.is_active)
+    site_stats.adjust(active_jobseekers=is_counted - was_counted)
+
+
+@receiver(post_delete, sender=User)
+def update_site_stats_for_deleted_user(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    user_type = loaded.get('user_type', instance.user_type)
+    is_active = loaded.get('is_active', instance.is_active)
+    if site_stats.jobseeker_counted(user_type, is_active):
+        site_stats.adjust(active_jobseekers=-1)
+
+
+@receiver(post_save, sender=User)
+def create_profile_image_thumbnails(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'profile_image' not in update_fields:
+        return
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    image = instance.profile_image
+    if image and image.name != loaded.get('profile_image'):
+        transaction.on_commit(lambda: images.schedule(image))
+
+
+@receiver(post_save, sender=JobSeeker)
+def update_resume_references(sender, instance, created=False, update_fields=None, **kwargs):
+    """Keep StoredBlob.ref_count in step with the profiles pointing at each blob"""
+    if update_fields is not None and 'resume' not in update_fields:
+        return
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if not created and 'resume' not in loaded:
+        return  # Stored value unknown; recount_references corrects any drift
+    old_name = None if created else loaded['resume'] or None
+    storage.replace_reference(old_name, instance.resume.name or None)
+
+
+@receiver(post_delete, sender=JobSeeker)
+def release_resume_references(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    storage.release_reference(loaded.get('resume', instance.resume.name) or None)
@@ -0,0 +1,13 @@
+"""
+Template tags for image thumbnails
+"""
+from django import template
+from accounts import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail(image, size='small', fmt='webp'):
+    """URL of ``image`` at one of IMAGE_THUMBNAIL_SIZES, e.g. {% thumbnail company.company_logo 'small' %}"""
+    return images.thumbnail_url(image, size, fmt)
@@ -1 +1,104 @@
- 
+import os
+from io import BytesIO, StringIO
+from unittest import mock
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TransactionTestCase
+from PIL import Image
+from companies.models import Company
+from jobs.tests import PortalTestCase, PortalTestMixin, create_company, create_jobseeker
+from . import images
+from .models import User
+
+
+def image_file(size, mode='RGB', fmt='PNG'):
+    buffer = BytesIO()
+    Image.new(mode, size).save(buffer, fmt)
+    return ContentFile(buffer.getvalue())
+
+
+class ThumbnailTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        # Thumbnails are written by the tests themselves, not the upload pool
+        patcher = mock.patch.object(images, 'schedule')
+        self.schedule = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def logo_dir(self):
+        return os.path.join(settings.MEDIA_ROOT, 'company_logos')
+
+    def test_every_size_is_written_in_both_formats(self):
+        self.company.company_logo.save('acme.png', image_file((1200, 600), 'RGBA'))
+        self.assertEqual(images.generate(self.company.company_logo.name), 6)
+        self.assertEqual(len(os.listdir(self.logo_dir())), 7)
+        with Image.open(os.path.join(self.logo_dir(), 'acme.small.jpg')) as thumbnail:
+            self.assertEqual(thumbnail.size, (96, 48))
+        self.assertEqual(images.generate(self.company.company_logo.name), 0)
+
+    def test_tag_falls_back_to_the_original_without_storage_lookups(self):
+        self.company.company_logo.save('acme.png', image_file((400, 200)))
+        template = Template("{% load image_tags %}{% thumbnail logo 'small' %}|{% thumbnail logo 'huge' %}")
+        with mock.patch('django.core.files.storage.FileSystemStorage.exists', side_effect=AssertionError):
+            html = template.render(Context({'logo': self.company.company_logo}))
+            self.assertEqual(html, '/media/company_logos/acme.png|/media/company_logos/acme.png')
+
+            images.mark_generated(['company_logos/acme.png'])
+            logo = Company.objects.get(pk=self.company.pk).company_logo
+            html = template.render(Context({'logo': logo}))
+            self.assertEqual(html, '/media/company_logos/acme.small.webp|/media/company_logos/acme.png')
+
+    def test_only_new_images_are_scheduled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.company_logo.save('acme.png', image_file((400, 200)))
+        self.assertEqual(self.schedule.call_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.name = 'Acme Labs'
+            self.company.save()
+        self.assertEqual(self.schedule.call_count, 1)
+
+    def test_command_backfills_existing_images(self):
+        self.company.company_logo.save('acme.png', image_file((400, 200)))
+        user = create_jobseeker()
+        os.makedirs(os.path.join(settings.MEDIA_ROOT, 'profiles'))
+        with open(os.path.join(settings.MEDIA_ROOT, 'profiles', 'me.jpg'), 'wb') as f:
+            f.write(image_file((300, 500), fmt='JPEG').read())
+        User.objects.filter(pk=user.pk).update(profile_image='profiles/me.jpg')
+
+        out = StringIO()
+        call_command('generate_thumbnails', '--workers', '2', stdout=out)
+        self.assertIn('12 thumbnails written for 2 images', out.getvalue())
+        self.assertEqual(User.objects.get(pk=user.pk).profile_image_thumbnails, 'profiles/me.jpg')
+
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn('0 thumbnails', out.getvalue())
+
+
+class BackgroundThumbnailTests(PortalTestMixin, TransactionTestCase):
+    """The upload pool runs outside the test transaction, so rows are really committed here"""
+
+    def test_upload_is_marked_once_its_thumbnails_exist(self):
+        futures = []
+        schedule = images.schedule
+
+        def keep_future(fieldfile):
+            future = schedule(fieldfile)
+            futures.append(future)
+            return future
+
+        company = create_company()
+        with mock.patch.object(images, 'schedule', side_effect=keep_future):
+            company.company_logo.save('acme.png', image_file((400, 200)))
+        self.assertEqual(len(futures), 1)
+        futures[0].result(timeout=30)
+
+        company = Company.objects.get(pk=company.pk)
+        self.assertTrue(images.has_thumbnails(company.company_logo))
+        company.company_logo = 'company_logos/other.png'
+        self.assertFalse(images.has_thumbnails(company.company_logo))
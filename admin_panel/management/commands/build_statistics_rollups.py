@@ -0,0 +1,25 @@
+"""
+Management command to build the daily rollups behind the admin statistics page
+"""
+import time
+from django.core.management.base import BaseCommand
+from admin_panel.rollups import build_rollups
+
+
+class Command(BaseCommand):
+    help = 'Roll up applications and jobs per day from the last watermark'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Drop all rollups and rebuild them from the first application'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        days, application_rows, job_rows = build_rollups(rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] Rolled up {days} days ({application_rows} application rows, '
+            f'{job_rows} job rows) in {time.monotonic() - started:.2f}s'
+        ))
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('companies', '0003_job_view_batches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('next_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'rollup_watermarks',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyJobRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Job Rollup',
+                'verbose_name_plural': 'Daily Job Rollups',
+                'db_table': 'daily_job_rollups',
+                'indexes': [models.Index(fields=['date'], name='daily_job_r_date_b4230e_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyApplicationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(max_length=100)),
+                ('status', models.CharField(max_length=30)),
+                ('count', models.IntegerField(default=0)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='application_rollups', to='companies.company')),
+            ],
+            options={
+                'verbose_name': 'Daily Application Rollup',
+                'verbose_name_plural': 'Daily Application Rollups',
+                'db_table': 'daily_application_rollups',
+                'indexes': [models.Index(fields=['date'], name='daily_appli_date_d0b64b_idx'), models.Index(fields=['company', 'date'], name='daily_appli_company_3a6017_idx')],
+            },
+        ),
+    ]
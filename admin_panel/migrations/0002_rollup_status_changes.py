@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rollupwatermark',
+            name='changes_since',
+            field=models.DateTimeField(blank=True, help_text='Start of the last run', null=True),
+        ),
+    ]
@@ -0,0 +1,62 @@
+"""
+Rollup tables behind the admin statistics page
+"""
+from django.db import models
+from companies.models import Company
+
+
+class DailyApplicationRollup(models.Model):
+    """Applications received per day, company, job category and status"""
+    
+    date = models.DateField()
+    company = models.ForeignKey(Company, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='application_rollups')
+    category = models.CharField(max_length=100)
+    status = models.CharField(max_length=30)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'daily_application_rollups'
+        verbose_name = 'Daily Application Rollup'
+        verbose_name_plural = 'Daily Application Rollups'
+        indexes = [
+            models.Index(fields=['date']),
+            models.Index(fields=['company', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.category} {self.status}: {self.count}"
+
+
+class DailyJobRollup(models.Model):
+    """Jobs posted per day and category"""
+    
+    date = models.DateField()
+    category = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'daily_job_rollups'
+        verbose_name = 'Daily Job Rollup'
+        verbose_name_plural = 'Daily Job Rollups'
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.category}: {self.count}"
+
+
+class RollupWatermark(models.Model):
+    """First day that has not been closed yet, per rollup job"""
+    
+    name = models.CharField(max_length=50, primary_key=True)
+    next_date = models.DateField(null=True, blank=True)
+    changes_since = models.DateTimeField(null=True, blank=True, help_text="Start of the last run")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'rollup_watermarks'
+    
+    def __str__(self):
+        return f"{self.name}: {self.next_date}"
@@ -1 +1,141 @@
- 
+from datetime import timedelta
+from django.core.cache import cache
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.test import override_settings
+from django.utils import timezone
+from accounts.models import User
+from jobs.models import Application
+from jobs.tests import (
+    PASSWORD, PortalTestCase, create_application, create_company, create_job, create_jobseeker
+)
+from . import metrics
+from .models import DailyApplicationRollup, DailyJobRollup
+from .rollups import build_rollups
+
+
+def create_admin(username='admin'):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com', password=PASSWORD, user_type='admin'
+    )
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class AdminDashboardTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        create_company('Globex', status='pending')
+        for number in range(3):
+            create_job(self.company, f'Developer {number}')
+        self.admin = create_admin()
+        self.client.login(username='admin', password=PASSWORD)
+
+    def test_metrics(self):
+        response = self.client.get('/admin/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_companies'], 2)
+        self.assertEqual(response.context['pending_companies'], 1)
+        self.assertEqual(response.context['active_jobs'], 3)
+
+    def test_metrics_are_cached_until_refresh(self):
+        self.client.get('/admin/')
+        create_job(self.company, 'Late job')
+        self.assertEqual(self.client.get('/admin/').context['total_jobs'], 3)
+        self.assertEqual(self.client.get('/admin/?refresh=1').context['total_jobs'], 4)
+
+    def test_cold_cache_stays_within_budget(self):
+        # First visit of a new admin: metrics, unread counter and page all cold
+        response = self.client.get('/admin/')
+        self.assertEqual(response.status_code, 200)
+
+        cache.clear()
+        with self.settings(UNREAD_NOTIFICATIONS_RECOUNT_INTERVAL=0):
+            response = self.client.get('/admin/?refresh=1')
+        self.assertEqual(response.status_code, 200)
+
+
+class QueryBudgetTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        @metrics.query_budget(1)
+        def view(request):
+            list(User.objects.all())
+            list(User.objects.all())
+            return HttpResponse()
+        self.view = view
+
+    def test_overrun_is_logged(self):
+        with self.assertLogs('admin_panel.metrics', 'WARNING') as logs:
+            self.assertEqual(self.view(None).status_code, 200)
+        self.assertIn('view ran 2 queries (budget 1)', logs.output[0])
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_overrun_raises_when_enabled(self):
+        with self.assertLogs('admin_panel.metrics', 'WARNING'):
+            with self.assertRaises(metrics.QueryBudgetExceeded):
+                self.view(None)
+
+
+@override_settings(STATISTICS_ROLLUP_RECOMPUTE_DAYS=7)
+class RollupTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        self.job = create_job(self.company)
+        self.today = timezone.localdate()
+
+    def apply(self, username, days_ago=0):
+        application = create_application(self.job, create_jobseeker(username))
+        Application.objects.filter(pk=application.pk).update(
+            applied_at=timezone.now() - timedelta(days=days_ago)
+        )
+        return application
+
+    def counts(self, **filters):
+        rows = DailyApplicationRollup.objects.filter(**filters).values('date').annotate(total=Sum('count'))
+        return {row['date']: row['total'] for row in rows}
+
+    def test_counts_applications_and_jobs_per_day(self):
+        self.apply('ann')
+        self.apply('bob')
+        self.apply('cat', days_ago=3)
+        build_rollups()
+        self.assertEqual(self.counts(), {self.today: 2, self.today - timedelta(days=3): 1})
+        self.assertEqual(DailyJobRollup.objects.get().count, 1)
+
+    def test_runs_are_repeatable(self):
+        self.apply('ann')
+        build_rollups()
+        build_rollups()
+        self.assertEqual(self.counts(), {self.today: 1})
+
+    def test_status_change_reaches_an_old_day(self):
+        application = self.apply('ann', days_ago=20)
+        build_rollups()
+        application.update_status('shortlisted')
+        build_rollups()
+        day = self.today - timedelta(days=20)
+        self.assertEqual(self.counts(date=day, status='shortlisted'), {day: 1})
+        self.assertEqual(self.counts(date=day, status='applied'), {})
+
+    def test_deletion_drops_out_within_the_recompute_window(self):
+        application = self.apply('ann', days_ago=3)
+        self.apply('bob', days_ago=3)
+        build_rollups()
+        application.delete()
+        build_rollups()
+        self.assertEqual(self.counts(), {self.today - timedelta(days=3): 1})
+
+    def test_deletion_before_the_window_needs_a_rebuild(self):
+        application = self.apply('ann', days_ago=20)
+        build_rollups()
+        application.delete()
+        build_rollups()
+        self.assertEqual(self.counts(), {self.today - timedelta(days=20): 1})
+        build_rollups(rebuild=True)
+        self.assertEqual(self.counts(), {})
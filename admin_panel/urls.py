@@ -17,6 +17,7 @@ urlpatterns = [
     
     # Job Management
     path('jobs/', views.admin_job_list, name='admin_job_list'),
+    path('jobs/applications/export/', views.admin_applications_export, name='admin_applications_export'),
     path('jobs/<uuid:pk>/', views.admin_job_detail, name='admin_job_detail'),
     path('jobs/<uuid:pk>/deactivate/', views.admin_job_deactivate, name='admin_job_deactivate'),
     path('jobs/<uuid:pk>/delete/', views.admin_job_delete, name='admin_job_delete'),
@@ -27,4 +28,5 @@ urlpatterns = [
     
     # Statistics
     path('statistics/', views.admin_statistics, name='admin_statistics'),
+    path('statistics/search-cache/', views.admin_search_cache_stats, name='admin_search_cache_stats'),
 ] 
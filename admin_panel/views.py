@@ -1,38 +1,35 @@
 """
 Views for admin dashboard
 """
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count, Q
+from django.http import JsonResponse
+from django.db import transaction
+from django.db.models import Q, Sum
 from django.utils import timezone
 from accounts.decorators import admin_required
 from accounts.models import User, JobSeeker
 from companies.models import Company, Job
+from jobs.exports import export_response
 from jobs.models import Application
+from jobs.pagination import CursorPaginator
+from jobs.search_cache import search_cache
+from .metrics import get_dashboard_metrics, query_budget
+from .models import DailyApplicationRollup, DailyJobRollup
 from notifications.utils import notify_company_approved, notify_company_rejected
 
+ADMIN_JOBS_PER_PAGE = 50
+STATISTICS_RANGES = (30, 90, 365)  # days
+
 @login_required
 @admin_required
+@query_budget(settings.ADMIN_DASHBOARD_QUERY_BUDGET)
 def admin_dashboard(request):
     """Main admin dashboard with statistics"""
-    # Company statistics
-    total_companies = Company.objects.count()
-    pending_companies = Company.objects.filter(status='pending').count()
-    approved_companies = Company.objects.filter(status='approved').count()
-    rejected_companies = Company.objects.filter(status='rejected').count()
-    
-    # Job statistics
-    total_jobs = Job.objects.count()
-    active_jobs = Job.objects.filter(is_active=True, is_published=True).count()
-    inactive_jobs = Job.objects.filter(is_active=False).count()
-    
-    # Application statistics
-    total_applications = Application.objects.count()
-    pending_applications = Application.objects.filter(status='applied').count()
-    
-    # User statistics
-    total_jobseekers = User.objects.filter(user_type='jobseeker').count()
+    # Company, job, application and user statistics (one query per table, cached)
+    metrics = get_dashboard_metrics(refresh=request.GET.get('refresh') == '1')
     
     # Recent activities
     recent_companies = Company.objects.all().order_by('-created_at')[:5]
@@ -42,16 +39,7 @@ def admin_dashboard(request):
     ).order_by('-applied_at')[:10]
     
     context = {
-        'total_companies': total_companies,
-        'pending_companies': pending_companies,
-        'approved_companies': approved_companies,
-        'rejected_companies': rejected_companies,
-        'total_jobs': total_jobs,
-        'active_jobs': active_jobs,
-        'inactive_jobs': inactive_jobs,
-        'total_applications': total_applications,
-        'pending_applications': pending_applications,
-        'total_jobseekers': total_jobseekers,
+        **metrics,
         'recent_companies': recent_companies,
         'recent_jobs': recent_jobs,
         'recent_applications': recent_applications,
@@ -124,10 +112,11 @@ def admin_company_approve(request, pk):
         if company.status == 'approved':
             messages.warning(request, 'Company is already approved.')
         else:
-            company.approve(request.user)
-            
-            # Send notification
-            notify_company_approved(company)
+            with transaction.atomic():
+                company.approve(request.user)
+                
+                # Send notification
+                notify_company_approved(company)
             
             messages.success(request, f'Company "{company.name}" approved successfully!')
         
@@ -152,10 +141,11 @@ def admin_company_reject(request, pk):
         if company.status == 'rejected':
             messages.warning(request, 'Company is already rejected.')
         else:
-            company.reject(reason, request.user)
-            
-            # Send notification
-            notify_company_rejected(company)
+            with transaction.atomic():
+                company.reject(reason, request.user)
+                
+                # Send notification
+                notify_company_rejected(company, reason)
             
             messages.success(request, f'Company "{company.name}" rejected.')
         
@@ -184,15 +174,10 @@ def admin_company_delete(request, pk):
     return render(request, 'admin_panel/company_confirm_delete.html', {'company': company})
 
 
-@login_required
-@admin_required
-def admin_job_list(request):
-    """List all jobs across all companies"""
-    jobs = Job.objects.all().select_related('company').annotate(
-        application_count=Count('applications')
-    )
+def _filter_jobs(request):
+    """Jobs matching the admin job list filters, plus the filter values"""
+    jobs = Job.objects.all()
     
-    # Apply filters
     status_filter = request.GET.get('status', '')
     company_filter = request.GET.get('company', '')
     search_query = request.GET.get('search', '')
@@ -211,14 +196,30 @@ def admin_job_list(request):
             Q(description__icontains=search_query) |
             Q(company__name__icontains=search_query)
         )
+    return jobs, status_filter, company_filter, search_query
+
+
+@login_required
+@admin_required
+def admin_job_list(request):
+    """List all jobs across all companies"""
+    jobs, status_filter, company_filter, search_query = _filter_jobs(request)
+    jobs = jobs.select_related('company')
     
-    jobs = jobs.order_by('-created_at')
+    # Keyset pagination keeps deep pages as cheap as the first one
+    paginator = CursorPaginator(
+        jobs, ADMIN_JOBS_PER_PAGE, ('-created_at', '-id'),
+        count_timeout=settings.PAGINATION_COUNT_CACHE_TIMEOUT
+    )
+    jobs_page = paginator.get_page(request.GET.get('cursor'))
     
     # Get all companies for filter
     companies = Company.objects.filter(status='approved').order_by('name')
     
     context = {
-        'jobs': jobs,
+        'jobs': jobs_page,
+        'page_obj': jobs_page,
+        'total_jobs': paginator.count,
         'companies': companies,
         'status_filter': status_filter,
         'company_filter': company_filter,
@@ -227,6 +228,20 @@ def admin_job_list(request):
     return render(request, 'admin_panel/job_list.html', context)
 
 
+@login_required
+@admin_required
+def admin_applications_export(request):
+    """Download applications to the jobs in the admin job list filters as CSV or JSONL"""
+    jobs, _, _, _ = _filter_jobs(request)
+    applications = Application.objects.filter(job__in=jobs.values('pk'))
+    
+    application_status = request.GET.get('application_status', '')
+    if application_status in dict(Application.STATUS_CHOICES):
+        applications = applications.filter(status=application_status)
+    
+    return export_response(applications, request.GET.get('format', 'csv'), 'all-applications')
+
+
 @login_required
 @admin_required
 def admin_job_detail(request, pk):
@@ -320,36 +335,60 @@ def admin_user_toggle_status(request, pk):
 @login_required
 @admin_required
 def admin_statistics(request):
-    """Detailed statistics and analytics"""
+    """Detailed statistics and analytics (read from the daily rollups)"""
     from datetime import timedelta
-    from django.db.models.functions import TruncDate
     
-    # Get date range (last 30 days)
-    end_date = timezone.now()
-    start_date = end_date - timedelta(days=30)
+    # Get date range (last 30 days by default)
+    try:
+        days = int(request.GET.get('days', 30))
+    except ValueError:
+        days = 30
+    if days not in STATISTICS_RANGES:
+        days = 30
+    start_date = timezone.localdate() - timedelta(days=days - 1)
+    
+    applications = DailyApplicationRollup.objects.filter(date__gte=start_date)
     
     # Applications over time
-    applications_by_date = Application.objects.filter(
-        applied_at__gte=start_date
-    ).annotate(
-        date=TruncDate('applied_at')
-    ).values('date').annotate(
-        count=Count('id')
+    applications_by_date = applications.values('date').annotate(
+        count=Sum('count')
     ).order_by('date')
     
-    # Jobs by category
-    jobs_by_category = Job.objects.values('category').annotate(
-        count=Count('id')
+    # Applications by status
+    applications_by_status = applications.values('status').annotate(
+        count=Sum('count')
+    ).order_by('-count')
+    
+    # Jobs posted by category
+    jobs_by_category = DailyJobRollup.objects.filter(date__gte=start_date).values('category').annotate(
+        count=Sum('count')
     ).order_by('-count')[:10]
     
     # Top companies by applications
-    top_companies = Company.objects.annotate(
-        app_count=Count('received_applications')
-    ).order_by('-app_count')[:10]
+    top_counts = list(applications.filter(company__isnull=False).values('company').annotate(
+        app_count=Sum('count')
+    ).order_by('-app_count')[:10])
+    companies = Company.objects.in_bulk([row['company'] for row in top_counts])
+    top_companies = []
+    for row in top_counts:
+        company = companies.get(row['company'])
+        if company is not None:
+            company.app_count = row['app_count']
+            top_companies.append(company)
     
     context = {
         'applications_by_date': applications_by_date,
+        'applications_by_status': applications_by_status,
         'jobs_by_category': jobs_by_category,
         'top_companies': top_companies,
+        'days': days,
+        'range_choices': STATISTICS_RANGES,
     }
     return render(request, 'admin_panel/statistics.html', context)
+
+
+@login_required
+@admin_required
+def admin_search_cache_stats(request):
+    """Hit rate and invalidation counters of this worker's job search cache (JSON)"""
+    return JsonResponse(search_cache.stats())
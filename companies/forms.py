@@ -179,8 +179,19 @@ class JobSearchForm(forms.Form):
         choices=[
             ('-created_at', 'Newest First'),
             ('created_at', 'Oldest First'),
+            ('relevance', 'Most Relevant'),
             ('title', 'Title A-Z'),
             ('-title', 'Title Z-A'),
         ],
         widget=forms.Select(attrs={'class': 'form-select'})
     )
+    
+    def apply_facets(self, facets):
+        """Show result counts next to the job type and experience options"""
+        for name in ('employment_type', 'experience'):
+            field = self.fields[name]
+            counts = facets.get(name, {})
+            field.choices = [field.choices[0]] + [
+                (value, f'{label} ({counts.get(value, 0):,})')
+                for value, label in field.choices[1:]
+            ]
@@ -0,0 +1,44 @@
+"""
+Management command to apply spooled job view counts
+"""
+import os
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from companies import view_counts
+from companies.models import JobViewBatch
+
+
+class Command(BaseCommand):
+    help = 'Apply spooled job view counts and prune old batch records'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=7,
+            help='Keep applied batch ids this many days (default: 7)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        batches, views = view_counts.drain_spool()
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] Applied {batches} batches ({views} views) in {time.monotonic() - started:.2f}s'
+        ))
+
+        # Leftover temp files belong to writers that died mid-spill
+        spool = str(settings.VIEW_COUNT_SPOOL_DIR)
+        if os.path.isdir(spool):
+            stale_before = time.time() - settings.VIEW_COUNT_CLAIM_TIMEOUT
+            for name in os.listdir(spool):
+                path = os.path.join(spool, name)
+                if name.endswith('.tmp') and os.path.getmtime(path) < stale_before:
+                    os.remove(path)
+
+        # Batch ids only need to outlive any retry of the same spool file
+        cutoff = timezone.now() - timedelta(days=options['keep_days'])
+        pruned, _ = JobViewBatch.objects.filter(applied_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'[OK] Pruned {pruned} old batch records'))
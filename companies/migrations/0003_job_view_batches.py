@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_application_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobViewBatch',
+            fields=[
+                ('batch_id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('view_count', models.IntegerField(default=0)),
+                ('applied_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Job View Batch',
+                'verbose_name_plural': 'Job View Batches',
+                'db_table': 'job_view_batches',
+                'indexes': [models.Index(fields=['applied_at'], name='job_view_ba_applied_e4087a_idx')],
+            },
+        ),
+    ]
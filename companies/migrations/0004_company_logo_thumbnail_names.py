@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_job_view_batches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='company_logo_thumbnails',
+            field=models.CharField(blank=True, editable=False, help_text='Logo whose thumbnails have been created', max_length=100),
+        ),
+    ]
@@ -3,10 +3,25 @@ Company and Job Models
 """
 from django.db import models
 from django.utils import timezone
-from accounts.models import User
+from accounts.models import StoredValuesMixin, User
 import uuid
 
-class Company(models.Model):
+
+def _save_without_counters(instance, kwargs):
+    """
+    Limit an ordinary update to the non-counter columns. Counters are only
+    changed with F() updates, so a full save would write back the value read
+    at the start of the request and undo increments committed since.
+    """
+    if not instance._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+        kwargs['update_fields'] = [
+            field.name for field in instance._meta.concrete_fields
+            if not field.primary_key and field.name not in instance.COUNTER_FIELDS
+        ]
+    return kwargs
+
+
+class Company(StoredValuesMixin, models.Model):
     """Company profile linked to user account"""
     
     STATUS_CHOICES = (
@@ -31,6 +46,8 @@ class Company(models.Model):
     state = models.CharField(max_length=100)
     registration_number = models.CharField(max_length=100, unique=True)
     company_logo = models.ImageField(upload_to='company_logos/', blank=True, null=True)
+    company_logo_thumbnails = models.CharField(max_length=100, blank=True, editable=False,
+                                               help_text="Logo whose thumbnails have been created")
     
     # Approval Status
     is_verified = models.BooleanField(default=False)
@@ -39,9 +56,24 @@ class Company(models.Model):
     approved_date = models.DateTimeField(null=True, blank=True)
     rejection_reason = models.TextField(blank=True)
     
+    # Application counters per status (maintained by jobs.signals)
+    applied_count = models.IntegerField(default=0)
+    under_review_count = models.IntegerField(default=0)
+    shortlisted_count = models.IntegerField(default=0)
+    interview_scheduled_count = models.IntegerField(default=0)
+    accepted_count = models.IntegerField(default=0)
+    rejected_count = models.IntegerField(default=0)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    COUNTER_FIELDS = (
+        'applied_count', 'under_review_count', 'shortlisted_count',
+        'interview_scheduled_count', 'accepted_count', 'rejected_count',
+    )
+    # Status for approvals and site statistics, the logo for thumbnails
+    TRACKED_FIELDS = ('status', 'company_logo')
+    
     class Meta:
         db_table = 'companies'
         verbose_name = 'Company'
@@ -51,6 +83,9 @@ class Company(models.Model):
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **_save_without_counters(self, kwargs))
+    
     def approve(self, admin_user):
         """Approve company registration"""
         self.status = 'approved'
@@ -59,6 +94,23 @@ class Company(models.Model):
         self.admin_id = admin_user
         self.save()
     
+    @staticmethod
+    def application_counter_field(status):
+        """Name of the counter column for an application status"""
+        return f'{status}_count'
+    
+    def get_application_counts(self):
+        """Stored application counts keyed by status"""
+        from jobs.models import Application
+        return {
+            status: getattr(self, self.application_counter_field(status))
+            for status, _ in Application.STATUS_CHOICES
+        }
+    
+    @property
+    def total_applications(self):
+        return sum(self.get_application_counts().values())
+    
     def reject(self, reason, admin_user):
         """Reject company registration"""
         self.status = 'rejected'
@@ -68,7 +120,7 @@ class Company(models.Model):
         self.save()
 
 
-class Job(models.Model):
+class Job(StoredValuesMixin, models.Model):
     """Job postings by companies"""
     
     JOB_TYPE_CHOICES = (
@@ -120,9 +172,14 @@ class Job(models.Model):
     
     # Metadata
     views_count = models.IntegerField(default=0)
+    application_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    COUNTER_FIELDS = ('application_count', 'views_count')
+    # Every column: search, similarity, alerts and statistics all watch jobs
+    TRACKED_FIELDS = None
+    
     class Meta:
         db_table = 'jobs'
         verbose_name = 'Job'
@@ -138,13 +195,36 @@ class Job(models.Model):
     def __str__(self):
         return f"{self.title} at {self.company.name}"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **_save_without_counters(self, kwargs))
+    
     def increment_views(self):
-        """Increment job view count"""
+        """Increment job view count (written to the database in batches)"""
+        from .view_counts import record_view
+        record_view(self.pk)
         self.views_count += 1
-        self.save(update_fields=['views_count'])
     
     def is_deadline_passed(self):
         """Check if application deadline has passed"""
         if self.application_deadline:
             return timezone.now().date() > self.application_deadline
         return False
+
+
+class JobViewBatch(models.Model):
+    """Spooled view-count batches already applied to Job.views_count"""
+    
+    batch_id = models.CharField(max_length=32, primary_key=True)
+    view_count = models.IntegerField(default=0)
+    applied_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'job_view_batches'
+        verbose_name = 'Job View Batch'
+        verbose_name_plural = 'Job View Batches'
+        indexes = [
+            models.Index(fields=['applied_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.batch_id} ({self.view_count} views)"
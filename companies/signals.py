@@ -0,0 +1,172 @@
+"""
+Signal handlers for the companies app
+
+Handlers tell what a save changed from ``_loaded_values`` (see
+accounts.models.StoredValuesMixin), which only moves on after all of them
+have run, so they do not depend on each other's order.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from accounts import images
+from jobs import alerts, search, search_cache, similarity, site_stats
+from jobs.autocomplete import autocomplete_index
+from . import stats as company_stats
+from .models import Company, Job
+
+COUNTER_ONLY_FIELDS = set(Job.COUNTER_FIELDS)
+
+
+def _counters_only(update_fields):
+    return update_fields is not None and set(update_fields) <= COUNTER_ONLY_FIELDS
+
+
+@receiver(post_save, sender=Job)
+def update_job_search_index(sender, instance, update_fields=None, **kwargs):
+    """Keep the search index in sync when a job's searchable text changes"""
+    if update_fields is not None and not search.INDEXED_JOB_FIELDS.intersection(update_fields):
+        return
+    search.index_job(instance)
+
+
+@receiver(post_save, sender=Job)
+def invalidate_job_search_results(sender, instance, update_fields=None, **kwargs):
+    if not _counters_only(update_fields):
+        search_cache.invalidate_job(instance)
+
+
+@receiver(post_save, sender=Job)
+def update_job_autocomplete(sender, instance, update_fields=None, **kwargs):
+    if not _counters_only(update_fields):
+        autocomplete_index.update_job(instance)
+
+
+@receiver(post_save, sender=Job)
+def update_similar_jobs(sender, instance, created=False, update_fields=None, **kwargs):
+    """Publishing, deactivating or rewording a job moves it in the similarity index"""
+    watched = similarity.VECTOR_FIELDS | similarity.LIVE_FIELDS
+    if update_fields is not None and not watched.intersection(update_fields):
+        return
+    loaded = getattr(instance, '_loaded_values', None)
+    if not created and loaded and all(loaded.get(name) == getattr(instance, name) for name in watched):
+        return
+    job_pk = instance.pk
+    transaction.on_commit(lambda: similarity.queue_jobs([job_pk]))
+
+
+@receiver(post_save, sender=Job)
+def match_job_alerts(sender, instance, created=False, update_fields=None, **kwargs):
+    """A job that goes live is matched against the saved searches"""
+    if update_fields is not None and not similarity.LIVE_FIELDS.intersection(update_fields):
+        return
+    if not (instance.is_active and instance.is_published):
+        return
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if not created and loaded.get('is_active') and loaded.get('is_published'):
+        return
+    job_pk = instance.pk
+    transaction.on_commit(lambda: alerts.match_jobs([job_pk]))
+
+
+@receiver(post_save, sender=Job)
+def invalidate_company_dashboard_stats(sender, instance, update_fields=None, **kwargs):
+    if not _counters_only(update_fields):
+        company_stats.invalidate(instance.company_id)
+
+
+@receiver(post_save, sender=Job)
+def update_site_stats_for_job(sender, instance, created=False, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if created:
+        was_counted = False
+    elif 'is_active' in loaded and 'is_published' in loaded:
+        was_counted = site_stats.job_counted(loaded['is_active'], loaded['is_published'])
+    else:
+        return  # Previous state unknown; left to reconcile_site_stats
+    is_counted = site_stats.job_counted(instance.is_active, instance.is_published)
+    site_stats.adjust(active_jobs=is_counted - was_counted)
+
+
+@receiver(post_delete, sender=Job)
+def remove_deleted_job(sender, instance, **kwargs):
+    """Drop a deleted job from the search index, caches and similarity index"""
+    search.remove_job(instance.pk)
+    search_cache.invalidate_job(instance)
+    autocomplete_index.remove_job(instance.pk)
+    company_stats.invalidate(instance.company_id)
+    job_pk = instance.pk
+    transaction.on_commit(lambda: similarity.queue_jobs([job_pk]))
+
+
+@receiver(post_delete, sender=Job)
+def update_site_stats_for_deleted_job(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    is_active = loaded.get('is_active', instance.is_active)
+    is_published = loaded.get('is_published', instance.is_published)
+    if site_stats.job_counted(is_active, is_published):
+        site_stats.adjust(active_jobs=-1)
+
+
+@receiver(post_save, sender=Company)
+def update_company_search_index(sender, instance, created=False, update_fields=None, **kwargs):
+    """Company name is part of every job's index entry"""
+    if created or (update_fields is not None and 'name' not in update_fields):
+        return
+    search.index_company_jobs(instance)
+
+
+@receiver(post_save, sender=Company)
+def invalidate_company_search_results(sender, instance, created=False, **kwargs):
+    """Status and name changes move all of a company's jobs in or out of results"""
+    if not created:
+        search_cache.invalidate_company(instance)
+        autocomplete_index.update_company(instance)
+
+
+@receiver(post_save, sender=Company)
+def update_company_similar_jobs(sender, instance, created=False, update_fields=None, **kwargs):
+    """Approving or suspending a company publishes or hides all of its jobs"""
+    if created or (update_fields is not None and 'status' not in update_fields):
+        return
+    job_pks = list(instance.jobs.values_list('pk', flat=True))
+    transaction.on_commit(lambda: similarity.queue_jobs(job_pks, text_changed=False))
+
+
+@receiver(post_save, sender=Company)
+def match_company_job_alerts(sender, instance, created=False, **kwargs):
+    """Approving a company puts its published jobs live"""
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if created or instance.status != 'approved' or loaded.get('status', 'approved') == 'approved':
+        return
+    job_ids = list(instance.jobs.filter(is_active=True, is_published=True).values_list('pk', flat=True))
+    if job_ids:
+        transaction.on_commit(lambda: alerts.match_jobs(job_ids))
+
+
+@receiver(post_save, sender=Company)
+def update_site_stats_for_company(sender, instance, created=False, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if created:
+        was_counted = False
+    elif 'status' in loaded:
+        was_counted = site_stats.company_counted(loaded['status'])
+    else:
+        return
+    site_stats.adjust(approved_companies=site_stats.company_counted(instance.status) - was_counted)
+
+
+@receiver(post_delete, sender=Company)
+def update_site_stats_for_deleted_company(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if site_stats.company_counted(loaded.get('status', instance.status)):
+        site_stats.adjust(approved_companies=-1)
+
+
+@receiver(post_save, sender=Company)
+def create_company_logo_thumbnails(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'company_logo' not in update_fields:
+        return
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    logo = instance.company_logo
+    if logo and logo.name != loaded.get('company_logo'):
+        transaction.on_commit(lambda: images.schedule(logo))
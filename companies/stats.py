@@ -0,0 +1,41 @@
+"""
+Per-company dashboard statistics
+
+Application numbers come from the per-status counters stored on Company
+(kept current by jobs.signals), so they cost nothing beyond loading the
+company. Job numbers come from one conditional aggregate, cached per company
+until one of its jobs is saved or deleted. The cache is local to each worker
+process, so other processes only see the change when their entry expires;
+COMPANY_STATS_CACHE_TIMEOUT is kept short for that reason.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+CACHE_KEY = 'company_dashboard_stats:{}'
+
+
+def _job_stats(company_id):
+    from .models import Job
+    return Job.objects.filter(company_id=company_id).aggregate(
+        total_jobs=Count('id'),
+        active_jobs=Count('id', filter=Q(is_active=True)),
+    )
+
+
+def get_dashboard_stats(company):
+    key = CACHE_KEY.format(company.pk)
+    job_stats = cache.get(key)
+    if job_stats is None:
+        job_stats = _job_stats(company.pk)
+        cache.set(key, job_stats, settings.COMPANY_STATS_CACHE_TIMEOUT)
+
+    return dict(
+        job_stats,
+        total_applications=company.total_applications,
+        pending_applications=company.applied_count,
+    )
+
+
+def invalidate(company_id):
+    cache.delete(CACHE_KEY.format(company_id))
@@ -1 +1,292 @@
- 
+import os
+from io import StringIO
+from unittest import mock
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.models.signals import post_save
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from jobs import counters
+from jobs.models import Application, SavedSearch, SavedSearchMatch, SiteStats
+from jobs.tests import PASSWORD, PortalTestCase, create_application, create_company, create_job, create_jobseeker
+from notifications import outbox
+from notifications.models import Notification
+from . import signals, view_counts
+from .models import Company, Job, JobViewBatch
+
+
+class ApplicationCounterTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        self.job = create_job(self.company)
+        self.applications = [
+            create_application(self.job, create_jobseeker(f'seeker{number}')) for number in range(3)
+        ]
+
+    def assertCounts(self, job_count, company_counts):
+        self.job.refresh_from_db()
+        self.company.refresh_from_db()
+        self.assertEqual(self.job.application_count, job_count)
+        counts = {status: count for status, count in self.company.get_application_counts().items() if count}
+        self.assertEqual(counts, company_counts)
+
+    def test_counters_follow_applications(self):
+        self.assertCounts(3, {'applied': 3})
+
+        self.applications[0].update_status('shortlisted')
+        self.assertCounts(3, {'applied': 2, 'shortlisted': 1})
+
+        self.applications[1].delete()
+        self.assertCounts(2, {'applied': 1, 'shortlisted': 1})
+
+    def test_status_saved_twice_is_counted_once(self):
+        application = self.applications[0]
+        application.status = 'rejected'
+        application.save()
+        application.save()
+        self.assertCounts(3, {'applied': 2, 'rejected': 1})
+
+    def test_full_save_keeps_counters(self):
+        stale_company = Company.objects.get(pk=self.company.pk)
+        stale_job = Job.objects.get(pk=self.job.pk)
+        create_application(self.job, create_jobseeker('late'))
+
+        stale_company.name = 'Renamed'
+        stale_company.save()
+        stale_job.title = 'Renamed'
+        stale_job.save()
+        self.assertCounts(4, {'applied': 4})
+
+    def test_rebuild_fixes_drift(self):
+        Job.objects.filter(pk=self.job.pk).update(application_count=9)
+        out = StringIO()
+        call_command('rebuild_application_counters', '--verify', stdout=out)
+        self.assertIn('expected 3', out.getvalue())
+
+        call_command('rebuild_application_counters', stdout=StringIO())
+        self.assertCounts(3, {'applied': 3})
+
+
+class CompanySignalTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company(status='pending')
+        create_job(self.company)
+        self.search = SavedSearch.objects.create(user=create_jobseeker(), keyword='python')
+
+    def approve(self):
+        company = Company.objects.get(pk=self.company.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            company.approve(None)
+        return company
+
+    def test_approval_updates_stats_and_alerts(self):
+        company = self.approve()
+        self.assertEqual(SiteStats.objects.get().approved_companies, 1)
+        self.assertTrue(SavedSearchMatch.objects.filter(saved_search=self.search).exists())
+        self.assertEqual(company._loaded_values['status'], 'approved')
+
+    def test_handlers_do_not_depend_on_their_order(self):
+        # Run the alert matcher after the site statistics handler
+        post_save.disconnect(signals.match_company_job_alerts, sender=Company)
+        post_save.connect(signals.match_company_job_alerts, sender=Company)
+        self.approve()
+        self.assertEqual(SiteStats.objects.get().approved_companies, 1)
+        self.assertTrue(SavedSearchMatch.objects.filter(saved_search=self.search).exists())
+
+    def test_saving_again_changes_nothing(self):
+        company = self.approve()
+        with self.captureOnCommitCallbacks(execute=True):
+            company.save()
+        self.assertEqual(SiteStats.objects.get().approved_companies, 1)
+        self.assertEqual(SavedSearchMatch.objects.count(), 1)
+
+    def test_update_fields_keep_other_stored_values(self):
+        company = Company.objects.get(pk=self.company.pk)
+        company.status = 'approved'
+        company.name = 'Renamed'
+        company.save(update_fields=['name'])
+        self.assertEqual(company._loaded_values['status'], 'pending')
+
+
+@override_settings(VIEW_COUNT_FLUSH_THRESHOLD=3, VIEW_COUNT_FLUSH_INTERVAL=3600)
+class ViewCountTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.spool = settings.VIEW_COUNT_SPOOL_DIR
+        for path in view_counts._pending_batches():
+            os.remove(path)
+        self.job = create_job(create_company())
+
+    def views(self):
+        self.job.refresh_from_db()
+        return self.job.views_count
+
+    def test_views_are_applied_in_batches(self):
+        for _ in range(2):
+            self.client.get(f'/jobs/{self.job.pk}/')
+        self.assertEqual(self.views(), 0)
+        self.client.get(f'/jobs/{self.job.pk}/')
+        self.assertEqual(self.views(), 3)
+        self.assertEqual(os.listdir(self.spool), [])
+
+    def test_batch_is_applied_once(self):
+        view_counts.record_view(self.job.pk)
+        view_counts.flush()
+        batch = JobViewBatch.objects.get()
+        self.assertFalse(view_counts.apply_batch(batch.batch_id, {str(self.job.pk): 1}))
+        self.assertEqual(self.views(), 1)
+
+    def test_abandoned_claim_is_retried(self):
+        view_counts.record_view(self.job.pk)
+        path = view_counts.spill()
+        os.utime(view_counts._claim(path), (0, 0))
+        self.assertEqual(view_counts.drain_spool(), (1, 1))
+        self.assertEqual(self.views(), 1)
+
+    def test_database_error_keeps_the_batch(self):
+        view_counts.record_view(self.job.pk)
+        with mock.patch.object(view_counts, 'apply_batch', side_effect=DatabaseError('locked')):
+            with self.assertLogs('companies.view_counts', 'WARNING'):
+                self.assertEqual(view_counts.flush(), (0, 0))
+        self.assertEqual(view_counts.flush(), (1, 1))
+        self.assertEqual(self.views(), 1)
+
+    def test_full_save_keeps_views(self):
+        stale = Job.objects.get(pk=self.job.pk)
+        view_counts.record_view(self.job.pk)
+        view_counts.flush()
+        stale.title = 'Edited'
+        stale.save()
+        self.assertEqual(self.views(), 1)
+
+    def test_unreadable_batch_is_moved_aside(self):
+        os.makedirs(self.spool, exist_ok=True)
+        with open(os.path.join(self.spool, 'broken.json'), 'w') as f:
+            f.write('{"batch_id": ')
+        with self.assertLogs('companies.view_counts', 'ERROR'):
+            self.assertEqual(view_counts.drain_spool(), (0, 0))
+        self.assertEqual(view_counts._pending_batches(), [])
+        self.assertEqual(len(os.listdir(os.path.join(self.spool, view_counts.CORRUPT_DIR))), 1)
+
+
+class CompanyDashboardTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        self.job = create_job(self.company)
+        create_job(self.company, 'Go Developer', is_active=False)
+        self.application = create_application(self.job, create_jobseeker())
+        self.client.login(username='acme-hr', password=PASSWORD)
+
+    def stats(self):
+        context = self.client.get('/company/dashboard/').context
+        names = ('total_jobs', 'active_jobs', 'total_applications', 'pending_applications')
+        return tuple(context[name] for name in names)
+
+    def test_stats(self):
+        self.assertEqual(self.stats(), (2, 1, 1, 1))
+
+    def test_cached_stats_count_nothing(self):
+        self.stats()
+        with CaptureQueriesContext(connection) as queries:
+            self.stats()
+        self.assertFalse([query for query in queries if 'COUNT' in query['sql']])
+
+    def test_job_and_application_changes_show_up(self):
+        self.stats()
+        self.job.is_active = False
+        self.job.save()
+        self.application.update_status('rejected')
+        self.assertEqual(self.stats(), (2, 0, 1, 0))
+
+
+class ApplicantInboxTests(PortalTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        company = create_company()
+        cls.job = create_job(company)
+        other_job = create_job(company, 'Go Developer')
+        for number in range(45):
+            create_application(
+                cls.job if number % 2 else other_job, create_jobseeker(f'seeker{number}'),
+                status='rejected' if number % 3 == 0 else 'applied'
+            )
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='acme-hr', password=PASSWORD)
+
+    def tab_counts(self, response):
+        return {value: count for value, _, count in response.context['status_tabs']}
+
+    def test_cursor_walks_a_status_tab(self):
+        seen, cursor = [], ''
+        while True:
+            response = self.client.get('/company/applications/', {'status': 'applied', 'cursor': cursor})
+            seen += [application.pk for application in response.context['applications']]
+            if not response.context['page_obj'].has_next():
+                break
+            cursor = response.context['page_obj'].next_cursor
+        self.assertEqual(len(set(seen)), 30)
+        self.assertEqual(self.tab_counts(response)['rejected'], 15)
+
+    def test_job_filter_counts_its_own_tabs(self):
+        response = self.client.get('/company/applications/', {'job': str(self.job.pk)})
+        self.assertEqual(response.context['total_applications'], 22)
+        self.assertEqual(self.tab_counts(response)['rejected'], 7)
+
+    def test_bad_filters_show_the_first_page(self):
+        response = self.client.get('/company/applications/', {'job': 'bogus', 'status': 'nope', 'cursor': 'zz'})
+        self.assertEqual(len(response.context['applications']), 25)
+
+
+class BulkStatusUpdateTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        job = create_job(self.company)
+        self.applications = [
+            create_application(job, create_jobseeker(f'seeker{number}'),
+                               status='shortlisted' if number == 0 else 'applied')
+            for number in range(4)
+        ]
+        self.foreign = create_application(create_job(create_company('Globex')), create_jobseeker('outsider'))
+        self.client.login(username='acme-hr', password=PASSWORD)
+
+    def post(self, status, ids):
+        return self.client.post(
+            '/company/applications/bulk-update-status/', {'status': status, 'application_ids': ids},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+
+    def test_updates_counters_and_notifies_once_per_applicant(self):
+        ids = [str(application.pk) for application in self.applications[:3]]
+        data = self.post('rejected', ids).json()
+        self.assertEqual(data['updated'], 3)
+        self.assertEqual(data['results'][ids[0]]['old_status'], 'shortlisted')
+        self.assertEqual(Application.objects.filter(status='rejected').count(), 3)
+        self.assertEqual(counters.find_drift(), ({}, {}))
+
+        self.assertEqual(outbox.drain(), (3, 0))
+        self.assertEqual(Notification.objects.filter(notification_type='status_change').count(), 3)
+        self.assertEqual(self.post('rejected', ids).json()['updated'], 0)
+
+    def test_other_companies_and_bad_ids_are_reported(self):
+        data = self.post('rejected', [str(self.foreign.pk), 'junk']).json()
+        self.assertEqual(data['updated'], 0)
+        self.assertFalse(data['results'][str(self.foreign.pk)]['success'])
+        self.assertFalse(data['results']['junk']['success'])
+        self.assertEqual(Application.objects.get(pk=self.foreign.pk).status, 'applied')
+
+    def test_invalid_status_is_rejected(self):
+        response = self.post('hired', [str(self.applications[1].pk)])
+        self.assertEqual(response.status_code, 400)
@@ -24,6 +24,8 @@ urlpatterns = [
     
     # Application Management
     path('applications/', views.company_applications, name='company_applications'),
+    path('applications/export/', views.company_applications_export, name='company_applications_export'),
+    path('applications/bulk-update-status/', views.application_bulk_update_status, name='application_bulk_update_status'),
     path('applications/<uuid:pk>/', views.application_detail, name='application_detail'),
     path('applications/<uuid:pk>/update-status/', views.application_update_status, name='application_update_status'),
 ] 
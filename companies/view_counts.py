@@ -0,0 +1,201 @@
+"""
+Buffered job view counting
+
+Views are counted in memory per process and periodically spilled to a spool
+directory as small JSON batch files. Any process can then drain the spool:
+a batch is claimed by atomically renaming its file, applied with batched
+``F()`` updates, and recorded in ``JobViewBatch`` in the same transaction.
+A batch that was already applied (e.g. the worker died before deleting the
+file) is detected by its id and skipped, so nothing is counted twice. Files
+that cannot be parsed are moved to the ``corrupt`` subdirectory.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+BATCH_SUFFIX = '.json'
+CLAIMED_SUFFIX = '.claimed'
+CORRUPT_DIR = 'corrupt'
+
+_lock = threading.Lock()
+_pending = Counter()
+_pending_total = 0
+_last_spill = time.monotonic()
+
+
+def _spool_dir():
+    return str(settings.VIEW_COUNT_SPOOL_DIR)
+
+
+def record_view(job_id):
+    """Count one view of a job; flushes when the buffer is full or old enough"""
+    global _pending_total
+    with _lock:
+        _pending[str(job_id)] += 1
+        _pending_total += 1
+        due = (
+            _pending_total >= settings.VIEW_COUNT_FLUSH_THRESHOLD or
+            time.monotonic() - _last_spill >= settings.VIEW_COUNT_FLUSH_INTERVAL
+        )
+    if due:
+        flush(max_batches=settings.VIEW_COUNT_DRAIN_LIMIT)
+
+
+def spill():
+    """Write this process's buffered counts to a new spool file"""
+    global _pending, _pending_total, _last_spill
+    with _lock:
+        counts, _pending = _pending, Counter()
+        _pending_total = 0
+        _last_spill = time.monotonic()
+    if not counts:
+        return None
+
+    spool = _spool_dir()
+    os.makedirs(spool, exist_ok=True)
+    batch_id = uuid.uuid4().hex
+    path = os.path.join(spool, batch_id + BATCH_SUFFIX)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'batch_id': batch_id, 'counts': counts}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    # Readers only pick up complete files
+    os.replace(tmp_path, path)
+    return path
+
+
+def _claim(path):
+    """Take ownership of a batch file; returns the claimed path or None"""
+    claimed = f'{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}{CLAIMED_SUFFIX}'
+    try:
+        os.rename(path, claimed)
+    except OSError:
+        return None  # Another process got there first
+    # Refresh mtime so the claim is not mistaken for a stale one
+    os.utime(claimed)
+    return claimed
+
+
+def _pending_batches():
+    """Unclaimed batch files, plus claims abandoned by dead workers"""
+    spool = _spool_dir()
+    try:
+        names = sorted(os.listdir(spool))
+    except FileNotFoundError:
+        return []
+
+    stale_before = time.time() - settings.VIEW_COUNT_CLAIM_TIMEOUT
+    paths = []
+    for name in names:
+        path = os.path.join(spool, name)
+        if name.endswith(BATCH_SUFFIX):
+            paths.append(path)
+        elif name.endswith(CLAIMED_SUFFIX):
+            try:
+                if os.path.getmtime(path) < stale_before:
+                    paths.append(path)
+            except FileNotFoundError:
+                continue
+    return paths
+
+
+def _read_batch(path):
+    with open(path) as f:
+        batch = json.load(f)
+    if not (isinstance(batch, dict) and isinstance(batch.get('batch_id'), str)
+            and isinstance(batch.get('counts'), dict)):
+        raise ValueError('not a job view batch')
+    return batch
+
+
+def _set_aside(claimed):
+    """Move an unreadable batch file out of the spool so it is not retried"""
+    corrupt_dir = os.path.join(_spool_dir(), CORRUPT_DIR)
+    os.makedirs(corrupt_dir, exist_ok=True)
+    os.replace(claimed, os.path.join(corrupt_dir, os.path.basename(claimed)))
+
+
+def apply_batch(batch_id, counts):
+    """
+    Add a batch of view counts to the jobs table exactly once.
+    Returns False if the batch had already been applied.
+    """
+    from .models import Job, JobViewBatch
+
+    # Jobs with the same increment share one UPDATE
+    by_increment = defaultdict(list)
+    for job_id, views in counts.items():
+        by_increment[views].append(job_id)
+
+    try:
+        with transaction.atomic():
+            JobViewBatch.objects.create(batch_id=batch_id, view_count=sum(counts.values()))
+            for views, job_ids in by_increment.items():
+                Job.objects.filter(pk__in=job_ids).update(views_count=F('views_count') + views)
+    except IntegrityError:
+        return False
+    return True
+
+
+def drain_spool(max_batches=None):
+    """Apply spooled batches; returns (batches applied, views applied)"""
+    applied_batches = applied_views = 0
+    for path in _pending_batches():
+        if max_batches is not None and applied_batches >= max_batches:
+            break
+        claimed = _claim(path)
+        if claimed is None:
+            continue
+        try:
+            batch = _read_batch(claimed)
+        except ValueError:
+            logger.error('Moving unreadable job view batch %s aside', claimed, exc_info=True)
+            _set_aside(claimed)
+            continue
+        except OSError:
+            continue  # Retried once the claim goes stale
+
+        try:
+            applied = apply_batch(batch['batch_id'], batch['counts'])
+        except DatabaseError:
+            # e.g. a locked database: a page view must not fail, so hand the
+            # batch back to the spool for the next flush
+            logger.warning('Could not apply job view batch %s', batch['batch_id'], exc_info=True)
+            os.replace(claimed, os.path.join(_spool_dir(), batch['batch_id'] + BATCH_SUFFIX))
+            break
+        if applied:
+            applied_batches += 1
+            applied_views += sum(batch['counts'].values())
+        try:
+            os.remove(claimed)
+        except FileNotFoundError:
+            pass
+    return applied_batches, applied_views
+
+
+def flush(max_batches=None):
+    """Spill this process's buffer and drain the spool"""
+    spill()
+    return drain_spool(max_batches=max_batches)
+
+
+def _spill_on_exit():
+    # Never touch the database at interpreter exit; the next drain picks it up
+    try:
+        spill()
+    except Exception:
+        pass
+
+
+atexit.register(_spill_on_exit)
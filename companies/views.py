@@ -1,6 +1,8 @@
 """
 Views for company dashboard and job management
 """
+import uuid
+from collections import Counter
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
@@ -8,11 +10,22 @@ from django.contrib import messages
 from django.db.models import Count, Q
 from django.db import transaction
 from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
 from accounts.decorators import company_required, company_approved_required
 from .models import Company, Job
 from .forms import CompanyRegistrationForm, CompanyProfileForm, JobForm
+from .stats import get_dashboard_stats
 from jobs.models import Application
-from notifications.utils import notify_new_application
+from jobs.counters import adjust_company_counts
+from jobs.exports import export_response
+from jobs.pagination import CursorPaginator
+from notifications.utils import (
+    announce_application_status_changes, notify_application_status_change, notify_application_status_changes
+)
+
+COMPANY_APPLICATIONS_PER_PAGE = 25
+BULK_STATUS_UPDATE_LIMIT = 500
 
 def company_register(request):
     """Company registration view"""
@@ -55,14 +68,8 @@ def company_dashboard(request):
         messages.error(request, 'Company profile not found.')
         return redirect('home')
     
-    # Get statistics
-    total_jobs = company.jobs.count()
-    active_jobs = company.jobs.filter(is_active=True).count()
-    total_applications = Application.objects.filter(company=company).count()
-    pending_applications = Application.objects.filter(
-        company=company, 
-        status='applied'
-    ).count()
+    # Get statistics (stored counters plus one cached jobs aggregate)
+    stats = get_dashboard_stats(company)
     
     # Recent applications
     recent_applications = Application.objects.filter(
@@ -74,10 +81,7 @@ def company_dashboard(request):
     
     context = {
         'company': company,
-        'total_jobs': total_jobs,
-        'active_jobs': active_jobs,
-        'total_applications': total_applications,
-        'pending_applications': pending_applications,
+        **stats,
         'recent_applications': recent_applications,
         'recent_jobs': recent_jobs,
     }
@@ -126,9 +130,7 @@ def company_profile_edit(request):
 def company_job_list(request):
     """List all jobs for the company"""
     company = request.user.company_profile
-    jobs = company.jobs.all().annotate(
-        application_count=Count('applications')
-    ).order_by('-created_at')
+    jobs = company.jobs.all().order_by('-created_at')
     
     return render(request, 'companies/job_list.html', {'jobs': jobs, 'company': company})
 
@@ -230,33 +232,61 @@ def job_toggle_status(request, pk):
     return redirect('company_job_list')
 
 
+def _application_filters(request):
+    """Validated (status, job id) filters of the applicant inbox"""
+    status_filter = request.GET.get('status', '')
+    job_filter = request.GET.get('job', '')
+    if status_filter not in dict(Application.STATUS_CHOICES):
+        status_filter = ''
+    try:
+        job_filter = str(uuid.UUID(job_filter)) if job_filter else ''
+    except ValueError:
+        job_filter = ''
+    return status_filter, job_filter
+
+
 @login_required
 @company_approved_required
 def company_applications(request):
-    """View all applications for company"""
+    """Applicant inbox: filtered by status/job, keyset-paginated"""
     company = request.user.company_profile
     
     # Filter options
-    status_filter = request.GET.get('status', '')
-    job_filter = request.GET.get('job', '')
+    status_filter, job_filter = _application_filters(request)
     
-    applications = Application.objects.filter(company=company).select_related(
-        'job', 'user', 'user__jobseeker_profile'
-    )
+    applications = Application.objects.filter(company=company)
+    if job_filter:
+        applications = applications.filter(job_id=job_filter)
+    
+    # Tab counts: stored counters for the whole inbox, one grouped query per job
+    if job_filter:
+        grouped = applications.order_by().values('status').annotate(total=Count('id'))
+        counts = {row['status']: row['total'] for row in grouped}
+    else:
+        counts = company.get_application_counts()
+    status_tabs = [
+        (value, label, counts.get(value, 0))
+        for value, label in Application.STATUS_CHOICES
+    ]
     
     if status_filter:
         applications = applications.filter(status=status_filter)
     
-    if job_filter:
-        applications = applications.filter(job_id=job_filter)
-    
-    applications = applications.order_by('-applied_at')
+    # Served by the (company, status, applied_at) index; every page costs the same
+    paginator = CursorPaginator(
+        applications.select_related('job', 'user', 'user__jobseeker_profile'),
+        COMPANY_APPLICATIONS_PER_PAGE, ('-applied_at', '-id')
+    )
+    applications_page = paginator.get_page(request.GET.get('cursor'))
     
-    # Get unique jobs for filter
-    jobs = company.jobs.all()
+    # Get jobs for filter
+    jobs = company.jobs.only('id', 'title').order_by('-created_at')
     
     context = {
-        'applications': applications,
+        'applications': applications_page,
+        'page_obj': applications_page,
+        'status_tabs': status_tabs,
+        'total_applications': sum(counts.values()),
         'jobs': jobs,
         'status_choices': Application.STATUS_CHOICES,
         'current_status': status_filter,
@@ -265,6 +295,22 @@ def company_applications(request):
     return render(request, 'companies/application_list.html', context)
 
 
+@login_required
+@company_approved_required
+def company_applications_export(request):
+    """Download the applicant inbox (same filters) as CSV or JSONL"""
+    company = request.user.company_profile
+    status_filter, job_filter = _application_filters(request)
+    
+    applications = Application.objects.filter(company=company)
+    if job_filter:
+        applications = applications.filter(job_id=job_filter)
+    if status_filter:
+        applications = applications.filter(status=status_filter)
+    
+    return export_response(applications, request.GET.get('format', 'csv'), 'applications')
+
+
 @login_required
 @company_approved_required
 def application_detail(request, pk):
@@ -297,14 +343,18 @@ def application_update_status(request, pk):
         notes = request.POST.get('notes', '')
         
         if new_status in dict(Application.STATUS_CHOICES).keys():
+            old_status = application.status
             application.status = new_status
             if notes:
                 application.notes = notes
-            application.save()
-            
-            # Send notification to applicant
-            from notifications.utils import notify_application_status_change
-            notify_application_status_change(application)
+            with transaction.atomic():
+                application.save()
+                
+                # Send notification to applicant
+                notify_application_status_change(application, old_status, new_status)
+                announce_application_status_changes(
+                    [(application.pk, application.user_id, application.job.title)], new_status
+                )
             
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({
@@ -322,4 +372,79 @@ def application_update_status(request, pk):
             messages.error(request, 'Invalid status')
             return redirect('application_detail', pk=pk)
     
-    return redirect('company_applications')
\ No newline at end of file
+    return redirect('company_applications')
+
+@login_required
+@company_approved_required
+@require_POST
+def application_bulk_update_status(request):
+    """Move many applications to one status (AJAX); returns a result per id"""
+    company = request.user.company_profile
+    new_status = request.POST.get('status')
+    requested = request.POST.getlist('application_ids')
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    
+    error = None
+    if new_status not in dict(Application.STATUS_CHOICES) or not requested:
+        error = 'Choose a status and at least one application'
+    elif len(requested) > BULK_STATUS_UPDATE_LIMIT:
+        error = f'At most {BULK_STATUS_UPDATE_LIMIT} applications can be updated at once'
+    if error:
+        if is_ajax:
+            return JsonResponse({'success': False, 'message': error}, status=400)
+        messages.error(request, error)
+        return redirect('company_applications')
+    
+    results, ids = {}, []
+    for value in requested:
+        try:
+            ids.append(uuid.UUID(value))
+        except ValueError:
+            results[value] = {'success': False, 'message': 'Invalid application id'}
+    
+    with transaction.atomic():
+        # Lock the rows so the counter deltas match what the UPDATE changes
+        rows = list(
+            Application.objects.select_for_update(of=('self',))
+            .filter(pk__in=ids, company=company).order_by()
+            .values_list('pk', 'status', 'user_id', 'job__title')
+        )
+        changing = [row for row in rows if row[1] != new_status]
+        if changing:
+            Application.objects.filter(
+                pk__in=[pk for pk, _, _, _ in changing], company=company
+            ).update(status=new_status, updated_at=timezone.now())
+            
+            # update() bypasses the signal handlers, so adjust counters here
+            deltas = Counter()
+            for _, old_status, _, _ in changing:
+                deltas[old_status] -= 1
+            deltas[new_status] += len(changing)
+            adjust_company_counts(company.pk, deltas)
+            
+            notify_application_status_changes(
+                [(user_id, job_title, pk) for pk, _, user_id, job_title in changing], new_status
+            )
+            announce_application_status_changes(
+                [(pk, user_id, job_title) for pk, _, user_id, job_title in changing], new_status
+            )
+    
+    for pk, old_status, _, _ in rows:
+        results[str(pk)] = {
+            'success': True,
+            'changed': old_status != new_status,
+            'old_status': old_status,
+            'new_status': new_status,
+        }
+    for pk in ids:
+        results.setdefault(str(pk), {'success': False, 'message': 'Application not found'})
+    
+    if is_ajax:
+        return JsonResponse({
+            'success': True,
+            'updated': len(changing),
+            'new_status': dict(Application.STATUS_CHOICES)[new_status],
+            'results': results,
+        })
+    messages.success(request, f'{len(changing)} applications updated successfully!')
+    return redirect('company_applications')
@@ -66,6 +66,8 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'django.template.context_processors.media',
+                'jobs.context_processors.saved_jobs',
+                'notifications.context_processors.unread_notifications',
             ],
         },
     },
@@ -133,6 +135,105 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Caching
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'job-portal',
+    }
+}
+
+# Total row counts shown next to cursor-paginated listings are cached this long (seconds)
+PAGINATION_COUNT_CACHE_TIMEOUT = 300
+
+# Job search result cache (per process, see jobs/search_cache.py)
+SEARCH_CACHE_MAX_ENTRIES = 1000
+SEARCH_CACHE_TIMEOUT = 60  # seconds; bounds staleness across worker processes
+
+# Search-box autocomplete index is rebuilt from the database this often (seconds)
+AUTOCOMPLETE_REBUILD_INTERVAL = 300
+
+# Job view counting: views are buffered per process, spilled to this spool
+# directory and applied in batches (see companies/view_counts.py)
+VIEW_COUNT_SPOOL_DIR = BASE_DIR / 'var' / 'view_counts'
+VIEW_COUNT_FLUSH_INTERVAL = 30  # seconds
+VIEW_COUNT_FLUSH_THRESHOLD = 100  # buffered views
+VIEW_COUNT_DRAIN_LIMIT = 10  # batches applied per in-request flush
+VIEW_COUNT_CLAIM_TIMEOUT = 300  # seconds before an abandoned claim is retried
+
+# Precomputed similar jobs (see jobs/similarity.py; built by build_similar_jobs)
+SIMILAR_JOBS_INDEX_DIR = BASE_DIR / 'var' / 'similar_jobs'
+SIMILAR_JOBS_DIMENSIONS = 512  # hashed feature buckets per job vector
+SIMILAR_JOBS_NEIGHBOURS = 10  # neighbours stored per job
+SIMILAR_JOBS_QUEUE_INTERVAL = 60  # seconds between runs of build_similar_jobs --queued --loop
+
+# "Jobs for you" matches stored per jobseeker (built by build_recommendations)
+RECOMMENDATIONS_PER_USER = 20
+
+# Admin dashboard metrics are cached this long (seconds; ?refresh=1 recounts)
+ADMIN_METRICS_CACHE_TIMEOUT = 60
+# Queries the admin dashboard may run per request before it is flagged. The
+# worst case is 10-11 (metrics cache, unread counter and recent lists cold).
+ADMIN_DASHBOARD_QUERY_BUDGET = 15
+# Raise QueryBudgetExceeded instead of only logging an overrun (for tests)
+QUERY_BUDGET_RAISE = False
+# build_statistics_rollups recounts this many closed days on every run, so
+# deleted applications and jobs drop out of recent days' rollups
+STATISTICS_ROLLUP_RECOMPUTE_DAYS = 7
+
+# Company dashboard job counts are cached per company and process; job changes
+# invalidate the entry in the process that made them, other processes catch up
+# within this many seconds
+COMPANY_STATS_CACHE_TIMEOUT = 30
+
+# Resumes are stored once per distinct content (see jobs/storage.py); unreferenced
+# blobs are deleted by dedupe_resumes once unused for this long
+RESUME_BLOB_GC_GRACE_PERIOD = 24 * 60 * 60  # seconds
+
+# Company logo and profile image thumbnails: bounding box per size in pixels,
+# stored as WebP and JPEG next to the original (see accounts/images.py)
+IMAGE_THUMBNAIL_SIZES = {
+    'small': 96,
+    'medium': 160,
+    'large': 320,
+}
+IMAGE_THUMBNAIL_QUALITY = 82
+IMAGE_THUMBNAIL_WORKERS = 2  # background threads resizing new uploads
+
+# Notifications are queued in an outbox and delivered by process_notifications
+NOTIFICATION_OUTBOX_BATCH_SIZE = 500
+NOTIFICATION_OUTBOX_POLL_INTERVAL = 2  # seconds between polls with --loop
+# Failed deliveries are retried after 30s, 60s, 120s, ... and then dead-lettered
+NOTIFICATION_OUTBOX_RETRY_DELAY = 30  # seconds
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = 5
+# Unread notifications about the same target (e.g. applications to one job)
+# are merged into one notification for this long after it was created
+NOTIFICATION_COALESCE_WINDOW = 3600  # seconds
+# Users who received this many notifications within the window get the rest
+# grouped into one notification per type
+NOTIFICATION_THROTTLE_LIMIT = 30
+NOTIFICATION_THROTTLE_WINDOW = 3600  # seconds
+# prune_notifications archives read notifications older than this, in batches
+NOTIFICATION_RETENTION_DAYS = 90
+NOTIFICATION_RETENTION_BATCH_SIZE = 1000  # rows per transaction
+
+# Unread notification counts are stored per user and adjusted as notifications
+# are delivered and read; counters are recounted after this long (seconds)
+UNREAD_NOTIFICATIONS_RECOUNT_INTERVAL = 3600
+# The navbar reads the counter through the cache, and changes evict it. With a
+# per-process cache (LocMemCache) other processes see changes after this long
+UNREAD_NOTIFICATIONS_CACHE_TIMEOUT = 30
+
+# Live notification streams (server-sent events, served through job_portal.asgi).
+# Processes with open streams register a loopback UDP port in this directory
+# so events published elsewhere reach them (see notifications/events.py)
+NOTIFICATION_EVENTS_DIR = BASE_DIR / 'var' / 'notification_events'
+NOTIFICATION_EVENTS_REFRESH_INTERVAL = 30  # seconds; registrations older than 3x are dropped
+NOTIFICATION_STREAM_HEARTBEAT = 15  # seconds between keepalive comments
+NOTIFICATION_STREAM_MAX_AGE = 600  # seconds before a stream is closed and the browser reconnects
+NOTIFICATION_STREAM_RETRY = 5  # seconds browsers wait before reconnecting
+NOTIFICATION_STREAM_QUEUE_SIZE = 50  # events buffered per connection
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
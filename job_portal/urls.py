@@ -21,6 +21,9 @@ urlpatterns = [
 
     # Admin panel (company approval, job moderation, statistics)
     path('admin/', include('admin_panel.urls')),
+
+    # Notification inbox
+    path('notifications/', include('notifications.urls')),
 ]
 
 # Serve media files in development
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Application, SavedJob
+from .models import Application, SavedJob, SavedSearch
 
 @admin.register(Application)
 class ApplicationAdmin(admin.ModelAdmin):
@@ -11,3 +11,9 @@ class ApplicationAdmin(admin.ModelAdmin):
 class SavedJobAdmin(admin.ModelAdmin):
     list_display = ['user', 'job', 'saved_date']
     search_fields = ['user__username', 'job__title']
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(admin.ModelAdmin):
+    list_display = ['name', 'user', 'index_key', 'is_active', 'created_at']
+    list_filter = ['is_active', 'employment_type', 'experience']
+    search_fields = ['name', 'user__username', 'index_key']
@@ -0,0 +1,159 @@
+"""
+Saved-search job alerts
+
+Job seekers save the criteria of a job search (SavedSearch). When a job goes
+live, only that job is matched against the saved searches, percolator style:
+each search is filed under one index key taken from its most selective
+criterion, and the job looks up just the keys it could satisfy.
+
+- ``location:<abc>`` / ``category:<abc>``: a three-character piece of the
+  search's location or category. Text containing the search's text contains
+  each of its pieces.
+- ``employment_type:<value>`` / ``experience:<value>``
+- ``*``: searches with no other criterion (keyword only)
+
+Candidates are then checked against their full criteria, keywords through
+the search index with one query per distinct keyword. Each (search, job)
+match is recorded once and queued as a ``job_alert`` notification grouped
+per search, so the outbox coalesces a burst of matches into one digest.
+"""
+from collections import defaultdict
+from django.db import transaction
+from companies.models import Job
+from notifications.utils import notify_job_alerts
+from .search import search_jobs
+
+MATCH_ALL = '*'
+TRIGRAM_FIELDS = ('location', 'category')
+EXACT_FIELDS = ('employment_type', 'experience')
+
+
+def _trigrams(text):
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _pick_trigram(value):
+    # The middle of the longest word is less common than a word's start ("new", "san")
+    word = max(value.split(), key=len)
+    if len(word) < 3:
+        return value[:3]
+    middle = (len(word) - 3) // 2
+    return word[middle:middle + 3]
+
+
+def index_key(criteria):
+    """The key a saved search is filed under"""
+    for name in TRIGRAM_FIELDS:
+        if len(criteria[name]) >= 3:
+            return f'{name}:{_pick_trigram(criteria[name])}'
+    for name in EXACT_FIELDS:
+        if criteria[name]:
+            return f'{name}:{criteria[name]}'
+    return MATCH_ALL
+
+
+def job_keys(job):
+    """Every key a saved search matching this job can be filed under"""
+    keys = {
+        MATCH_ALL,
+        f'employment_type:{job.employment_type}',
+        f'experience:{job.experience_required}',
+    }
+    keys.update(f'location:{piece}' for piece in _trigrams(job.city) | _trigrams(job.location))
+    keys.update(f'category:{piece}' for piece in _trigrams(job.category))
+    return keys
+
+
+def matches_filters(criteria, job):
+    """The job_list filters other than the keyword, applied to one job"""
+    location = criteria['location']
+    if location and location not in job.city.lower() and location not in job.location.lower():
+        return False
+    if criteria['employment_type'] and criteria['employment_type'] != job.employment_type:
+        return False
+    if criteria['experience'] and criteria['experience'] != job.experience_required:
+        return False
+    if criteria['category'] and criteria['category'] not in job.category.lower():
+        return False
+    return True
+
+
+def describe(criteria):
+    """Short name of a search, e.g. 'python in london, Full Time'"""
+    parts = []
+    if criteria['keyword']:
+        parts.append(f"{criteria['keyword']} in {criteria['location']}" if criteria['location'] else criteria['keyword'])
+    elif criteria['location']:
+        parts.append(f"Jobs in {criteria['location']}")
+    if criteria['employment_type']:
+        parts.append(dict(Job.JOB_TYPE_CHOICES).get(criteria['employment_type'], criteria['employment_type']))
+    if criteria['experience']:
+        parts.append(dict(Job.EXPERIENCE_CHOICES).get(criteria['experience'], criteria['experience']))
+    if criteria['category']:
+        parts.append(criteria['category'])
+    return ', '.join(parts) or 'All jobs'
+
+
+def find_matches(jobs):
+    """(saved search, job) pairs for live jobs, from the percolator index"""
+    from .models import SavedSearch
+
+    keys_by_job = {job.pk: job_keys(job) for job in jobs}
+    all_keys = set().union(*keys_by_job.values()) if keys_by_job else set()
+    searches_by_key = defaultdict(list)
+    for saved_search in SavedSearch.objects.filter(index_key__in=all_keys, is_active=True):
+        searches_by_key[saved_search.index_key].append(saved_search)
+
+    candidates = []
+    for job in jobs:
+        for key in keys_by_job[job.pk]:
+            for saved_search in searches_by_key.get(key, ()):
+                if matches_filters(saved_search.criteria, job):
+                    candidates.append((saved_search, job))
+
+    # Keywords go through the search index, one query per distinct keyword
+    job_ids_by_keyword = defaultdict(set)
+    for saved_search, job in candidates:
+        if saved_search.keyword:
+            job_ids_by_keyword[saved_search.keyword].add(job.pk)
+    keyword_hits = {
+        keyword: set(search_jobs(Job.objects.filter(pk__in=job_ids), keyword).values_list('pk', flat=True))
+        for keyword, job_ids in job_ids_by_keyword.items()
+    }
+    return [
+        (saved_search, job) for saved_search, job in candidates
+        if not saved_search.keyword or job.pk in keyword_hits[saved_search.keyword]
+    ]
+
+
+def match_jobs(job_ids):
+    """
+    Match jobs that just went live against the saved searches and queue alerts
+    for the new matches; returns how many there were.
+    """
+    from .models import SavedSearchMatch
+
+    jobs = list(Job.objects.filter(
+        pk__in=job_ids,
+        is_active=True,
+        is_published=True,
+        company__status='approved'
+    ).select_related('company'))
+    matches = find_matches(jobs)
+    if not matches:
+        return 0
+
+    # A job published again, or a company approved again, is not alerted twice
+    seen = set(SavedSearchMatch.objects.filter(
+        job_id__in=[job.pk for job in jobs]
+    ).values_list('saved_search_id', 'job_id'))
+    new = [(saved_search, job) for saved_search, job in matches if (saved_search.pk, job.pk) not in seen]
+
+    with transaction.atomic():
+        SavedSearchMatch.objects.bulk_create(
+            [SavedSearchMatch(saved_search=saved_search, job=job) for saved_search, job in new],
+            ignore_conflicts=True,
+        )
+        notify_job_alerts(new)
+    return len(new)
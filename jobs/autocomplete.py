@@ -0,0 +1,237 @@
+"""
+In-memory prefix index for search-box autocomplete
+
+Titles, categories, cities and company names of live jobs are kept per
+process in sorted arrays searched with bisect, so answering a keystroke
+never touches the database. Every word start of a term is indexed
+("python" finds "Senior Python Developer"). Terms are ranked by
+popularity: each live job adds 1 + log(1 + views) to its terms.
+
+The index is built on first use and updated incrementally from the Job and
+Company signal handlers. Every AUTOCOMPLETE_REBUILD_INTERVAL seconds it is
+reloaded to pick up changes made by other processes. Search arrays are
+rebuilt in a background thread while the previous ones keep answering.
+"""
+import heapq
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from django.conf import settings
+from django.db import connections
+
+KINDS = ('title', 'category', 'city', 'company')
+
+# JobSearchForm field -> kinds of suggestions it accepts
+FIELD_KINDS = {
+    'keyword': ('title', 'category', 'company'),
+    'location': ('city',),
+    'category': ('category',),
+}
+
+SHORT_PREFIX_LENGTH = 2
+MAX_CANDIDATES = 5000
+
+
+def _normalize(text):
+    return ' '.join((text or '').split()).lower()
+
+
+class _Snapshot:
+    """Immutable search arrays for one kind of term"""
+
+    def __init__(self, terms, limit):
+        # terms: {normalized: (display, weight)}
+        entries = []
+        for norm, (display, weight) in terms.items():
+            words = norm.split(' ')
+            for i in range(len(words)):
+                entries.append((' '.join(words[i:]), norm))
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.norms = [norm for _, norm in entries]
+        self.terms = {norm: (display, weight) for norm, (display, weight) in terms.items()}
+
+        # Very short prefixes match huge ranges, so precompute their answers
+        by_prefix = defaultdict(dict)
+        for key, norm in entries:
+            for size in range(1, SHORT_PREFIX_LENGTH + 1):
+                if len(key) >= size:
+                    by_prefix[key[:size]][norm] = self.terms[norm][1]
+        self.short = {
+            prefix: heapq.nlargest(limit, weights.items(), key=lambda item: item[1])
+            for prefix, weights in by_prefix.items()
+        }
+
+    def search(self, prefix, limit):
+        if len(prefix) <= SHORT_PREFIX_LENGTH:
+            matches = self.short.get(prefix, [])
+        else:
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_left(self.keys, prefix + '\uffff', lo, min(len(self.keys), lo + MAX_CANDIDATES))
+            weights = {norm: self.terms[norm][1] for norm in self.norms[lo:hi]}
+            matches = heapq.nlargest(limit, weights.items(), key=lambda item: item[1])
+        return [(self.terms[norm][0], weight) for norm, weight in matches[:limit]]
+
+
+class AutocompleteIndex:
+    """Popularity-weighted prefix index over live jobs"""
+
+    def __init__(self, limit=10):
+        self.limit = limit
+        self._lock = threading.RLock()
+        self._built_at = None
+        self._terms = {kind: {} for kind in KINDS}
+        self._contributions = {}  # job id -> [(kind, normalized, display, weight)]
+        self._snapshots = {}
+        self._dirty = set(KINDS)
+        self._refreshing = False
+
+    # -- maintenance -------------------------------------------------------
+
+    def _add(self, job_id, contributions):
+        for kind, norm, display, weight in contributions:
+            entry = self._terms[kind].setdefault(norm, [display, 0.0])
+            entry[1] += weight
+            self._dirty.add(kind)
+        self._contributions[job_id] = contributions
+
+    def _remove(self, job_id):
+        for kind, norm, _, weight in self._contributions.pop(job_id, ()):
+            entry = self._terms[kind].get(norm)
+            if entry is None:
+                continue
+            entry[1] -= weight
+            if entry[1] <= 1e-9:
+                del self._terms[kind][norm]
+            self._dirty.add(kind)
+
+    @staticmethod
+    def _contributions_for(title, category, city, company_name, views_count):
+        weight = 1.0 + math.log1p(views_count or 0)
+        contributions = []
+        for kind, display in zip(KINDS, (title, category, city, company_name)):
+            display = ' '.join((display or '').split())
+            if display:
+                contributions.append((kind, display.lower(), display, weight))
+        return contributions
+
+    def rebuild(self):
+        """Reload every live job from the database"""
+        from companies.models import Job
+
+        rows = Job.objects.filter(
+            is_active=True,
+            is_published=True,
+            company__status='approved'
+        ).values_list('pk', 'title', 'category', 'city', 'company__name', 'views_count')
+
+        with self._lock:
+            self._terms = {kind: {} for kind in KINDS}
+            self._contributions = {}
+            for pk, title, category, city, company_name, views_count in rows.iterator():
+                self._add(str(pk), self._contributions_for(title, category, city, company_name, views_count))
+            self._dirty = set(KINDS)
+            self._built_at = time.monotonic()
+
+    def update_job(self, job, company=None):
+        """Re-index one job after it was saved"""
+        with self._lock:
+            if self._built_at is None:
+                return  # Not built in this process yet; the first build reads fresh data
+            company = company or job.company
+            self._remove(str(job.pk))
+            if job.is_active and job.is_published and company.status == 'approved':
+                self._add(str(job.pk), self._contributions_for(
+                    job.title, job.category, job.city, company.name, job.views_count
+                ))
+
+    def remove_job(self, job_pk):
+        with self._lock:
+            if self._built_at is not None:
+                self._remove(str(job_pk))
+
+    def update_company(self, company):
+        """Company name and status apply to all of its jobs"""
+        with self._lock:
+            if self._built_at is None:
+                return
+            for job in company.jobs.all():
+                self.update_job(job, company=company)
+
+    # -- lookups -----------------------------------------------------------
+
+    def _refresh(self):
+        """Rebuild stale parts of the index; runs off the request path"""
+        try:
+            age = None if self._built_at is None else time.monotonic() - self._built_at
+            if age is None or age >= settings.AUTOCOMPLETE_REBUILD_INTERVAL:
+                self.rebuild()
+            with self._lock:
+                dirty = set(self._dirty)
+                terms = {
+                    kind: {norm: (display, weight) for norm, (display, weight) in self._terms[kind].items()}
+                    for kind in dirty
+                }
+                self._dirty -= dirty
+            for kind in dirty:
+                self._snapshots[kind] = _Snapshot(terms[kind], self.limit)
+        finally:
+            self._refreshing = False
+
+    def _ensure_fresh(self):
+        """
+        Make sure there is something to search. The first lookup in a process
+        builds the index inline; later refreshes run in a background thread
+        while the previous snapshots keep answering.
+        """
+        if len(self._snapshots) < len(KINDS):
+            with self._lock:
+                if len(self._snapshots) < len(KINDS):
+                    self._refreshing = True
+                    self._refresh()
+            return
+
+        age = time.monotonic() - self._built_at
+        stale = self._dirty or age >= settings.AUTOCOMPLETE_REBUILD_INTERVAL
+        if stale and not self._refreshing:
+            with self._lock:
+                if self._refreshing:
+                    return
+                self._refreshing = True
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    def _refresh_in_background(self):
+        try:
+            self._refresh()
+        finally:
+            # The thread opened its own database connection
+            connections.close_all()
+
+    def suggest(self, prefix, kinds=KINDS, limit=None):
+        """Best matching terms for a prefix as [{'value': ..., 'type': ...}]"""
+        limit = min(limit or self.limit, self.limit)
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        self._ensure_fresh()
+
+        matches = []
+        for kind in kinds:
+            for display, weight in self._snapshots[kind].search(prefix, limit):
+                matches.append((weight, display, kind))
+        matches.sort(key=lambda match: -match[0])
+
+        results, seen = [], set()
+        for weight, display, kind in matches:
+            if display.lower() in seen:
+                continue
+            seen.add(display.lower())
+            results.append({'value': display, 'type': kind})
+            if len(results) >= limit:
+                break
+        return results
+
+
+autocomplete_index = AutocompleteIndex()
@@ -0,0 +1,12 @@
+"""
+Template context processors for the jobs app
+"""
+from django.utils.functional import SimpleLazyObject
+from .saved import get_saved_job_ids
+
+
+def saved_jobs(request):
+    """Expose the user's saved job ids; only loaded if a template uses them"""
+    return {
+        'saved_job_ids': SimpleLazyObject(lambda: get_saved_job_ids(request.user)),
+    }
@@ -0,0 +1,114 @@
+"""
+Denormalized application counters
+
+``Job.application_count`` and the per-status ``<status>_count`` columns on
+``Company`` replace ``Count('applications')`` annotations in listings. They
+are adjusted with F() expressions by the Application signal handlers and can
+be rebuilt from the applications table with ``rebuild_application_counters``.
+"""
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.db.models import Count, F
+from companies.models import Company, Job
+
+
+def adjust_job_count(job_id, delta):
+    if delta:
+        Job.objects.filter(pk=job_id).update(application_count=F('application_count') + delta)
+
+
+def adjust_company_counts(company_id, status_deltas):
+    """Apply {status: delta} changes to a company's counters in one UPDATE"""
+    updates = {
+        Company.application_counter_field(status): F(Company.application_counter_field(status)) + delta
+        for status, delta in status_deltas.items() if delta
+    }
+    if updates:
+        Company.objects.filter(pk=company_id).update(**updates)
+
+
+def application_created(application):
+    adjust_job_count(application.job_id, 1)
+    adjust_company_counts(application.company_id, {application.status: 1})
+
+
+def application_deleted(application, status):
+    adjust_job_count(application.job_id, -1)
+    adjust_company_counts(application.company_id, {status: -1})
+
+
+def application_status_changed(application, old_status, new_status):
+    if old_status != new_status:
+        adjust_company_counts(application.company_id, {old_status: -1, new_status: 1})
+
+
+def expected_counts():
+    """Count applications per job and per (company, status) from scratch"""
+    from jobs.models import Application
+
+    job_counts = Counter({
+        row['job_id']: row['total']
+        for row in Application.objects.order_by().values('job_id').annotate(total=Count('id'))
+    })
+    company_counts = defaultdict(Counter)
+    rows = Application.objects.order_by().values('company_id', 'status').annotate(total=Count('id'))
+    for row in rows:
+        company_counts[row['company_id']][row['status']] = row['total']
+    return job_counts, company_counts
+
+
+def find_drift():
+    """
+    Compare stored counters with the applications table.
+    Returns (job_drift, company_drift) as {pk: {field: (stored, expected)}}.
+    """
+    from jobs.models import Application
+
+    job_counts, company_counts = expected_counts()
+    statuses = [status for status, _ in Application.STATUS_CHOICES]
+
+    job_drift = {}
+    for pk, stored in Job.objects.values_list('pk', 'application_count').iterator():
+        expected = job_counts.get(pk, 0)
+        if stored != expected:
+            job_drift[pk] = {'application_count': (stored, expected)}
+
+    company_drift = {}
+    fields = [Company.application_counter_field(status) for status in statuses]
+    for row in Company.objects.values('pk', *fields).iterator():
+        counts = company_counts.get(row['pk'], {})
+        changed = {}
+        for status, field in zip(statuses, fields):
+            expected = counts.get(status, 0)
+            if row[field] != expected:
+                changed[field] = (row[field], expected)
+        if changed:
+            company_drift[row['pk']] = changed
+
+    return job_drift, company_drift
+
+
+def repair_job(pk):
+    """Recount one job's applications while holding its row lock"""
+    from jobs.models import Application
+
+    with transaction.atomic():
+        list(Job.objects.select_for_update().filter(pk=pk).values_list('pk'))
+        total = Application.objects.filter(job_id=pk).count()
+        Job.objects.filter(pk=pk).update(application_count=total)
+
+
+def repair_company(pk):
+    """Recount one company's applications per status while holding its row lock"""
+    from jobs.models import Application
+
+    with transaction.atomic():
+        list(Company.objects.select_for_update().filter(pk=pk).values_list('pk'))
+        counts = dict(
+            Application.objects.filter(company_id=pk).order_by()
+            .values_list('status').annotate(total=Count('id'))
+        )
+        Company.objects.filter(pk=pk).update(**{
+            Company.application_counter_field(status): counts.get(status, 0)
+            for status, _ in Application.STATUS_CHOICES
+        })
@@ -0,0 +1,43 @@
+"""
+Facet counts for the job search sidebar
+
+All facets of the current result set are counted with one grouped query
+over (employment type, experience, city, category) and folded in Python.
+"""
+from collections import Counter
+from django.db.models import Count
+from companies.models import Job
+
+# Facet name -> Job field, as used by JobSearchForm
+FACET_FIELDS = {
+    'employment_type': 'employment_type',
+    'experience': 'experience_required',
+    'city': 'city',
+    'category': 'category',
+}
+
+
+def compute_facets(queryset):
+    """Return {facet: Counter(value -> job count)} for a filtered Job queryset"""
+    facets = {name: Counter() for name in FACET_FIELDS}
+    fields = list(FACET_FIELDS.values())
+    rows = queryset.order_by().values_list(*fields).annotate(total=Count('id'))
+    for row in rows:
+        total = row[-1]
+        for name, value in zip(FACET_FIELDS, row):
+            value = (value or '').strip()
+            if value:
+                facets[name][value] += total
+    return facets
+
+
+def facet_choices(facets, name, limit=None):
+    """(value, label, count) tuples for one facet, most common first"""
+    labels = {
+        'employment_type': dict(Job.JOB_TYPE_CHOICES),
+        'experience': dict(Job.EXPERIENCE_CHOICES),
+    }.get(name, {})
+    return [
+        (value, labels.get(value, value), count)
+        for value, count in facets[name].most_common(limit)
+    ]
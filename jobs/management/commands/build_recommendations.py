@@ -0,0 +1,42 @@
+"""
+Management command to compute "Jobs for you" recommendations
+"""
+import time
+from django.core.management.base import BaseCommand
+from jobs import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Score live jobs against jobseeker skills, city and experience and store the best matches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes used for scoring (default: 1)'
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only rescore profiles and jobs changed since the last finished run'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        workers = max(1, options['workers'])
+
+        last_run = recommendations.last_finished_run() if options['incremental'] else None
+        if options['incremental'] and last_run is None:
+            self.stdout.write(self.style.WARNING('No previous run found; doing a full build.'))
+
+        if last_run is not None:
+            run = recommendations.update_changed(last_run.started_at, workers=workers)
+            summary = f'{run.users_scored} changed profiles, {run.jobs_scored} changed jobs'
+        else:
+            run = recommendations.rebuild_all(workers=workers)
+            summary = f'{run.users_scored} jobseekers against {run.jobs_scored} jobs'
+
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] Scored {summary} in {time.monotonic() - started:.2f}s'
+        ))
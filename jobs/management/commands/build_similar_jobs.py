@@ -0,0 +1,50 @@
+"""
+Management command to rebuild the similar-jobs index
+"""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from jobs import similarity
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed similar-jobs index for all live jobs, or apply queued job changes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queued',
+            action='store_true',
+            help='Only apply the jobs saved or deleted since the last run'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help=f'With --queued, keep applying the queue every {settings.SIMILAR_JOBS_QUEUE_INTERVAL}s'
+        )
+
+    def handle(self, *args, **options):
+        if options['queued']:
+            while True:
+                self._apply_queue()
+                if not options['loop']:
+                    break
+                time.sleep(settings.SIMILAR_JOBS_QUEUE_INTERVAL)
+            return
+
+        started = time.monotonic()
+        count = similarity.build_index()
+        stats = similarity.index_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] Indexed {count} jobs ({stats["dimensions"]} dimensions, '
+            f'{stats["neighbours"]} neighbours each) in {time.monotonic() - started:.2f}s'
+        ))
+
+    def _apply_queue(self):
+        started = time.monotonic()
+        count = similarity.apply_queue()
+        if count is None:
+            self.stdout.write(self.style.WARNING('Index is locked by another writer; queue kept'))
+        elif count:
+            self.stdout.write(self.style.SUCCESS(
+                f'[OK] Updated {count} queued jobs in {time.monotonic() - started:.2f}s'
+            ))
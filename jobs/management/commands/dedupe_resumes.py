@@ -0,0 +1,63 @@
+"""
+Management command to move resumes into the content-addressed storage
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from jobs import storage
+
+
+class Command(BaseCommand):
+    help = 'Store each distinct resume file once, then drop duplicates and unused blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-gc',
+            action='store_true',
+            help='Do not delete unreferenced blobs'
+        )
+
+    def handle(self, *args, **options):
+        converted = {}  # legacy name -> blob name
+        rows = missing = 0
+
+        for model_label, field_name in storage.REFERENCE_FIELDS:
+            model = apps.get_model(model_label)
+            legacy = model.objects.exclude(**{f'{field_name}__startswith': storage.BLOB_DIR + '/'}).exclude(
+                **{field_name: ''}
+            ).exclude(**{f'{field_name}__isnull': True}).values_list('pk', field_name)
+
+            for pk, name in legacy.iterator():
+                if name not in converted:
+                    if not storage.resume_storage.exists(name):
+                        self.stdout.write(self.style.WARNING(f'  - missing file {name}'))
+                        missing += 1
+                        continue
+                    converted[name] = storage.adopt_file(name)
+                # Queryset update: reference counts are recounted below
+                rows += model.objects.filter(pk=pk, **{field_name: name}).update(
+                    **{field_name: converted[name]}
+                )
+
+        # Originals nothing points at any more
+        still_used = set()
+        for model_label, field_name in storage.REFERENCE_FIELDS:
+            model = apps.get_model(model_label)
+            still_used.update(
+                model.objects.filter(**{f'{field_name}__in': list(converted)}).values_list(field_name, flat=True)
+            )
+        removed_originals = 0
+        for name in converted:
+            if name not in still_used and storage.resume_storage.exists(name):
+                storage.resume_storage.delete(name)
+                removed_originals += 1
+
+        corrected = storage.recount_references()
+        blobs = freed = 0
+        if not options['no_gc']:
+            blobs, freed = storage.collect_garbage()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] {rows} rows moved to {len(set(converted.values()))} blobs, '
+            f'{removed_originals} original files removed, {missing} missing, '
+            f'{corrected} reference counts corrected, {blobs} unused blobs deleted ({freed} bytes)'
+        ))
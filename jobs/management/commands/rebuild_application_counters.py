@@ -0,0 +1,49 @@
+"""
+Management command to verify and rebuild denormalized application counters
+"""
+from django.core.management.base import BaseCommand
+from jobs import counters
+
+
+class Command(BaseCommand):
+    help = 'Verify Job.application_count and Company per-status counters, and repair any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only report drifted counters, do not repair them'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('\nChecking application counters...\n'))
+
+        job_drift, company_drift = counters.find_drift()
+
+        for pk, changed in job_drift.items():
+            for field, (stored, expected) in changed.items():
+                self.stdout.write(f'  - Job {pk}: {field} is {stored}, expected {expected}')
+        for pk, changed in company_drift.items():
+            for field, (stored, expected) in changed.items():
+                self.stdout.write(f'  - Company {pk}: {field} is {stored}, expected {expected}')
+
+        if not job_drift and not company_drift:
+            self.stdout.write(self.style.SUCCESS('[OK] All counters are correct'))
+            return
+
+        self.stdout.write(
+            f'\nDrift found on {len(job_drift)} jobs and {len(company_drift)} companies'
+        )
+        if options['verify']:
+            return
+
+        # Recount each drifted row under its row lock so concurrent
+        # applications are not lost while repairing
+        for pk in job_drift:
+            counters.repair_job(pk)
+        for pk in company_drift:
+            counters.repair_company(pk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] Repaired {len(job_drift)} jobs and {len(company_drift)} companies'
+        ))
@@ -0,0 +1,25 @@
+"""
+Management command to rebuild the job full-text search index
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from companies.models import Job
+from jobs import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for all jobs'
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write(self.style.WARNING(
+                f'No search index for the "{connection.vendor}" backend; nothing to do.'
+            ))
+            return
+
+        with transaction.atomic():
+            search.rebuild_index()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] Rebuilt search index for {Job.objects.count()} jobs'
+        ))
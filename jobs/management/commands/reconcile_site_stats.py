@@ -0,0 +1,20 @@
+"""
+Management command to reconcile the site statistics counters
+"""
+from django.core.management.base import BaseCommand
+from jobs import site_stats
+
+
+class Command(BaseCommand):
+    help = 'Recount the home/about page statistics and correct any drift'
+
+    def handle(self, *args, **options):
+        stats, drift = site_stats.reconcile()
+
+        for name, difference in drift.items():
+            self.stdout.write(f'  - {name} was off by {-difference:+d}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] {stats.active_jobs} jobs, {stats.approved_companies} companies, '
+            f'{stats.active_jobseekers} jobseekers, {stats.total_applications} applications'
+        ))
@@ -0,0 +1,55 @@
+# Full-text search index for jobs (tsvector + GIN on PostgreSQL, FTS5 on SQLite)
+
+from django.db import migrations
+
+
+POSTGRES_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(jobs.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(jobs.category, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(companies.name, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(jobs.description, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(jobs.requirements, '')), 'D')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE jobs ADD COLUMN search_vector tsvector')
+        schema_editor.execute(
+            f'UPDATE jobs SET search_vector = {POSTGRES_VECTOR_SQL} '
+            'FROM companies WHERE companies.id = jobs.company_id'
+        )
+        schema_editor.execute('CREATE INDEX jobs_search_vector_gin ON jobs USING gin (search_vector)')
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE jobs_fts USING fts5('
+            'job_id UNINDEXED, title, description, requirements, category, company_name, '
+            "tokenize = 'porter unicode61')"
+        )
+        schema_editor.execute(
+            'INSERT INTO jobs_fts (job_id, title, description, requirements, category, company_name) '
+            'SELECT jobs.id, jobs.title, jobs.description, jobs.requirements, jobs.category, companies.name '
+            'FROM jobs INNER JOIN companies ON companies.id = jobs.company_id'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS jobs_search_vector_gin')
+        schema_editor.execute('ALTER TABLE jobs DROP COLUMN IF EXISTS search_vector')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS jobs_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,30 @@
+# Backfill Job.application_count and Company per-status counters
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Application = apps.get_model('jobs', 'Application')
+    Job = apps.get_model('companies', 'Job')
+    Company = apps.get_model('companies', 'Company')
+
+    job_counts = Application.objects.order_by().values('job_id').annotate(total=Count('id'))
+    for row in job_counts:
+        Job.objects.filter(pk=row['job_id']).update(application_count=row['total'])
+
+    company_counts = Application.objects.order_by().values('company_id', 'status').annotate(total=Count('id'))
+    for row in company_counts:
+        Company.objects.filter(pk=row['company_id']).update(**{f"{row['status']}_count": row['total']})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_application_counters'),
+        ('jobs', '0002_job_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('companies', '0003_job_view_batches'),
+        ('jobs', '0003_populate_application_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('mode', models.CharField(choices=[('full', 'Full'), ('incremental', 'Incremental')], max_length=20)),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('users_scored', models.IntegerField(default=0)),
+                ('jobs_scored', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Recommendation Run',
+                'verbose_name_plural': 'Recommendation Runs',
+                'db_table': 'recommendation_runs',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobRecommendation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='companies.job')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_recommendations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Job Recommendation',
+                'verbose_name_plural': 'Job Recommendations',
+                'db_table': 'job_recommendations',
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['user', '-score'], name='job_recomme_user_id_058038_idx'), models.Index(fields=['computed_at'], name='job_recomme_compute_6e4075_idx')],
+                'unique_together': {('user', 'job')},
+            },
+        ),
+    ]
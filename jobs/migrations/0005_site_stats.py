@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:50
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def populate_site_stats(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    Company = apps.get_model('companies', 'Company')
+    Job = apps.get_model('companies', 'Job')
+    Application = apps.get_model('jobs', 'Application')
+    SiteStats = apps.get_model('jobs', 'SiteStats')
+
+    SiteStats.objects.create(
+        pk=1,
+        active_jobs=Job.objects.filter(is_active=True, is_published=True).count(),
+        approved_companies=Company.objects.filter(status='approved').count(),
+        active_jobseekers=User.objects.filter(user_type='jobseeker', is_active=True).count(),
+        total_applications=Application.objects.count(),
+        reconciled_at=timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('companies', '0003_job_view_batches'),
+        ('jobs', '0004_job_recommendations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteStats',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, editable=False, primary_key=True, serialize=False)),
+                ('active_jobs', models.IntegerField(default=0)),
+                ('approved_companies', models.IntegerField(default=0)),
+                ('active_jobseekers', models.IntegerField(default=0)),
+                ('total_applications', models.IntegerField(default=0)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Site Statistics',
+                'verbose_name_plural': 'Site Statistics',
+                'db_table': 'site_stats',
+            },
+        ),
+        migrations.RunPython(populate_site_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_application_company_recent_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='application',
+            name='application_company_4d419e_idx',
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['company', '-applied_at', '-id'], name='application_company_035400_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['company', 'status', '-applied_at', '-id'], name='application_company_c0d087_idx'),
+        ),
+    ]
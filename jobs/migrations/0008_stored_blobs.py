@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:01
+
+from django.db import migrations, models
+import django.utils.timezone
+import jobs.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_application_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='application',
+            name='resume_url',
+            field=models.FileField(storage=jobs.storage.get_resume_storage, upload_to='application_resumes/', verbose_name='Resume'),
+        ),
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('digest', models.CharField(help_text='SHA-256 of the content', max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField(default=0)),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('touched_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Last stored or released')),
+            ],
+            options={
+                'verbose_name': 'Stored Blob',
+                'verbose_name_plural': 'Stored Blobs',
+                'db_table': 'stored_blobs',
+                'indexes': [models.Index(fields=['ref_count', 'touched_at'], name='stored_blob_ref_cou_1288f2_idx')],
+            },
+        ),
+    ]
@@ -1,12 +1,16 @@
 """
 Job Application and Saved Jobs Models
 """
-from django.db import models
-from accounts.models import User
+from django.db import models, transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+from accounts.models import StoredValuesMixin, User
 from companies.models import Job, Company
+from .storage import get_resume_storage
 import uuid
 
-class Application(models.Model):
+class Application(StoredValuesMixin, models.Model):
     """Job applications submitted by job seekers"""
     
     STATUS_CHOICES = (
@@ -24,7 +28,7 @@ class Application(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='received_applications')
     
     # Application Details
-    resume_url = models.FileField(upload_to='application_resumes/', verbose_name='Resume')
+    resume_url = models.FileField(upload_to='application_resumes/', storage=get_resume_storage, verbose_name='Resume')
     cover_letter = models.TextField(help_text="Why are you interested in this position?")
     
     # Status
@@ -35,6 +39,9 @@ class Application(models.Model):
     applied_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Status for the application counters, the resume for blob reference counts
+    TRACKED_FIELDS = ('status', 'resume_url')
+    
     class Meta:
         db_table = 'applications'
         verbose_name = 'Application'
@@ -46,11 +53,21 @@ class Application(models.Model):
             models.Index(fields=['job']),
             models.Index(fields=['company']),
             models.Index(fields=['status']),
+            # Applicant inbox, keyset-paginated on (-applied_at, -id)
+            models.Index(fields=['company', '-applied_at', '-id']),
+            models.Index(fields=['company', 'status', '-applied_at', '-id']),
+            # Status changes picked up by the statistics rollups
+            models.Index(fields=['updated_at']),
         ]
     
     def __str__(self):
         return f"{self.user.username} - {self.job.title}"
     
+    def save(self, *args, **kwargs):
+        # Counter updates in jobs.signals must commit together with the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
     def update_status(self, new_status):
         """Update application status"""
         self.status = new_status
@@ -74,3 +91,167 @@ class SavedJob(models.Model):
     
     def __str__(self):
         return f"{self.user.username} saved {self.job.title}"
+
+
+class JobRecommendation(models.Model):
+    """Precomputed "Jobs for you" entry (see jobs/recommendations.py)"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='job_recommendations')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='recommendations')
+    score = models.FloatField()
+    computed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'job_recommendations'
+        verbose_name = 'Job Recommendation'
+        verbose_name_plural = 'Job Recommendations'
+        unique_together = ('user', 'job')
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['user', '-score']),
+            models.Index(fields=['computed_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.job.title} for {self.user.username} ({self.score:.2f})"
+
+
+class RecommendationRun(models.Model):
+    """One run of build_recommendations; the last finished run is the incremental watermark"""
+    
+    MODE_CHOICES = (
+        ('full', 'Full'),
+        ('incremental', 'Incremental'),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    users_scored = models.IntegerField(default=0)
+    jobs_scored = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'recommendation_runs'
+        verbose_name = 'Recommendation Run'
+        verbose_name_plural = 'Recommendation Runs'
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        return f"{self.get_mode_display()} run at {self.started_at}"
+
+
+class SiteStats(models.Model):
+    """Single-row table of site-wide counters (see jobs/site_stats.py)"""
+    
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1, editable=False)
+    active_jobs = models.IntegerField(default=0)
+    approved_companies = models.IntegerField(default=0)
+    active_jobseekers = models.IntegerField(default=0)
+    total_applications = models.IntegerField(default=0)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'site_stats'
+        verbose_name = 'Site Statistics'
+        verbose_name_plural = 'Site Statistics'
+    
+    def __str__(self):
+        return 'Site Statistics'
+
+
+class StoredBlob(models.Model):
+    """One unique file content in the content-addressed resume storage (jobs/storage.py)"""
+    
+    digest = models.CharField(max_length=64, primary_key=True, help_text="SHA-256 of the content")
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    touched_at = models.DateTimeField(default=timezone.now, help_text="Last stored or released")
+    
+    class Meta:
+        db_table = 'stored_blobs'
+        verbose_name = 'Stored Blob'
+        verbose_name_plural = 'Stored Blobs'
+        indexes = [
+            models.Index(fields=['ref_count', 'touched_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
+
+
+class SavedSearch(models.Model):
+    """Job search criteria saved by a job seeker for job alerts (see jobs/alerts.py)"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=200)
+    
+    # Normalized JobSearchForm criteria (jobs/search_cache.py)
+    keyword = models.CharField(max_length=200, blank=True)
+    location = models.CharField(max_length=100, blank=True)
+    employment_type = models.CharField(max_length=20, choices=Job.JOB_TYPE_CHOICES, blank=True)
+    experience = models.CharField(max_length=20, choices=Job.EXPERIENCE_CHOICES, blank=True)
+    category = models.CharField(max_length=100, blank=True)
+    
+    index_key = models.CharField(max_length=120, editable=False, help_text="Percolator key, set on save")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'saved_searches'
+        verbose_name = 'Saved Search'
+        verbose_name_plural = 'Saved Searches'
+        unique_together = ('user', 'keyword', 'location', 'employment_type', 'experience', 'category')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['index_key', 'is_active']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username}: {self.name}"
+    
+    def save(self, *args, **kwargs):
+        from .alerts import describe, index_key
+        criteria = self.criteria
+        self.index_key = index_key(criteria)
+        if not self.name:
+            self.name = describe(criteria)[:200]
+        super().save(*args, **kwargs)
+    
+    @property
+    def criteria(self):
+        return {
+            'keyword': self.keyword,
+            'location': self.location,
+            'employment_type': self.employment_type,
+            'experience': self.experience,
+            'category': self.category,
+        }
+    
+    def get_search_url(self):
+        """Job list URL showing the results of this search"""
+        query = urlencode({name: value for name, value in self.criteria.items() if value})
+        return f"{reverse('job_list')}?{query}" if query else reverse('job_list')
+
+
+class SavedSearchMatch(models.Model):
+    """A live job that matched a saved search; each pair is alerted once"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    saved_search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='matches')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='saved_search_matches')
+    matched_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'saved_search_matches'
+        verbose_name = 'Saved Search Match'
+        verbose_name_plural = 'Saved Search Matches'
+        unique_together = ('saved_search', 'job')
+        ordering = ['-matched_at']
+    
+    def __str__(self):
+        return f"{self.job.title} for {self.saved_search}"
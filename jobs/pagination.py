@@ -0,0 +1,186 @@
+"""
+Keyset (cursor) pagination for large listings
+
+Instead of COUNT(*) + OFFSET, each page is fetched with a WHERE clause on the
+ordering columns of the last row seen, so every page costs the same as the
+first one. Cursors are opaque url-safe tokens carrying those column values.
+"""
+import base64
+import binascii
+import hashlib
+import json
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+# Orderings that can be keyset-paginated, keyed by JobSearchForm.sort_by
+JOB_ORDERINGS = {
+    '-created_at': ('-created_at', '-id'),
+    'created_at': ('created_at', 'id'),
+    'title': ('title', 'id'),
+    '-title': ('-title', '-id'),
+}
+
+COUNT_CACHE_PREFIX = 'paginator_count'
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor token cannot be decoded"""
+
+
+def cached_count(queryset, timeout):
+    """Count a queryset, caching the result for ``timeout`` seconds"""
+    query = queryset.query
+    try:
+        sql, params = query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    digest = hashlib.md5(f'{sql}|{params!r}'.encode()).hexdigest()
+    key = f'{COUNT_CACHE_PREFIX}:{query.model._meta.db_table}:{digest}'
+
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, timeout)
+    return total
+
+
+class CursorPage:
+    """One page of results plus the cursors needed to move around"""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[-1], 'next')
+        return ''
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[0], 'previous')
+        return ''
+
+    @property
+    def count(self):
+        """Total number of rows (cached), or None if counting is disabled"""
+        return self.paginator.count
+
+
+class CursorPaginator:
+    """
+    Paginate a queryset by keyset on ``ordering``.
+
+    The last field of ``ordering`` must be unique (normally the primary key)
+    so that every row has a distinct position. Set ``count_timeout`` to also
+    expose a cached total count; leave it as None to skip COUNT(*) entirely.
+    """
+
+    def __init__(self, queryset, per_page, ordering, count_timeout=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.count_timeout = count_timeout
+        self._count = None
+
+        opts = queryset.model._meta
+        self.fields = []
+        for item in self.ordering:
+            name = item.lstrip('-')
+            try:
+                field = opts.pk if name == 'pk' else opts.get_field(name)
+            except FieldDoesNotExist:
+                raise ValueError(f'Cannot paginate by keyset on "{name}"')
+            self.fields.append((field, item.startswith('-')))
+
+    @property
+    def count(self):
+        if self.count_timeout is None:
+            return None
+        if self._count is None:
+            self._count = cached_count(self.queryset.order_by(), self.count_timeout)
+        return self._count
+
+    def encode_cursor(self, obj, direction):
+        values = [field.value_to_string(obj) for field, _ in self.fields]
+        payload = json.dumps({'d': direction[0], 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction = {'n': 'next', 'p': 'previous'}[payload['d']]
+            raw_values = payload['v']
+            if len(raw_values) != len(self.fields):
+                raise InvalidCursor(cursor)
+            values = [field.to_python(value) for (field, _), value in zip(self.fields, raw_values)]
+        except (ValueError, KeyError, TypeError, binascii.Error, ValidationError):
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def _keyset_filter(self, values, after):
+        """Build the lexicographic (a, b, c) > (x, y, z) condition"""
+        condition = Q()
+        for i, (field, descending) in enumerate(self.fields):
+            forward = descending != after
+            lookup = 'gt' if forward else 'lt'
+            clause = Q(**{f'{field.attname}__{lookup}': values[i]})
+            for j, (prev_field, _) in enumerate(self.fields[:i]):
+                clause &= Q(**{prev_field.attname: values[j]})
+            condition |= clause
+        return condition
+
+    def page(self, cursor=None):
+        direction, values = 'next', None
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+
+        ordering = list(self.ordering)
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, after=(direction == 'next')))
+
+        if direction == 'previous':
+            reversed_ordering = [item[1:] if item.startswith('-') else f'-{item}' for item in ordering]
+            rows = list(queryset.order_by(*reversed_ordering)[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return CursorPage(rows, self, has_next=True, has_previous=has_previous)
+
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return CursorPage(rows[:self.per_page], self, has_next=has_next, has_previous=values is not None)
+
+    def get_page(self, cursor=None):
+        """Like page(), but falls back to the first page on a bad cursor"""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
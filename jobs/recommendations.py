@@ -0,0 +1,323 @@
+"""
+Skill-based job recommendations ("Jobs for you")
+
+A jobseeker's comma-separated skills are matched against the words of every
+live job. Skills become the columns of two sparse matrices: one row per
+jobseeker (each skill weighted 1 / number of skills) and one row per job
+(the weight of the strongest field mentioning the skill). Their product is
+the share of a jobseeker's skills each job asks for. City and experience
+matches are added on top, and the best RECOMMENDATIONS_PER_USER jobs per user
+are stored in JobRecommendation, so the feed never scores anything.
+
+Users are scored in chunks, optionally across a process pool. Workers only
+do matrix arithmetic; the parent process does all database reads and writes.
+"""
+import re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+SKILL_WEIGHT = 0.7
+CITY_WEIGHT = 0.2
+EXPERIENCE_WEIGHT = 0.1
+
+# Job field -> how strongly a skill mentioned there counts
+JOB_FIELD_WEIGHTS = (
+    ('title', 1.0),
+    ('category', 1.0),
+    ('requirements', 1.0),
+    ('description', 0.5),
+)
+JOB_FIELDS = ('pk', 'city', 'experience_required') + tuple(name for name, _ in JOB_FIELD_WEIGHTS)
+
+MAX_SKILL_WORDS = 4
+USERS_PER_CHUNK = 2000
+
+# Job.EXPERIENCE_CHOICES, lowest first
+EXPERIENCE_LEVELS = {'0-1': 0, '1-3': 1, '3-5': 2, '5+': 3}
+
+_WORD_RE = re.compile(r'[a-z0-9+#]+(?:\.[a-z0-9+#]+)*')
+_SKILL_SPLIT_RE = re.compile(r'[,;\n]+')
+_YEARS_RE = re.compile(r'(\d+(?:\.\d+)?)\s*\+?\s*(?:years?|yrs?)', re.IGNORECASE)
+
+
+def parse_skills(text):
+    """Normalized, de-duplicated skills from a comma-separated field"""
+    skills = []
+    for part in _SKILL_SPLIT_RE.split((text or '').lower()):
+        words = _WORD_RE.findall(part)
+        if words and len(words) <= MAX_SKILL_WORDS:
+            skill = ' '.join(words)
+            if skill not in skills:
+                skills.append(skill)
+    return skills
+
+
+def experience_level(text):
+    """Index into EXPERIENCE_LEVELS from free text such as "4 years", or -1"""
+    years = [float(match) for match in _YEARS_RE.findall(text or '')]
+    if not years:
+        return -1
+    most = max(years)
+    if most < 1:
+        return 0
+    if most < 3:
+        return 1
+    if most < 5:
+        return 2
+    return 3
+
+
+def _city_code(city, table):
+    city = ' '.join((city or '').split()).lower()
+    if not city:
+        return -1
+    return table.setdefault(city, len(table))
+
+
+def top_n_mask(rows, scores, n, tiebreak=None):
+    """Boolean mask of the ``n`` best scores within each row"""
+    keys = (-scores, rows) if tiebreak is None else (tiebreak, -scores, rows)
+    order = np.lexsort(keys)
+    sorted_rows = rows[order]
+    rank = np.arange(order.size) - np.searchsorted(sorted_rows, sorted_rows, side='left')
+    mask = np.zeros(rows.size, dtype=bool)
+    mask[order[rank < n]] = True
+    return mask
+
+
+# -- matrices ------------------------------------------------------------------
+
+def job_matrix(jobs, vocabulary):
+    """Jobs x skills: weight of the strongest field mentioning each skill"""
+    longest = max((skill.count(' ') + 1 for skill in vocabulary), default=1)
+    rows, columns, values = [], [], []
+    for i, job in enumerate(jobs):
+        found = {}
+        for name, weight in JOB_FIELD_WEIGHTS:
+            words = _WORD_RE.findall((job[name] or '').lower())
+            for size in range(1, longest + 1):
+                for start in range(len(words) - size + 1):
+                    column = vocabulary.get(' '.join(words[start:start + size]))
+                    if column is not None and found.get(column, 0) < weight:
+                        found[column] = weight
+        rows.extend([i] * len(found))
+        columns.extend(found)
+        values.extend(found.values())
+    return sparse.csr_matrix(
+        (np.array(values, dtype=np.float32), (rows, columns)),
+        shape=(len(jobs), len(vocabulary)),
+    )
+
+
+def user_matrix(seekers, vocabulary):
+    """Users x skills: each of a user's skills weighs 1 / number of skills"""
+    rows, columns, values = [], [], []
+    for i, seeker in enumerate(seekers):
+        skills = seeker['skills']
+        rows.extend([i] * len(skills))
+        columns.extend(vocabulary[skill] for skill in skills)
+        values.extend([1.0 / len(skills)] * len(skills))
+    return sparse.csr_matrix(
+        (np.array(values, dtype=np.float32), (rows, columns)),
+        shape=(len(seekers), len(vocabulary)),
+    )
+
+
+# -- scoring (runs in worker processes) ----------------------------------------
+
+_worker = {}
+
+
+def _init_worker(jobs_by_skill, job_city, job_level, top_n):
+    _worker.update(jobs_by_skill=jobs_by_skill, job_city=job_city, job_level=job_level, top_n=top_n)
+
+
+def _score_chunk(chunk):
+    """Top-N (user row, job row, score) triples for one chunk of users"""
+    users, user_city, user_level = chunk
+    matches = (users @ _worker['jobs_by_skill']).tocoo()
+    rows, columns = matches.row, matches.col
+    job_city, job_level = _worker['job_city'], _worker['job_level']
+
+    same_city = (user_city[rows] >= 0) & (user_city[rows] == job_city[columns])
+    known = (user_level[rows] >= 0) & (job_level[columns] >= 0)
+    gap = np.abs(user_level[rows] - job_level[columns])
+    experience = np.where(known, np.clip(1.0 - 0.5 * gap, 0.0, 1.0), 0.5)
+
+    scores = (SKILL_WEIGHT * matches.data + CITY_WEIGHT * same_city + EXPERIENCE_WEIGHT * experience)
+    keep = top_n_mask(rows, scores, _worker['top_n'], tiebreak=columns)
+    return rows[keep], columns[keep], scores[keep].astype(np.float32)
+
+
+def score(seekers, jobs, workers=1):
+    """
+    Score ``seekers`` against ``jobs``; yields (offset of the chunk in
+    ``seekers``, user rows, job rows, scores) per chunk of users.
+    """
+    if not seekers or not jobs:
+        return
+    vocabulary = {}
+    for seeker in seekers:
+        for skill in seeker['skills']:
+            vocabulary.setdefault(skill, len(vocabulary))
+    jobs_by_skill = job_matrix(jobs, vocabulary).T.tocsr()
+
+    cities = {}
+    job_city = np.array([_city_code(job['city'], cities) for job in jobs], dtype=np.int32)
+    job_level = np.array([EXPERIENCE_LEVELS.get(job['experience_required'], -1) for job in jobs], dtype=np.int8)
+    user_city = np.array([_city_code(seeker['city'], cities) for seeker in seekers], dtype=np.int32)
+    user_level = np.array([experience_level(seeker['experience']) for seeker in seekers], dtype=np.int8)
+
+    offsets = range(0, len(seekers), USERS_PER_CHUNK)
+    chunks = [
+        (user_matrix(seekers[start:start + USERS_PER_CHUNK], vocabulary),
+         user_city[start:start + USERS_PER_CHUNK],
+         user_level[start:start + USERS_PER_CHUNK])
+        for start in offsets
+    ]
+    initargs = (jobs_by_skill, job_city, job_level, settings.RECOMMENDATIONS_PER_USER)
+
+    if workers > 1 and len(chunks) > 1:
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+            for start, result in zip(offsets, pool.map(_score_chunk, chunks)):
+                yield (start,) + result
+    else:
+        _init_worker(*initargs)
+        for start, chunk in zip(offsets, chunks):
+            yield (start,) + _score_chunk(chunk)
+
+
+# -- loading and storing -------------------------------------------------------
+
+def load_seekers(queryset=None):
+    """Jobseekers with at least one usable skill, as plain dicts"""
+    from accounts.models import JobSeeker
+
+    queryset = JobSeeker.objects.all() if queryset is None else queryset
+    rows = queryset.filter(user__is_active=True).exclude(skills='').values(
+        'user_id', 'skills', 'city', 'experience'
+    )
+    seekers = []
+    for row in rows.iterator():
+        row['skills'] = parse_skills(row['skills'])
+        if row['skills']:
+            seekers.append(row)
+    return seekers
+
+
+def live_jobs():
+    from companies.models import Job
+    return Job.objects.filter(is_active=True, is_published=True, company__status='approved')
+
+
+def load_jobs(queryset=None):
+    queryset = live_jobs() if queryset is None else queryset
+    return list(queryset.values(*JOB_FIELDS).iterator())
+
+
+def _replace(seekers, jobs, workers, computed_at):
+    """Score users against all ``jobs`` and replace their stored recommendations"""
+    from .models import JobRecommendation
+
+    for start, rows, columns, scores in score(seekers, jobs, workers):
+        chunk = seekers[start:start + USERS_PER_CHUNK]
+        recommendations = [
+            JobRecommendation(user_id=chunk[row]['user_id'], job_id=jobs[column]['pk'],
+                              score=float(value), computed_at=computed_at)
+            for row, column, value in zip(rows, columns, scores)
+        ]
+        with transaction.atomic():
+            JobRecommendation.objects.filter(user_id__in=[seeker['user_id'] for seeker in chunk]).delete()
+            JobRecommendation.objects.bulk_create(recommendations, batch_size=1000)
+
+
+def _merge(seekers, jobs, workers, computed_at):
+    """Score users against a few ``jobs`` and merge them into their stored top-N"""
+    from .models import JobRecommendation
+
+    top_n = settings.RECOMMENDATIONS_PER_USER
+    for start, rows, columns, scores in score(seekers, jobs, workers):
+        chunk = seekers[start:start + USERS_PER_CHUNK]
+        position = {seeker['user_id']: i for i, seeker in enumerate(chunk)}
+        with transaction.atomic():
+            stored = list(JobRecommendation.objects.filter(user_id__in=position).values_list('pk', 'user_id', 'score'))
+            stored_rows = np.array([position[user_id] for _, user_id, _ in stored], dtype=rows.dtype)
+            stored_scores = np.array([value for _, _, value in stored], dtype=np.float32)
+
+            keep = top_n_mask(np.concatenate([stored_rows, rows]), np.concatenate([stored_scores, scores]), top_n)
+            keep_stored, keep_new = keep[:len(stored)], keep[len(stored):]
+            dropped = [pk for (pk, _, _), kept in zip(stored, keep_stored) if not kept]
+            if dropped:
+                JobRecommendation.objects.filter(pk__in=dropped).delete()
+            JobRecommendation.objects.bulk_create([
+                JobRecommendation(user_id=chunk[row]['user_id'], job_id=jobs[column]['pk'],
+                                  score=float(value), computed_at=computed_at)
+                for row, column, value in zip(rows[keep_new], columns[keep_new], scores[keep_new])
+            ], batch_size=1000)
+
+
+def rebuild_all(workers=1):
+    """Rescore every jobseeker against every live job"""
+    from .models import JobRecommendation, RecommendationRun
+
+    run = RecommendationRun.objects.create(mode='full', started_at=timezone.now())
+    seekers = load_seekers()
+    jobs = load_jobs()
+    _replace(seekers, jobs, workers, run.started_at)
+
+    # Users who removed their skills, and jobs that are no longer live
+    JobRecommendation.objects.filter(computed_at__lt=run.started_at).delete()
+
+    run.users_scored = len(seekers)
+    run.jobs_scored = len(jobs)
+    run.finished_at = timezone.now()
+    run.save()
+    return run
+
+
+def update_changed(since, workers=1):
+    """
+    Rescore only what changed after ``since``: edited profiles against all
+    jobs, and everyone else against new or edited jobs.
+    """
+    from accounts.models import JobSeeker
+    from .models import JobRecommendation, RecommendationRun
+
+    run = RecommendationRun.objects.create(mode='incremental', started_at=timezone.now())
+
+    # Jobs that were closed, unpublished or whose company lost approval
+    JobRecommendation.objects.filter(
+        Q(job__is_active=False) | Q(job__is_published=False) | ~Q(job__company__status='approved')
+    ).delete()
+
+    changed_profiles = JobSeeker.objects.filter(updated_at__gte=since)
+    JobRecommendation.objects.filter(user__jobseeker_profile__in=changed_profiles).delete()
+    changed_seekers = load_seekers(changed_profiles)
+    all_jobs = load_jobs()
+    _replace(changed_seekers, all_jobs, workers, run.started_at)
+
+    changed_jobs = load_jobs(live_jobs().filter(Q(updated_at__gte=since) | Q(company__updated_at__gte=since)))
+    if changed_jobs:
+        JobRecommendation.objects.filter(job_id__in=[job['pk'] for job in changed_jobs]).exclude(
+            user__jobseeker_profile__in=changed_profiles
+        ).delete()
+        other_seekers = load_seekers(JobSeeker.objects.exclude(updated_at__gte=since))
+        _merge(other_seekers, changed_jobs, workers, run.started_at)
+
+    run.users_scored = len(changed_seekers)
+    run.jobs_scored = len(changed_jobs)
+    run.finished_at = timezone.now()
+    run.save()
+    return run
+
+
+def last_finished_run():
+    from .models import RecommendationRun
+    return RecommendationRun.objects.filter(finished_at__isnull=False).order_by('-started_at').first()
@@ -0,0 +1,28 @@
+"""
+Per-user set of saved job ids
+
+Templates check ``job.id in saved_job_ids`` for every job card, so the ids
+are loaded with one query per request and kept on the request's user. They
+are not cached across requests: the cache is local to each worker process,
+so the other workers would keep showing a job as (un)saved after
+save_job / unsave_job.
+"""
+ATTRIBUTE = '_saved_job_ids'
+
+
+def get_saved_job_ids(user):
+    """frozenset of the job UUIDs a jobseeker has saved"""
+    if not user.is_authenticated or user.user_type != 'jobseeker':
+        return frozenset()
+
+    job_ids = getattr(user, ATTRIBUTE, None)
+    if job_ids is None:
+        from .models import SavedJob
+        job_ids = frozenset(SavedJob.objects.filter(user=user).values_list('job_id', flat=True))
+        setattr(user, ATTRIBUTE, job_ids)
+    return job_ids
+
+
+def invalidate_saved_job_ids(user):
+    if hasattr(user, ATTRIBUTE):
+        delattr(user, ATTRIBUTE)
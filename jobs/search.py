@@ -0,0 +1,132 @@
+"""
+Full-text search index for job listings
+
+PostgreSQL keeps a weighted ``tsvector`` column on ``jobs`` backed by a GIN
+index. SQLite keeps an FTS5 shadow table (``jobs_fts``) with one row per job.
+Both are created by ``jobs/migrations/0002_job_search_index.py`` and kept in
+sync by the signal handlers in ``jobs/signals.py``.
+"""
+import re
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from companies.models import Job
+
+SEARCH_CONFIG = 'english'
+
+# Title and category weigh most, then company name, description, requirements
+POSTGRES_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(jobs.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(jobs.category, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(companies.name, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(jobs.description, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(jobs.requirements, '')), 'D')"
+)
+
+# bm25 weights follow the jobs_fts column order:
+# job_id, title, description, requirements, category, company_name
+SQLITE_RANK_SQL = '-bm25(jobs_fts, 0.0, 10.0, 1.0, 1.0, 5.0, 3.0)'
+
+INDEXED_JOB_FIELDS = {'title', 'description', 'requirements', 'category', 'company', 'company_id'}
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_supported():
+    """Return True if the current database has a search index"""
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def _fts5_query(keyword):
+    """Turn free text into a safe FTS5 query: every term must match as a prefix"""
+    terms = _TERM_RE.findall(keyword.lower())
+    return ' '.join('"%s"*' % term for term in terms)
+
+
+def search_jobs(queryset, keyword):
+    """
+    Filter a Job queryset by keyword using the search index.
+    Matching rows are annotated with ``search_rank`` (higher is better); it is
+    a constant when the backend or the keyword gives nothing to rank by.
+    """
+    keyword = (keyword or '').strip()
+    if not keyword:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        return queryset.extra(
+            select={'search_rank': "ts_rank(jobs.search_vector, websearch_to_tsquery('english', %s))"},
+            select_params=[keyword],
+            where=["jobs.search_vector @@ websearch_to_tsquery('english', %s)"],
+            params=[keyword],
+        )
+
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(keyword)
+        if not match:
+            return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+        return queryset.extra(
+            select={'search_rank': SQLITE_RANK_SQL},
+            tables=['jobs_fts'],
+            where=['jobs_fts.job_id = jobs.id', 'jobs_fts MATCH %s'],
+            params=[match],
+        )
+
+    # No search index on this backend: fall back to a plain substring scan
+    return queryset.filter(
+        Q(title__icontains=keyword) |
+        Q(description__icontains=keyword) |
+        Q(category__icontains=keyword) |
+        Q(company__name__icontains=keyword)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def _db_value(pk):
+    return Job._meta.pk.get_db_prep_value(pk, connection)
+
+
+def _reindex(condition, params):
+    """Rebuild index entries for the jobs matching a SQL condition on ``jobs``"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"UPDATE jobs SET search_vector = {POSTGRES_VECTOR_SQL} "
+                f"FROM companies WHERE companies.id = jobs.company_id AND {condition}",
+                params
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                f"DELETE FROM jobs_fts WHERE job_id IN (SELECT jobs.id FROM jobs WHERE {condition})",
+                params
+            )
+            cursor.execute(
+                "INSERT INTO jobs_fts (job_id, title, description, requirements, category, company_name) "
+                "SELECT jobs.id, jobs.title, jobs.description, jobs.requirements, jobs.category, companies.name "
+                f"FROM jobs INNER JOIN companies ON companies.id = jobs.company_id WHERE {condition}",
+                params
+            )
+
+
+def index_job(job):
+    """Refresh the index entry for a single job"""
+    if is_supported():
+        _reindex('jobs.id = %s', [_db_value(job.pk)])
+
+
+def index_company_jobs(company):
+    """Refresh index entries for every job of a company (e.g. after a rename)"""
+    if is_supported():
+        _reindex('jobs.company_id = %s', [_db_value(company.pk)])
+
+
+def remove_job(job_pk):
+    """Drop a deleted job from the index"""
+    # The Postgres column is removed together with the row
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM jobs_fts WHERE job_id = %s', [_db_value(job_pk)])
+
+
+def rebuild_index():
+    """Rebuild the whole search index from the jobs table"""
+    if is_supported():
+        _reindex('1 = 1', [])
@@ -0,0 +1,158 @@
+"""
+Result cache for job searches
+
+Entries are keyed on the normalized JobSearchForm criteria plus the page
+cursor and hold the ids of the page, the total and the facet counts. The
+cache is an in-process LRU with a TTL. Saving, toggling or deleting a job,
+or changing a company, only evicts the entries the job could appear in.
+Other worker processes see such changes once their own entries expire
+(SEARCH_CACHE_TIMEOUT).
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+
+CRITERIA_FIELDS = ('keyword', 'location', 'employment_type', 'experience', 'category', 'sort_by')
+
+
+def normalize_criteria(cleaned_data):
+    """Canonical form of the search form data, so equivalent searches share an entry"""
+    criteria = {}
+    for name in CRITERIA_FIELDS:
+        value = cleaned_data.get(name) or ''
+        criteria[name] = ' '.join(value.split()).lower() if name in ('keyword', 'location', 'category') else value
+
+    sort_by = criteria['sort_by'] or '-created_at'
+    if sort_by == 'relevance' and not criteria['keyword']:
+        sort_by = '-created_at'
+    criteria['sort_by'] = sort_by
+    return criteria
+
+
+def make_key(criteria, position):
+    return json.dumps([criteria, position or ''], sort_keys=True)
+
+
+def could_match(criteria, values):
+    """
+    Could a job with these field values belong to the results of ``criteria``?
+    Keywords are ignored, so this errs on the side of invalidating.
+    """
+    if criteria['employment_type'] and criteria['employment_type'] != values.get('employment_type'):
+        return False
+    if criteria['experience'] and criteria['experience'] != values.get('experience_required'):
+        return False
+    if criteria['location']:
+        place = f"{values.get('city') or ''} {values.get('location') or ''}".lower()
+        if criteria['location'] not in place:
+            return False
+    if criteria['category'] and criteria['category'] not in (values.get('category') or '').lower():
+        return False
+    return True
+
+
+class SearchResultCache:
+    """Thread-safe LRU cache with a TTL and hit/invalidation counters"""
+
+    def __init__(self, max_entries=1000, timeout=60):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(
+            ('hits', 'misses', 'sets', 'evictions', 'expirations', 'invalidations'), 0
+        )
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self._stats['misses'] += 1
+                return None
+            expires_at, _, value = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key, criteria, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, criteria, value)
+            self._entries.move_to_end(key)
+            self._stats['sets'] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate_jobs(self, snapshots):
+        """
+        Drop entries that show, or could show, any of the given jobs.
+        ``snapshots`` is an iterable of (job id, field values) pairs.
+        """
+        snapshots = list(snapshots)
+        if not snapshots:
+            return 0
+        with self._lock:
+            stale = [
+                key for key, (_, criteria, value) in self._entries.items()
+                if any(
+                    job_id in value['ids'] or could_match(criteria, values)
+                    for job_id, values in snapshots
+                )
+            ]
+            for key in stale:
+                del self._entries[key]
+            self._stats['invalidations'] += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, size=len(self._entries), max_entries=self.max_entries,
+                         timeout=self.timeout)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+search_cache = SearchResultCache(
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    timeout=settings.SEARCH_CACHE_TIMEOUT,
+)
+
+
+SNAPSHOT_FIELDS = ('employment_type', 'experience_required', 'city', 'location', 'category')
+
+
+def job_snapshots(job):
+    """Current and previously stored filter values of a job"""
+    current = {name: getattr(job, name) for name in SNAPSHOT_FIELDS}
+    snapshots = [(str(job.pk), current)]
+    loaded = getattr(job, '_loaded_values', None)
+    if loaded:
+        previous = {name: loaded.get(name) for name in SNAPSHOT_FIELDS}
+        if previous != current:
+            snapshots.append((str(job.pk), previous))
+    return snapshots
+
+
+def invalidate_job(job):
+    return search_cache.invalidate_jobs(job_snapshots(job))
+
+
+def invalidate_company(company):
+    """A company's status or name affects every one of its jobs"""
+    from companies.models import Job
+    rows = Job.objects.filter(company=company).values('pk', *SNAPSHOT_FIELDS)
+    return search_cache.invalidate_jobs(
+        (str(row.pop('pk')), row) for row in rows
+    )
@@ -0,0 +1,58 @@
+"""
+Signal handlers for the jobs app
+
+Handlers tell what a save changed from ``_loaded_values`` (see
+accounts.models.StoredValuesMixin), which only moves on after all of them
+have run. Job and Company handlers live in companies/signals.py, User and
+JobSeeker handlers in accounts/signals.py.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Application
+from . import counters, site_stats, storage
+
+
+@receiver(post_save, sender=Application)
+def update_application_counters(sender, instance, created=False, **kwargs):
+    """Application.save() wraps this in the same transaction as the row write"""
+    if created:
+        counters.application_created(instance)
+        return
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if 'status' in loaded:
+        counters.application_status_changed(instance, loaded['status'], instance.status)
+
+
+@receiver(post_delete, sender=Application)
+def decrement_application_counters(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    counters.application_deleted(instance, loaded.get('status', instance.status))
+
+
+@receiver(post_save, sender=Application)
+def update_resume_references(sender, instance, created=False, update_fields=None, **kwargs):
+    """Keep StoredBlob.ref_count in step with the applications pointing at each blob"""
+    if update_fields is not None and 'resume_url' not in update_fields:
+        return
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if not created and 'resume_url' not in loaded:
+        return  # Stored value unknown; recount_references corrects any drift
+    old_name = None if created else loaded['resume_url'] or None
+    storage.replace_reference(old_name, instance.resume_url.name or None)
+
+
+@receiver(post_delete, sender=Application)
+def release_resume_references(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    storage.release_reference(loaded.get('resume_url', instance.resume_url.name) or None)
+
+
+@receiver(post_save, sender=Application)
+def update_site_stats_for_application(sender, instance, created=False, **kwargs):
+    if created:
+        site_stats.adjust(total_applications=1)
+
+
+@receiver(post_delete, sender=Application)
+def update_site_stats_for_deleted_application(sender, instance, **kwargs):
+    site_stats.adjust(total_applications=-1)
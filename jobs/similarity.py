@@ -0,0 +1,507 @@
+"""
+Content-based similar-jobs index
+
+Every live job is turned into a hashed TF-IDF vector over its title,
+category, requirements and description (words are hashed into
+SIMILAR_JOBS_DIMENSIONS buckets, so there is no vocabulary to store).
+Vectors are L2-normalized, which makes cosine similarity a dot product, and
+the top SIMILAR_JOBS_NEIGHBOURS neighbours of every job are precomputed with
+blocked matrix products.
+
+The index lives in SIMILAR_JOBS_INDEX_DIR:
+
+* ``vectors.f32`` - raw float32 matrix (one row per job), memory-mapped and
+  only read by writers
+* ``neighbours.npz`` - job ids, live flags, neighbour rows and scores and the
+  IDF weights; replaced atomically, and all a reader ever loads
+
+``build_similar_jobs`` rebuilds everything. Publishing, editing,
+deactivating or deleting a job only queues its id (a small file in
+``queue/``); ``build_similar_jobs --queued`` applies the queue in place: each
+job's own neighbours are recomputed and it is inserted into (or dropped from)
+the lists of the jobs it now (or no longer) resembles. Requests never touch
+the index files or wait for the write lock. Lookups are a dict access plus a
+slice.
+"""
+import json
+import os
+import re
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+import numpy as np
+from django.conf import settings
+
+VECTORS_FILE = 'vectors.f32'
+NEIGHBOURS_FILE = 'neighbours.npz'
+LOCK_FILE = 'write.lock'
+QUEUE_DIR = 'queue'
+QUEUE_SUFFIX = '.json'
+CLAIMED_SUFFIX = '.claimed'
+
+# Field -> weight of each of its words
+FIELD_WEIGHTS = (
+    ('title', 3.0),
+    ('category', 3.0),
+    ('requirements', 1.5),
+    ('description', 1.0),
+)
+VECTOR_FIELDS = {name for name, _ in FIELD_WEIGHTS}
+LIVE_FIELDS = {'is_active', 'is_published'}
+
+BLOCK_SIZE = 512  # rows per matrix product during a full build
+LOCK_TIMEOUT = 30  # seconds a writer waits for the lock
+STALE_LOCK_AGE = 600  # seconds after which a lock is assumed abandoned
+
+_TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*')
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from has have in is it of on or our the this '
+    'to we will with you your'.split()
+)
+
+
+def _index_dir():
+    return str(settings.SIMILAR_JOBS_INDEX_DIR)
+
+
+def _path(name):
+    return os.path.join(_index_dir(), name)
+
+
+def is_live(job, company=None):
+    company = company or job.company
+    return job.is_active and job.is_published and company.status == 'approved'
+
+
+# -- vectors -------------------------------------------------------------------
+
+def _term_weights(fields, dims):
+    """{bucket: weighted term count} for one job's text fields"""
+    weights = defaultdict(float)
+    for name, weight in FIELD_WEIGHTS:
+        for token in _TOKEN_RE.findall((fields.get(name) or '').lower()):
+            if token in STOP_WORDS or len(token) < 2:
+                continue
+            weights[zlib.crc32(token.encode()) % dims] += weight
+    return weights
+
+
+def _count_matrix(rows, dims):
+    """Weighted term counts for many jobs as a dense float32 matrix"""
+    matrix = np.zeros((len(rows), dims), dtype=np.float32)
+    row_index, columns, values = [], [], []
+    for i, fields in enumerate(rows):
+        for bucket, weight in _term_weights(fields, dims).items():
+            row_index.append(i)
+            columns.append(bucket)
+            values.append(weight)
+    if values:
+        matrix[row_index, columns] = values
+    return matrix
+
+
+def _tfidf(counts, idf):
+    """Log-scaled term frequencies times IDF, normalized to unit length (in place)"""
+    np.log1p(counts, out=counts)
+    counts *= idf
+    norms = np.linalg.norm(counts, axis=-1, keepdims=True)
+    np.divide(counts, norms, out=counts, where=norms > 0)
+    return counts
+
+
+def _idf(counts):
+    documents = counts.shape[0]
+    document_frequency = np.count_nonzero(counts, axis=0)
+    return (np.log((1.0 + documents) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+
+
+def _top_k(similarities, k):
+    """Indexes and scores of the k best columns of each row, best first"""
+    rows, columns = similarities.shape
+    neighbours = np.full((rows, k), -1, dtype=np.int32)
+    scores = np.zeros((rows, k), dtype=np.float32)
+    if columns == 0:
+        return neighbours, scores
+
+    take = min(k, columns)
+    best = np.argpartition(-similarities, take - 1, axis=1)[:, :take]
+    best_scores = np.take_along_axis(similarities, best, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind='stable')
+    best = np.take_along_axis(best, order, axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+
+    # Dead, excluded and unrelated jobs are not neighbours
+    valid = np.isfinite(best_scores) & (best_scores > 0)
+    neighbours[:, :take] = np.where(valid, best, -1)
+    scores[:, :take] = np.where(valid, best_scores, 0)
+    return neighbours, scores
+
+
+# -- on-disk state -------------------------------------------------------------
+
+class _WriteLock:
+    """Cross-process lock for index writers (an exclusively created file)"""
+
+    def __init__(self, timeout=LOCK_TIMEOUT):
+        self.timeout = timeout
+        self.path = _path(LOCK_FILE)
+        self.acquired = False
+
+    def __enter__(self):
+        os.makedirs(_index_dir(), exist_ok=True)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > STALE_LOCK_AGE:
+                        os.remove(self.path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() >= deadline:
+                    return self
+                time.sleep(0.05)
+                continue
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            self.acquired = True
+            return self
+
+    def __exit__(self, *exc_info):
+        if self.acquired:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def _save_neighbours(ids, live, neighbours, scores, idf):
+    path = _path(NEIGHBOURS_FILE)
+    tmp_path = f'{path}.{uuid.uuid4().hex[:8]}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, ids=ids, live=live, neighbours=neighbours, scores=scores, idf=idf)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _load_neighbours():
+    try:
+        with np.load(_path(NEIGHBOURS_FILE)) as data:
+            return {name: data[name] for name in data.files}
+    except FileNotFoundError:
+        return None
+
+
+def _open_vectors(rows, dims, mode='r+'):
+    return np.memmap(_path(VECTORS_FILE), dtype=np.float32, mode=mode, shape=(rows, dims))
+
+
+# -- full build ----------------------------------------------------------------
+
+def live_jobs():
+    from companies.models import Job
+    return Job.objects.filter(
+        is_active=True,
+        is_published=True,
+        company__status='approved'
+    )
+
+
+def build_index():
+    """
+    Vectorize every live job and precompute all neighbour lists; returns the
+    job count. Jobs saved while this runs are picked up by the next build.
+    """
+    dims = settings.SIMILAR_JOBS_DIMENSIONS
+    k = settings.SIMILAR_JOBS_NEIGHBOURS
+
+    rows = list(live_jobs().values('pk', *VECTOR_FIELDS).iterator())
+    ids = np.array([row['pk'].hex for row in rows], dtype='S32')
+    vectors = _count_matrix(rows, dims)
+    idf = _idf(vectors)
+    _tfidf(vectors, idf)
+
+    neighbours = np.full((len(rows), k), -1, dtype=np.int32)
+    scores = np.zeros((len(rows), k), dtype=np.float32)
+    for start in range(0, len(rows), BLOCK_SIZE):
+        stop = min(start + BLOCK_SIZE, len(rows))
+        similarities = vectors[start:stop] @ vectors.T
+        # A job is not similar to itself
+        similarities[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        neighbours[start:stop], scores[start:stop] = _top_k(similarities, k)
+
+    with _WriteLock() as lock:
+        if not lock.acquired:
+            raise RuntimeError('Could not lock the similar jobs index for writing')
+        tmp_path = f'{_path(VECTORS_FILE)}.{uuid.uuid4().hex[:8]}.tmp'
+        vectors.tofile(tmp_path)
+        os.replace(tmp_path, _path(VECTORS_FILE))
+        _save_neighbours(ids, np.ones(len(rows), dtype=bool), neighbours, scores, idf)
+    return len(rows)
+
+
+# -- incremental updates -------------------------------------------------------
+
+def _drop_rows(neighbours, scores, rows):
+    """Remove ``rows`` from every neighbour list, keeping the lists sorted"""
+    hit = np.isin(neighbours, rows)
+    affected = hit.any(axis=1)
+    if not affected.any():
+        return
+    sub_neighbours = np.where(hit[affected], -1, neighbours[affected])
+    sub_scores = np.where(hit[affected], -np.inf, scores[affected])
+    order = np.argsort(-sub_scores, axis=1, kind='stable')
+    sub_neighbours = np.take_along_axis(sub_neighbours, order, axis=1)
+    sub_scores = np.take_along_axis(sub_scores, order, axis=1)
+    neighbours[affected] = sub_neighbours
+    scores[affected] = np.where(np.isfinite(sub_scores), sub_scores, 0)
+
+
+def _offer_row(neighbours, scores, row, similarities):
+    """Insert ``row`` into the lists of jobs it now beats the weakest neighbour of"""
+    weakest = np.where(neighbours[:, -1] == -1, 0, scores[:, -1])
+    candidates = np.flatnonzero(similarities > weakest)
+    if not candidates.size:
+        return
+    merged_neighbours = np.concatenate(
+        [neighbours[candidates], np.full((candidates.size, 1), row, dtype=np.int32)], axis=1
+    )
+    merged_scores = np.concatenate(
+        [np.where(neighbours[candidates] == -1, -np.inf, scores[candidates]),
+         similarities[candidates, None]], axis=1
+    )
+    order = np.argsort(-merged_scores, axis=1, kind='stable')[:, :neighbours.shape[1]]
+    kept_scores = np.take_along_axis(merged_scores, order, axis=1)
+    kept = np.isfinite(kept_scores)
+    neighbours[candidates] = np.where(kept, np.take_along_axis(merged_neighbours, order, axis=1), -1)
+    scores[candidates] = np.where(kept, kept_scores, 0)
+
+
+def update_jobs(jobs, text_changed=True):
+    """
+    Add, refresh or drop jobs after they were saved. With ``text_changed``
+    False, jobs that are already indexed and still live are left alone.
+    Does nothing until the index has been built; returns False if another
+    writer held the lock.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return True
+    with _WriteLock() as lock:
+        if not lock.acquired:
+            return False
+        state = _load_neighbours()
+        if state is None:
+            return True
+
+        ids, live = list(state['ids']), state['live']
+        neighbours, scores, idf = state['neighbours'], state['scores'], state['idf']
+        dims = idf.shape[0]
+        row_for = {job_id.decode(): row for row, job_id in enumerate(ids)}
+
+        changed = False
+        for job in jobs:
+            row = row_for.get(job.pk.hex)
+            if not is_live(job):
+                if row is not None and live[row]:
+                    live[row] = False
+                    _drop_rows(neighbours, scores, [row])
+                    changed = True
+                continue
+            if row is not None and live[row] and not text_changed:
+                continue
+
+            counts = _count_matrix([{name: getattr(job, name) for name in VECTOR_FIELDS}], dims)
+            vector = _tfidf(counts, idf)[0]
+            if row is None:
+                row = len(ids)
+                with open(_path(VECTORS_FILE), 'ab') as f:
+                    f.write(vector.tobytes())
+                ids.append(job.pk.hex.encode())
+                row_for[job.pk.hex] = row
+                live = np.append(live, True)
+                neighbours = np.vstack([neighbours, np.full((1, neighbours.shape[1]), -1, dtype=np.int32)])
+                scores = np.vstack([scores, np.zeros((1, scores.shape[1]), dtype=np.float32)])
+            else:
+                vectors = _open_vectors(len(ids), dims)
+                vectors[row] = vector
+                vectors.flush()
+                del vectors
+                live[row] = True
+                # Its text may have changed, so it has to earn its place again
+                _drop_rows(neighbours, scores, [row])
+
+            similarities = np.asarray(_open_vectors(len(ids), dims, mode='r') @ vector)
+            similarities[~live] = -np.inf
+            similarities[row] = -np.inf
+            own_neighbours, own_scores = _top_k(similarities[None, :], neighbours.shape[1])
+            neighbours[row], scores[row] = own_neighbours[0], own_scores[0]
+            _offer_row(neighbours, scores, row, similarities)
+            changed = True
+
+        if changed:
+            _save_neighbours(np.array(ids, dtype='S32'), live, neighbours, scores, idf)
+        return True
+
+
+def remove_jobs(job_pks):
+    """Drop deleted jobs from the index"""
+    job_pks = [uuid.UUID(str(pk)).hex for pk in job_pks]
+    with _WriteLock() as lock:
+        if not lock.acquired:
+            return False
+        state = _load_neighbours()
+        if state is None:
+            return True
+        row_for = {job_id.decode(): row for row, job_id in enumerate(state['ids'])}
+        rows = [row_for[pk] for pk in job_pks if pk in row_for and state['live'][row_for[pk]]]
+        if rows:
+            state['live'][rows] = False
+            _drop_rows(state['neighbours'], state['scores'], rows)
+            _save_neighbours(state['ids'], state['live'], state['neighbours'], state['scores'], state['idf'])
+        return True
+
+
+# -- update queue --------------------------------------------------------------
+
+def queue_jobs(job_pks, text_changed=True):
+    """Queue saved or deleted jobs for the next ``apply_queue``; cheap enough for a request"""
+    job_pks = [uuid.UUID(str(pk)).hex for pk in job_pks]
+    if not job_pks:
+        return None
+    queue = _path(QUEUE_DIR)
+    os.makedirs(queue, exist_ok=True)
+    path = os.path.join(queue, uuid.uuid4().hex + QUEUE_SUFFIX)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'jobs': job_pks, 'text_changed': text_changed}, f)
+    # Readers only pick up complete files
+    os.replace(tmp_path, path)
+    return path
+
+
+def _claim_queued():
+    """Take ownership of the queued files; returns their claimed paths"""
+    queue = _path(QUEUE_DIR)
+    try:
+        names = sorted(os.listdir(queue))
+    except FileNotFoundError:
+        return []
+    claimed = []
+    for name in names:
+        if not name.endswith(QUEUE_SUFFIX):
+            continue
+        path = os.path.join(queue, name)
+        try:
+            os.rename(path, path + CLAIMED_SUFFIX)
+        except OSError:
+            continue  # Another process got there first
+        claimed.append(path + CLAIMED_SUFFIX)
+    return claimed
+
+
+def apply_queue():
+    """
+    Apply queued job changes to the index with one load and one write;
+    returns the number of jobs updated, or None if another writer held the lock
+    (the queue is then kept for the next run).
+    """
+    from companies.models import Job
+
+    claimed = _claim_queued()
+    text_changed = {}
+    for path in claimed:
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for job_pk in entry['jobs']:
+            text_changed[job_pk] = text_changed.get(job_pk, False) or entry['text_changed']
+    if not text_changed:
+        for path in claimed:
+            os.remove(path)
+        return 0
+
+    jobs = Job.objects.select_related('company').in_bulk([uuid.UUID(pk) for pk in text_changed])
+    deleted = [pk for pk in text_changed if uuid.UUID(pk) not in jobs]
+    saved = {
+        flag: [job for job in jobs.values() if text_changed[job.pk.hex] == flag]
+        for flag in (True, False)
+    }
+    if not (update_jobs(saved[True]) and update_jobs(saved[False], text_changed=False) and remove_jobs(deleted)):
+        for path in claimed:
+            os.replace(path, path[:-len(CLAIMED_SUFFIX)])
+        return None
+    for path in claimed:
+        os.remove(path)
+    return len(text_changed)
+
+
+# -- lookups -------------------------------------------------------------------
+
+class _Reader:
+    """Per-process copy of the neighbour lists, reloaded when the file changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signature = None
+        self._state = None
+
+    def _current(self):
+        try:
+            stat = os.stat(_path(NEIGHBOURS_FILE))
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    data = _load_neighbours()
+                    if data is None:
+                        return None
+                    data['row_for'] = {job_id.decode(): row for row, job_id in enumerate(data['ids'])}
+                    self._state, self._signature = data, signature
+        return self._state
+
+    def similar(self, job_pk, limit):
+        state = self._current()
+        if state is None:
+            return None
+        row = state['row_for'].get(uuid.UUID(str(job_pk)).hex)
+        if row is None:
+            return None
+        result = []
+        for neighbour in state['neighbours'][row]:
+            if neighbour < 0:
+                break
+            if state['live'][neighbour]:
+                result.append(uuid.UUID(state['ids'][neighbour].decode()))
+                if len(result) >= limit:
+                    break
+        return result
+
+
+_reader = _Reader()
+
+
+def similar_job_ids(job_pk, limit=4):
+    """Ids of the most similar live jobs, best first, or None if the job is not indexed"""
+    return _reader.similar(job_pk, limit)
+
+
+def index_stats():
+    state = _load_neighbours()
+    if state is None:
+        return None
+    return {
+        'rows': int(state['ids'].shape[0]),
+        'live': int(state['live'].sum()),
+        'dimensions': int(state['idf'].shape[0]),
+        'neighbours': int(state['neighbours'].shape[1]),
+    }
@@ -0,0 +1,80 @@
+"""
+Site-wide counters shown on the home and about pages
+
+The numbers live in the single ``SiteStats`` row and are kept current with
+``F()`` deltas from the Job, Company, User and Application signal handlers,
+so reading them is one primary-key lookup. Changes that bypass signals
+(queryset ``update()``, raw SQL) are corrected by ``reconcile_site_stats``.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+SITE_STATS_PK = 1
+
+
+def job_counted(is_active, is_published):
+    return bool(is_active and is_published)
+
+
+def company_counted(status):
+    return status == 'approved'
+
+
+def jobseeker_counted(user_type, is_active):
+    return bool(user_type == 'jobseeker' and is_active)
+
+
+def compute():
+    """Count everything from the source tables"""
+    from accounts.models import User
+    from companies.models import Company, Job
+    from .models import Application
+
+    return {
+        'active_jobs': Job.objects.filter(is_active=True, is_published=True).count(),
+        'approved_companies': Company.objects.filter(status='approved').count(),
+        'active_jobseekers': User.objects.filter(user_type='jobseeker', is_active=True).count(),
+        'total_applications': Application.objects.count(),
+    }
+
+
+def reconcile():
+    """Overwrite the stored counters with fresh counts; returns (stats, drift)"""
+    from .models import SiteStats
+
+    counts = compute()
+    stored = SiteStats.objects.filter(pk=SITE_STATS_PK).values(*counts).first() or {}
+    drift = {
+        name: value - stored[name]
+        for name, value in counts.items()
+        if name in stored and stored[name] != value
+    }
+    stats, _ = SiteStats.objects.update_or_create(
+        pk=SITE_STATS_PK,
+        defaults=dict(counts, reconciled_at=timezone.now())
+    )
+    return stats, drift
+
+
+def get_site_stats():
+    from .models import SiteStats
+
+    stats = SiteStats.objects.filter(pk=SITE_STATS_PK).first()
+    if stats is None:
+        stats, _ = reconcile()
+    return stats
+
+
+def adjust(**deltas):
+    """Apply counter deltas, e.g. adjust(active_jobs=-1)"""
+    from .models import SiteStats
+
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updated = SiteStats.objects.filter(pk=SITE_STATS_PK).update(
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+    if not updated:
+        # No row yet: counting now already includes this change
+        reconcile()
@@ -0,0 +1,209 @@
+"""
+Content-addressed file storage for resumes
+
+Uploads are hashed (SHA-256) while they are streamed to a temporary file in
+chunks, then moved to ``blobs/<aa>/<bb>/<digest><ext>``. A file whose content
+is already stored is not written again; the existing blob name is returned,
+so a seeker sending the same PDF with fifty applications uses one file.
+
+``StoredBlob`` keeps a reference count per blob, maintained by the
+Application and JobSeeker signal handlers. Blobs are only removed by
+``collect_garbage`` once nothing has referenced them for
+RESUME_BLOB_GC_GRACE_PERIOD seconds (a blob is written before the row
+pointing to it is saved).
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.utils import timezone
+
+BLOB_DIR = 'blobs'
+
+# Models and fields whose files are stored as blobs
+REFERENCE_FIELDS = (
+    ('jobs.Application', 'resume_url'),
+    ('accounts.JobSeeker', 'resume'),
+)
+
+
+def blob_name(digest, ext):
+    return f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}'
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(BLOB_DIR + '/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that stores each distinct file content once"""
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save()
+        return name
+
+    def _save(self, name, content):
+        from .models import StoredBlob
+
+        tmp_dir = self.path(os.path.join(BLOB_DIR, 'tmp'))
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+
+            digest = digest.hexdigest()
+            blob = StoredBlob.objects.filter(digest=digest).first()
+            if blob is None:
+                name = blob_name(digest, os.path.splitext(name)[1])
+                path = self.path(name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp_path, self.file_permissions_mode)
+                os.replace(tmp_path, path)
+                blob, _ = StoredBlob.objects.get_or_create(
+                    digest=digest, defaults={'name': name, 'size': size}
+                )
+            else:
+                # Keep collect_garbage away from a blob that is about to be referenced
+                StoredBlob.objects.filter(digest=digest).update(touched_at=timezone.now())
+                if not self.exists(blob.name):
+                    # Row survived a lost file; restore the content
+                    os.makedirs(os.path.dirname(self.path(blob.name)), exist_ok=True)
+                    os.replace(tmp_path, self.path(blob.name))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return blob.name
+
+    def delete(self, name):
+        """Referenced blobs are kept; collect_garbage removes them when unused"""
+        if is_blob_name(name):
+            from .models import StoredBlob
+            if StoredBlob.objects.filter(name=name, ref_count__gt=0).exists():
+                return
+            StoredBlob.objects.filter(name=name).delete()
+        super().delete(name)
+
+
+resume_storage = ContentAddressedStorage()
+
+
+def get_resume_storage():
+    return resume_storage
+
+
+def adopt_file(name):
+    """
+    Make an existing stored file available as a blob and return the blob name.
+    The original file is left in place (hard-linked where possible) until no
+    row points at it any more.
+    """
+    from .models import StoredBlob
+
+    digest = hashlib.sha256()
+    size = 0
+    with resume_storage.open(name, 'rb') as f:
+        for chunk in f.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+    digest = digest.hexdigest()
+
+    blob = StoredBlob.objects.filter(digest=digest).first()
+    if blob is not None and resume_storage.exists(blob.name):
+        return blob.name
+
+    target = blob.name if blob else blob_name(digest, os.path.splitext(name)[1])
+    path = resume_storage.path(target)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if not os.path.exists(path):
+        try:
+            os.link(resume_storage.path(name), path)
+        except OSError:
+            shutil.copyfile(resume_storage.path(name), path)
+    if blob is None:
+        blob, _ = StoredBlob.objects.get_or_create(digest=digest, defaults={'name': target, 'size': size})
+    return blob.name
+
+
+def add_reference(name):
+    from .models import StoredBlob
+    if is_blob_name(name):
+        StoredBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1)
+
+
+def release_reference(name):
+    from .models import StoredBlob
+    if is_blob_name(name):
+        StoredBlob.objects.filter(name=name, ref_count__gt=0).update(
+            ref_count=F('ref_count') - 1, touched_at=timezone.now()
+        )
+
+
+def replace_reference(old_name, new_name):
+    """A row's file changed from ``old_name`` to ``new_name``"""
+    if old_name != new_name:
+        add_reference(new_name)
+        release_reference(old_name)
+
+
+def reference_counts():
+    """Blob name -> number of rows pointing at it, counted from the tables"""
+    counts = {}
+    for model_label, field_name in REFERENCE_FIELDS:
+        model = apps.get_model(model_label)
+        names = model.objects.filter(
+            **{f'{field_name}__startswith': BLOB_DIR + '/'}
+        ).values_list(field_name, flat=True)
+        for name in names.iterator():
+            counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def recount_references():
+    """Reset every StoredBlob.ref_count from the tables; returns rows corrected"""
+    from .models import StoredBlob
+
+    counts = reference_counts()
+    corrected = []
+    for blob in StoredBlob.objects.only('digest', 'name', 'ref_count').iterator():
+        actual = counts.get(blob.name, 0)
+        if blob.ref_count != actual:
+            blob.ref_count = actual
+            corrected.append(blob)
+    StoredBlob.objects.bulk_update(corrected, ['ref_count'], batch_size=500)
+    return len(corrected)
+
+
+def collect_garbage(grace_period=None):
+    """Delete blobs nothing has referenced for the grace period; returns (blobs, bytes)"""
+    from .models import StoredBlob
+
+    if grace_period is None:
+        grace_period = settings.RESUME_BLOB_GC_GRACE_PERIOD
+    cutoff = timezone.now() - timedelta(seconds=grace_period)
+    unused = StoredBlob.objects.filter(ref_count=0, touched_at__lt=cutoff)
+
+    removed = freed = 0
+    for blob in unused.iterator():
+        # Still unused when we get to it?
+        if unused.filter(digest=blob.digest).delete()[0]:
+            FileSystemStorage.delete(resume_storage, blob.name)
+            removed += 1
+            freed += blob.size
+    return removed, freed
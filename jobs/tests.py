@@ -1 +1,684 @@
- 
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from accounts.models import JobSeeker, User
+from companies import view_counts
+from companies.models import Company, Job
+from notifications import outbox
+from notifications.models import Notification
+from . import alerts, recommendations, similarity, site_stats, storage
+from .autocomplete import autocomplete_index
+from .models import (
+    Application, JobRecommendation, SavedSearch, SavedSearchMatch, SiteStats, StoredBlob
+)
+from .pagination import CursorPaginator, InvalidCursor
+from .search import search_jobs
+from .search_cache import SearchResultCache, search_cache
+
+PASSWORD = 'testpass123'
+
+
+def create_company(name='Acme', status='approved'):
+    slug = name.lower().replace(' ', '')
+    user = User.objects.create_user(
+        username=f'{slug}-hr', email=f'hr@{slug}.com', password=PASSWORD, user_type='company'
+    )
+    return Company.objects.create(
+        user=user, name=name, email=f'jobs@{slug}.com', phone='0300', address='1 Mall Road',
+        city='Lahore', state='Punjab', registration_number=f'REG-{slug}', status=status
+    )
+
+
+def create_job(company, title='Python Developer', **fields):
+    values = {
+        'description': 'Build web applications with Django',
+        'requirements': 'Python',
+        'responsibilities': 'Ship features',
+        'location': 'Gulberg',
+        'city': 'Lahore',
+        'employment_type': 'full-time',
+        'category': 'Software',
+        'experience_required': '1-3',
+        'is_published': True,
+    }
+    values.update(fields)
+    return Job.objects.create(company=company, title=title, **values)
+
+
+def create_jobseeker(username='seeker', **fields):
+    user = User.objects.create_user(
+        username=username, email=f'{username}@example.com', password=PASSWORD, user_type='jobseeker'
+    )
+    JobSeeker.objects.create(user=user, full_name=username.title(), email=user.email, phone='0300', **fields)
+    return user
+
+
+def create_application(job, user, **fields):
+    values = {'resume_url': 'application_resumes/cv.pdf', 'cover_letter': 'I would like to apply'}
+    values.update(fields)
+    return Application.objects.create(job=job, user=user, company=job.company, **values)
+
+
+class PortalTestMixin:
+    """
+    Starts with empty per-process caches and writes media, spool and index
+    files to a temporary directory
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir, ignore_errors=True)
+        data_settings = override_settings(
+            MEDIA_ROOT=os.path.join(self.data_dir, 'media'),
+            VIEW_COUNT_SPOOL_DIR=os.path.join(self.data_dir, 'view_counts'),
+            SIMILAR_JOBS_INDEX_DIR=os.path.join(self.data_dir, 'similar_jobs'),
+            NOTIFICATION_EVENTS_DIR=os.path.join(self.data_dir, 'notification_events'),
+        )
+        data_settings.enable()
+        self.addCleanup(data_settings.disable)
+        # Views buffered by earlier tests go to this test's (discarded) spool
+        view_counts.spill()
+        self.addCleanup(view_counts.spill)
+        cache.clear()
+        search_cache.clear()
+
+
+class PortalTestCase(PortalTestMixin, TestCase):
+    pass
+
+
+class SearchTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        self.python = create_job(self.company, 'Senior Python Developer')
+        self.guard = create_job(
+            self.company, 'Security Guard', description='Guard the building at night',
+            requirements='Licence', category='Security'
+        )
+
+    def test_keyword_matches_indexed_fields(self):
+        jobs = search_jobs(Job.objects.all(), 'python')
+        self.assertEqual(list(jobs), [self.python])
+        self.assertEqual(search_jobs(Job.objects.all(), 'acme').count(), 2)
+
+    def test_terms_match_as_prefixes(self):
+        self.assertEqual(list(search_jobs(Job.objects.all(), 'pyth dev')), [self.python])
+
+    def test_index_follows_company_rename_and_job_delete(self):
+        self.company.name = 'Globex'
+        self.company.save()
+        self.assertEqual(search_jobs(Job.objects.all(), 'acme').count(), 0)
+        self.assertEqual(search_jobs(Job.objects.all(), 'globex').count(), 2)
+
+        self.python.delete()
+        self.assertEqual(search_jobs(Job.objects.all(), 'globex').count(), 1)
+
+    def test_relevance_ranks_title_matches_first(self):
+        create_job(self.company, 'Office Manager', description='Hire a python developer for us')
+        response = self.client.get('/jobs/', {'keyword': 'python', 'sort_by': 'relevance'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['jobs'][0], self.python)
+
+    def test_keyword_without_terms_is_ranked(self):
+        jobs = search_jobs(Job.objects.all(), '"\'*')
+        self.assertEqual(list(jobs.order_by('-search_rank')), [])
+
+    def test_relevance_sort_with_punctuation_keyword(self):
+        response = self.client.get('/jobs/', {'keyword': '"\'*', 'sort_by': 'relevance'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_results'], 0)
+
+
+
+class PaginationTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        company = create_company()
+        for number in range(45):
+            create_job(company, f'Job {number:02d}')
+
+    def titles(self, page):
+        return [job.title for job in page]
+
+    def test_cursor_walks_every_job_once(self):
+        response = self.client.get('/jobs/', {'sort_by': 'title'})
+        self.assertEqual(response.context['total_results'], 45)
+        page = response.context['jobs']
+        seen = self.titles(page)
+        while page.has_next():
+            page = self.client.get('/jobs/', {'sort_by': 'title', 'cursor': page.next_cursor}).context['jobs']
+            seen += self.titles(page)
+        self.assertEqual(seen, [f'Job {number:02d}' for number in range(45)])
+
+        page = self.client.get('/jobs/', {'sort_by': 'title', 'cursor': page.previous_cursor}).context['jobs']
+        self.assertEqual(self.titles(page), [f'Job {number:02d}' for number in range(20, 40)])
+
+    def test_ties_are_broken_by_id(self):
+        Job.objects.update(title='Same title')
+        paginator = CursorPaginator(Job.objects.all(), 10, ('title', 'id'))
+        ids, page = [], paginator.page()
+        ids += [job.pk for job in page]
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            ids += [job.pk for job in page]
+        self.assertEqual(ids, sorted(Job.objects.values_list('pk', flat=True)))
+
+    def test_bad_cursor_falls_back_to_the_first_page(self):
+        paginator = CursorPaginator(Job.objects.all(), 10, ('-created_at', '-id'))
+        with self.assertRaises(InvalidCursor):
+            paginator.page('garbage!!')
+        self.assertEqual(len(paginator.get_page('garbage!!')), 10)
+
+        response = self.client.get('/jobs/', {'cursor': 'garbage!!'})
+        self.assertEqual(len(response.context['jobs']), 20)
+
+
+class FacetTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        company = create_company()
+        for number in range(3):
+            create_job(company, f'Developer {number}')
+        create_job(
+            company, 'Security Guard', description='Guard the building', requirements='Licence',
+            employment_type='part-time', city='Karachi', category='Security'
+        )
+
+    def test_counts_every_facet_of_the_results(self):
+        response = self.client.get('/jobs/')
+        self.assertContains(response, 'Full Time (3)')
+        self.assertContains(response, 'Part Time (1)')
+        self.assertEqual(response.context['cities'][0], ('Lahore', 'Lahore', 3))
+
+    def test_counts_follow_the_keyword(self):
+        response = self.client.get('/jobs/', {'keyword': 'guard'})
+        self.assertContains(response, 'Full Time (0)')
+        self.assertContains(response, 'Karachi (1)')
+
+
+class SearchCacheTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        self.developer = create_job(self.company, 'Django Developer')
+        self.guard = create_job(self.company, 'Security Guard', employment_type='part-time')
+
+    def full_time_titles(self):
+        response = self.client.get('/jobs/', {'employment_type': 'full-time'})
+        return [job.title for job in response.context['jobs']]
+
+    def test_equivalent_searches_share_an_entry(self):
+        self.client.get('/jobs/', {'keyword': 'developer', 'sort_by': 'relevance'})
+        hits = search_cache.stats()['hits']
+        response = self.client.get('/jobs/', {'keyword': ' Developer ', 'sort_by': 'relevance'})
+        self.assertEqual(search_cache.stats()['hits'], hits + 1)
+        self.assertEqual(list(response.context['jobs']), [self.developer])
+
+    def test_edit_evicts_only_entries_the_job_could_appear_in(self):
+        self.full_time_titles()
+        self.guard.title = 'Night Guard'
+        self.guard.save()
+        self.assertEqual(search_cache.stats()['size'], 1)
+
+        create_job(self.company, 'Go Developer')
+        self.assertEqual(search_cache.stats()['size'], 0)
+        self.assertEqual(self.full_time_titles(), ['Go Developer', 'Django Developer'])
+
+    def test_job_moved_out_of_a_filter_is_evicted(self):
+        self.full_time_titles()
+        self.developer.employment_type = 'contract'
+        self.developer.save()
+        self.assertEqual(self.full_time_titles(), [])
+
+    def test_company_status_change_evicts_its_jobs(self):
+        self.full_time_titles()
+        self.company.status = 'suspended'
+        self.company.save()
+        self.assertEqual(self.full_time_titles(), [])
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = SearchResultCache(max_entries=2)
+        for key in ('a', 'b'):
+            cache.set(key, {}, {'ids': []})
+        cache.get('a')
+        cache.set('c', {}, {'ids': []})
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+
+
+class SavedJobIdsTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        company = create_company()
+        self.jobs = [create_job(company, f'Developer {number}') for number in range(5)]
+        create_jobseeker()
+        self.client.login(username='seeker', password=PASSWORD)
+
+    def saved_marks(self, response):
+        return response.content.count(b'fa-heart"></i> Saved')
+
+    def test_listing_loads_saved_ids_once(self):
+        self.client.post(f'/save-job/{self.jobs[0].pk}/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/jobs/')
+        self.assertEqual(self.saved_marks(response), 1)
+        self.assertEqual(len([query for query in queries if 'saved_jobs' in query['sql']]), 1)
+
+    def test_unsaved_job_is_unmarked(self):
+        self.client.post(f'/save-job/{self.jobs[0].pk}/')
+        self.client.post(f'/unsave-job/{self.jobs[0].pk}/')
+        self.assertEqual(self.saved_marks(self.client.get('/jobs/')), 0)
+
+
+class AutocompleteTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company('Pythonic Labs')
+        create_job(self.company, 'Senior Python Developer')
+        self.intern = create_job(self.company, 'Python Intern', views_count=50)
+        create_job(self.company, 'Security Guard', category='Security', city='Karachi')
+        autocomplete_index.rebuild()
+        self.refresh()
+
+    def refresh(self):
+        """Swap in pending index changes now instead of in a background thread"""
+        autocomplete_index._refresh()
+
+    def suggest(self, q, **params):
+        response = self.client.get('/jobs/autocomplete/', {'q': q, **params})
+        return [result['value'] for result in response.json()['results']]
+
+    def test_suggestions_are_ranked_by_popularity(self):
+        values = self.suggest('pyth')
+        self.assertEqual(values[:2], ['Pythonic Labs', 'Python Intern'])
+        self.assertIn('Senior Python Developer', values)
+
+    def test_field_lookup_costs_no_query(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/jobs/autocomplete/', {'q': 'ka', 'field': 'location'})
+        self.assertEqual(response.json()['results'], [{'value': 'Karachi', 'type': 'city'}])
+        self.assertEqual(self.client.get('/jobs/autocomplete/', {'field': 'salary'}).status_code, 400)
+
+    def test_jobs_that_leave_the_site_are_dropped(self):
+        self.intern.is_active = False
+        self.intern.save()
+        self.refresh()
+        self.assertEqual(self.suggest('python i'), [])
+
+        self.company.status = 'pending'
+        self.company.save()
+        self.refresh()
+        self.assertEqual(self.suggest('se'), [])
+
+
+class SimilarJobsTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        self.python = [
+            create_job(self.company, f'Python Django Developer {number}', description='python django backend apis')
+            for number in range(3)
+        ]
+        self.guards = [
+            create_job(
+                self.company, f'Security Guard {number}', description='patrol the night shift',
+                requirements='guard license', category='Security'
+            )
+            for number in range(3)
+        ]
+        self.assertEqual(similarity.build_index(), 6)
+
+    def test_neighbours_share_content(self):
+        ids = similarity.similar_job_ids(self.python[0].pk, 2)
+        self.assertEqual(set(ids), {self.python[1].pk, self.python[2].pk})
+
+        response = self.client.get(f'/jobs/{self.guards[0].pk}/')
+        self.assertEqual(
+            {job.pk for job in response.context['similar_jobs'][:2]}, {self.guards[1].pk, self.guards[2].pk}
+        )
+
+    def test_new_job_is_indexed_from_the_queue(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = create_job(self.company, 'Python Django Engineer', description='python django backend apis')
+        self.assertIsNone(similarity.similar_job_ids(job.pk))
+
+        self.assertEqual(similarity.apply_queue(), 1)
+        self.assertEqual(set(similarity.similar_job_ids(job.pk, 3)), {job.pk for job in self.python})
+        self.assertIn(job.pk, similarity.similar_job_ids(self.python[0].pk, 3))
+
+    def test_jobs_that_leave_the_site_are_not_suggested(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.python[1].is_active = False
+            self.python[1].save()
+        similarity.apply_queue()
+        self.assertNotIn(self.python[1].pk, similarity.similar_job_ids(self.python[0].pk, 10))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.status = 'suspended'
+            self.company.save()
+        similarity.apply_queue()
+        self.assertEqual(similarity.similar_job_ids(self.python[0].pk, 10), [])
+
+    def test_deleted_job_is_removed(self):
+        job_pk = self.python[2].pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.python[2].delete()
+        self.assertEqual(similarity.apply_queue(), 1)
+        self.assertEqual(similarity.apply_queue(), 0)
+        self.assertNotIn(job_pk, similarity.similar_job_ids(self.python[0].pk, 10))
+
+
+class RecommendationTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        self.python = create_job(
+            self.company, 'Python Developer', requirements='Python, Django', experience_required='3-5'
+        )
+        self.guard = create_job(
+            self.company, 'Security Guard', description='Patrol', requirements='guard license',
+            category='Security', city='Karachi'
+        )
+        self.frontend = create_job(
+            self.company, 'Frontend Developer', description='React and node.js', requirements='javascript'
+        )
+        self.developer = create_jobseeker('dev', skills='Python, Django', city='Lahore', experience='4 years')
+        self.guardsman = create_jobseeker('guardsman', skills='guard license, first aid', city='Karachi')
+        create_jobseeker('newcomer', skills='')
+        recommendations.rebuild_all()
+
+    def recommended(self, user):
+        return list(JobRecommendation.objects.filter(user=user).order_by('-score').values_list('job_id', flat=True))
+
+    def test_parses_skills_and_experience(self):
+        self.assertEqual(
+            recommendations.parse_skills('Python, Django REST framework; C++,  node.js, python'),
+            ['python', 'django rest framework', 'c++', 'node.js']
+        )
+        self.assertEqual(recommendations.experience_level('Worked 4 years at X, 1 yr at Y'), 2)
+
+    def test_best_match_scores_one(self):
+        self.assertEqual(self.recommended(self.developer)[0], self.python.pk)
+        self.assertAlmostEqual(JobRecommendation.objects.filter(user=self.developer).first().score, 1.0, places=5)
+        self.assertEqual(self.recommended(self.guardsman), [self.guard.pk])
+
+        self.client.login(username='dev', password=PASSWORD)
+        self.assertContains(self.client.get('/jobs-for-you/'), 'Python Developer')
+
+    def test_update_rescores_only_what_changed(self):
+        since = recommendations.last_finished_run().started_at
+        trainer = create_job(self.company, 'First Aid Trainer', requirements='first aid', city='Karachi')
+        profile = JobSeeker.objects.get(user=self.developer)
+        profile.skills = 'node.js'
+        profile.save()
+        self.guard.is_active = False
+        self.guard.save()
+
+        run = recommendations.update_changed(since)
+        self.assertEqual(run.users_scored, 1)
+        self.assertEqual(self.recommended(self.developer), [self.frontend.pk])
+        self.assertEqual(self.recommended(self.guardsman), [trainer.pk])
+
+    def test_pool_scores_like_a_single_process(self):
+        seekers, jobs = recommendations.load_seekers(), recommendations.load_jobs()
+        with mock.patch.object(recommendations, 'USERS_PER_CHUNK', 1):
+            pooled = list(recommendations.score(seekers, jobs, workers=2))
+            single = list(recommendations.score(seekers, jobs, workers=1))
+        self.assertEqual(len(pooled), 2)
+        for pooled_chunk, single_chunk in zip(pooled, single):
+            self.assertEqual(pooled_chunk[0], single_chunk[0])
+            for pooled_array, single_array in zip(pooled_chunk[1:], single_chunk[1:]):
+                self.assertTrue((pooled_array == single_array).all())
+
+
+class SiteStatsTests(PortalTestCase):
+
+    def assertStatsCurrent(self):
+        stored = SiteStats.objects.get(pk=site_stats.SITE_STATS_PK)
+        expected = site_stats.compute()
+        self.assertEqual({name: getattr(stored, name) for name in expected}, expected)
+
+    def test_counters_follow_saves_and_deletes(self):
+        company = create_company()
+        pending = create_company('Globex', status='pending')
+        job = create_job(company)
+        draft = create_job(pending, is_published=False)
+        user = create_jobseeker()
+        create_application(job, user)
+        self.assertStatsCurrent()
+
+        pending = Company.objects.get(pk=pending.pk)
+        pending.status = 'approved'
+        pending.save()
+        draft = Job.objects.get(pk=draft.pk)
+        draft.is_published = True
+        draft.save()
+        self.assertStatsCurrent()
+
+        draft.is_active = False
+        draft.save()
+        user = User.objects.get(pk=user.pk)
+        user.is_active = False
+        user.save()
+        self.assertStatsCurrent()
+
+        job.delete()
+        Company.objects.get(pk=company.pk).delete()
+        User.objects.get(pk=user.pk).delete()
+        self.assertStatsCurrent()
+
+    def test_about_page_reads_one_row(self):
+        create_job(create_company())
+        self.client.get('/about/')
+        with self.assertNumQueries(1):
+            response = self.client.get('/about/')
+        self.assertEqual(response.context['total_jobs'], 1)
+
+    def test_reconcile_reports_drift(self):
+        create_job(create_company())
+        SiteStats.objects.filter(pk=site_stats.SITE_STATS_PK).update(active_jobs=5)
+        _, drift = site_stats.reconcile()
+        self.assertEqual(drift, {'active_jobs': -4})
+        self.assertStatsCurrent()
+
+
+class ExportTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        self.job = create_job(self.company)
+        seeker = create_jobseeker('mallory')
+        JobSeeker.objects.filter(user=seeker).update(full_name='=HYPERLINK("http://example.com")')
+        create_application(self.job, seeker)
+        create_application(create_job(self.company, 'Go Developer'), create_jobseeker(), status='shortlisted')
+        self.other = create_company('Globex')
+        create_application(create_job(self.other), create_jobseeker('outsider'))
+
+    def rows(self, url, **params):
+        response = self.client.get(url, {'format': 'jsonl', **params})
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_company_csv_is_streamed_and_escaped(self):
+        self.client.login(username='acme-hr', password=PASSWORD)
+        response = self.client.get('/company/applications/export/')
+        self.assertIn('attachment', response['Content-Disposition'])
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(body.strip().splitlines()), 3)
+        self.assertIn("'=HYPERLINK", body)
+
+    def test_company_export_uses_the_inbox_filters(self):
+        self.client.login(username='acme-hr', password=PASSWORD)
+        rows = self.rows('/company/applications/export/', status='shortlisted')
+        self.assertEqual([row['job_title'] for row in rows], ['Go Developer'])
+        self.assertEqual(len(self.rows('/company/applications/export/', job=str(self.job.pk))), 1)
+
+    def test_admin_export_covers_all_companies(self):
+        User.objects.create_user(username='admin', email='admin@example.com', password=PASSWORD, user_type='admin')
+        self.client.login(username='admin', password=PASSWORD)
+        url = '/admin/jobs/applications/export/'
+        self.assertEqual(len(self.rows(url)), 3)
+        self.assertEqual(len(self.rows(url, company=str(self.other.pk))), 1)
+        self.assertEqual(len(self.rows(url, search='go', application_status='shortlisted')), 1)
+
+
+class ResumeBlobTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        company = create_company()
+        self.jobs = [create_job(company, f'Developer {number}') for number in range(3)]
+        self.user = create_jobseeker()
+        self.user.jobseeker_profile.resume.save('cv.pdf', ContentFile(b'%PDF-1 resume'))
+        self.client.login(username='seeker', password=PASSWORD)
+
+    def apply(self, job, content=b'%PDF-1 resume'):
+        response = self.client.post(f'/jobs/{job.pk}/apply/', {
+            'cover_letter': 'I would like to apply ' * 5,
+            'resume_url': SimpleUploadedFile('resume.pdf', content, 'application/pdf'),
+        })
+        self.assertRedirects(response, '/my-applications/', fetch_redirect_response=False)
+
+    def stored_files(self):
+        return [name for _, _, names in os.walk(settings.MEDIA_ROOT) for name in names]
+
+    def test_identical_uploads_share_one_blob(self):
+        for job in self.jobs[:2]:
+            self.apply(job)
+        blob = StoredBlob.objects.get()
+        self.assertEqual(blob.ref_count, 3)
+        self.assertEqual(set(Application.objects.values_list('resume_url', flat=True)), {blob.name})
+        self.assertEqual(len(self.stored_files()), 1)
+
+        Application.objects.first().delete()
+        self.assertEqual(StoredBlob.objects.get().ref_count, 2)
+
+    def test_dedupe_adopts_legacy_files(self):
+        folder = os.path.join(settings.MEDIA_ROOT, 'application_resumes')
+        os.makedirs(folder)
+        for number, content in enumerate([b'%PDF-1 resume', b'%PDF-2 other', b'%PDF-2 other']):
+            with open(os.path.join(folder, f'legacy{number}.pdf'), 'wb') as f:
+                f.write(content)
+            create_application(self.jobs[number], self.user, resume_url=f'application_resumes/legacy{number}.pdf')
+
+        call_command('dedupe_resumes', stdout=StringIO())
+        self.assertEqual(sorted(StoredBlob.objects.values_list('ref_count', flat=True)), [2, 2])
+        self.assertEqual(os.listdir(folder), [])
+
+    def test_unused_blobs_are_collected_after_the_grace_period(self):
+        self.apply(self.jobs[0], b'%PDF-3 tailored')
+        Application.objects.all().delete()
+        self.assertEqual(storage.collect_garbage(grace_period=3600), (0, 0))
+        self.assertEqual(storage.collect_garbage(grace_period=-1)[0], 1)
+        self.assertEqual(StoredBlob.objects.get().ref_count, 1)
+        self.assertEqual(len(self.stored_files()), 1)
+
+
+class JobAlertTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        self.seeker = create_jobseeker()
+        self.python_search = SavedSearch.objects.create(
+            user=self.seeker, keyword='python', location='lahore', employment_type='full-time'
+        )
+        self.security_search = SavedSearch.objects.create(user=create_jobseeker('guard'), category='security')
+        self.django_search = SavedSearch.objects.create(user=create_jobseeker('django'), keyword='django')
+
+    def publish(self, title, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_job(self.company, title, **fields)
+
+    def matched(self):
+        return set(SavedSearchMatch.objects.values_list('saved_search_id', 'job_id'))
+
+    def test_searches_are_filed_under_their_most_selective_key(self):
+        self.assertEqual(self.python_search.index_key, 'location:aho')
+        self.assertEqual(self.security_search.index_key, 'category:cur')
+        self.assertEqual(self.django_search.index_key, alerts.MATCH_ALL)
+        full_time = SavedSearch.objects.create(user=self.seeker, employment_type='full-time')
+        self.assertEqual(full_time.index_key, 'employment_type:full-time')
+
+    def test_live_job_is_matched_once(self):
+        job = self.publish('Senior Python Developer')
+        self.publish('Go Developer', city='Karachi', requirements='Go', description='Build services')
+        self.assertEqual(self.matched(), {(self.python_search.pk, job.pk), (self.django_search.pk, job.pk)})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job.is_published = False
+            job.save()
+            job.is_published = True
+            job.save()
+        self.assertEqual(len(self.matched()), 2)
+
+    def test_draft_is_matched_when_published(self):
+        draft = self.publish('Python Developer', is_published=False)
+        self.assertFalse(SavedSearchMatch.objects.exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.is_published = True
+            draft.save()
+        self.assertIn((self.python_search.pk, draft.pk), self.matched())
+
+    def test_matches_are_sent_as_one_digest(self):
+        self.publish('Senior Python Developer')
+        self.publish('Python Developer')
+        outbox.drain()
+        notification = Notification.objects.get(user=self.seeker)
+        self.assertEqual((notification.notification_type, notification.count), ('job_alert', 2))
+        self.assertEqual(notification.message, '2 new jobs match your saved search "python in lahore, Full Time"')
+
+    def test_only_candidate_searches_are_checked(self):
+        job = create_job(self.company, 'Go Developer', city='Karachi', requirements='Go', description='Build services')
+        # The saved searches under the job's keys, then the one keyword candidate
+        with self.assertNumQueries(2):
+            self.assertEqual(alerts.find_matches([job]), [])
+
+class SaveSearchTests(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_jobseeker()
+        self.client.login(username='seeker', password=PASSWORD)
+
+    def test_saves_normalized_criteria(self):
+        response = self.client.post(
+            '/saved-searches/save/', {'keyword': 'Python ', 'location': ' Lahore', 'employment_type': 'full-time'}
+        )
+        saved_search = SavedSearch.objects.get(user=self.user)
+        self.assertRedirects(response, saved_search.get_search_url(), fetch_redirect_response=False)
+        self.assertEqual((saved_search.keyword, saved_search.location), ('python', 'lahore'))
+        self.assertEqual(saved_search.name, 'python in lahore, Full Time')
+
+    def test_same_search_is_saved_once(self):
+        for _ in range(2):
+            self.client.post('/saved-searches/save/', {'keyword': 'python'})
+        self.assertEqual(SavedSearch.objects.filter(user=self.user).count(), 1)
+
+    def test_invalid_search_is_not_saved(self):
+        response = self.client.post(
+            '/saved-searches/save/', {'keyword': 'python', 'employment_type': 'forever'}, follow=True
+        )
+        self.assertFalse(SavedSearch.objects.exists())
+        self.assertContains(response, 'This search could not be saved.')
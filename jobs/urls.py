@@ -8,6 +8,7 @@ urlpatterns = [
     # Public Pages
     path('', views.home, name='home'),
     path('jobs/', views.job_list, name='job_list'),
+    path('jobs/autocomplete/', views.job_autocomplete, name='job_autocomplete'),
     path('jobs/<uuid:pk>/', views.job_detail, name='job_detail'),
     path('about/', views.about, name='about'),
     path('contact/', views.contact, name='contact'),
@@ -15,9 +16,15 @@ urlpatterns = [
     # Job Application
     path('jobs/<uuid:pk>/apply/', views.job_apply, name='job_apply'),
     path('my-applications/', views.my_applications, name='my_applications'),
+    path('jobs-for-you/', views.recommended_jobs, name='recommended_jobs'),
     
     # Saved Jobs
     path('saved-jobs/', views.saved_jobs, name='saved_jobs'),
     path('save-job/<uuid:pk>/', views.save_job, name='save_job'),
     path('unsave-job/<uuid:pk>/', views.unsave_job, name='unsave_job'),
+    
+    # Saved Searches (job alerts)
+    path('saved-searches/', views.saved_searches, name='saved_searches'),
+    path('saved-searches/save/', views.save_search, name='save_search'),
+    path('saved-searches/<uuid:pk>/delete/', views.delete_saved_search, name='delete_saved_search'),
 ]
@@ -1,20 +1,37 @@
 """
 Views for public job listings and applications
 """
+import uuid
+from collections import Counter
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
+from django.core.paginator import Page, Paginator
+from django.db import transaction
 from django.db.models import Q, Count
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from companies.models import Job, Company
 from companies.forms import JobSearchForm
-from .models import Application, SavedJob
+from .models import Application, SavedJob, SavedSearch, JobRecommendation
 from .forms import JobApplicationForm
+from .search import search_jobs
+from .pagination import CursorPage, CursorPaginator, JOB_ORDERINGS
+from .facets import compute_facets, facet_choices
+from .search_cache import search_cache, normalize_criteria, make_key
+from .saved import get_saved_job_ids, invalidate_saved_job_ids
+from .autocomplete import autocomplete_index, FIELD_KINDS
+from .similarity import similar_job_ids
+from .site_stats import get_site_stats
 from accounts.decorators import jobseeker_required, profile_complete_required
 from notifications.utils import notify_new_application
 
+JOBS_PER_PAGE = 20
+FACET_LIMIT = 10
+SIMILAR_JOBS_SHOWN = 4
+MAX_SAVED_SEARCHES = 20
+
 def home(request):
     """Homepage with featured jobs"""
     # Get recent and featured jobs
@@ -25,90 +42,136 @@ def home(request):
     ).select_related('company').order_by('-created_at')[:6]
     
     # Get statistics
-    total_jobs = Job.objects.filter(is_active=True, is_published=True).count()
-    total_companies = Company.objects.filter(status='approved').count()
+    stats = get_site_stats()
     
     context = {
         'featured_jobs': featured_jobs,
-        'total_jobs': total_jobs,
-        'total_companies': total_companies,
+        'total_jobs': stats.active_jobs,
+        'total_companies': stats.approved_companies,
     }
     return render(request, 'home.html', context)
 
 
-def job_list(request):
-    """Job listing page with search and filters"""
+def _search_jobs_page(criteria, cursor=None, page_number=None):
+    """Run a job search; returns (page, total results, facet counts)"""
     jobs = Job.objects.filter(
         is_active=True,
         is_published=True,
         company__status='approved'
-    ).select_related('company').annotate(
-        application_count=Count('applications')
-    )
+    ).select_related('company')
     
-    # Initialize search form
-    form = JobSearchForm(request.GET)
+    # Keyword search
+    if criteria['keyword']:
+        jobs = search_jobs(jobs, criteria['keyword'])
     
-    # Apply filters
-    if form.is_valid():
-        # Keyword search
-        keyword = form.cleaned_data.get('keyword')
-        if keyword:
-            jobs = jobs.filter(
-                Q(title__icontains=keyword) |
-                Q(description__icontains=keyword) |
-                Q(category__icontains=keyword) |
-                Q(company__name__icontains=keyword)
-            )
-        
-        # Location filter
-        location = form.cleaned_data.get('location')
-        if location:
-            jobs = jobs.filter(
-                Q(city__icontains=location) |
-                Q(location__icontains=location)
-            )
-        
-        # Job type filter
-        employment_type = form.cleaned_data.get('employment_type')
-        if employment_type:
-            jobs = jobs.filter(employment_type=employment_type)
-        
-        # Category filter
-        category = form.cleaned_data.get('category')
-        if category:
-            jobs = jobs.filter(category__icontains=category)
-        
-        # Experience filter
-        experience = form.cleaned_data.get('experience')
-        if experience:
-            jobs = jobs.filter(experience_required=experience)
-        
-        # Sorting
-        sort_by = form.cleaned_data.get('sort_by') or '-created_at'
-        jobs = jobs.order_by(sort_by)
+    # Location filter
+    location = criteria['location']
+    if location:
+        jobs = jobs.filter(
+            Q(city__icontains=location) |
+            Q(location__icontains=location)
+        )
+    
+    # Job type filter
+    if criteria['employment_type']:
+        jobs = jobs.filter(employment_type=criteria['employment_type'])
+    
+    # Category filter
+    if criteria['category']:
+        jobs = jobs.filter(category__icontains=criteria['category'])
+    
+    # Experience filter
+    if criteria['experience']:
+        jobs = jobs.filter(experience_required=criteria['experience'])
+    
+    # Sorting and pagination
+    sort_by = criteria['sort_by']
+    if sort_by in JOB_ORDERINGS:
+        # Keyset pagination: deep pages cost the same as the first one
+        paginator = CursorPaginator(
+            jobs, JOBS_PER_PAGE, JOB_ORDERINGS[sort_by],
+            count_timeout=settings.PAGINATION_COUNT_CACHE_TIMEOUT
+        )
+        jobs_page = paginator.get_page(cursor)
     else:
-        jobs = jobs.order_by('-created_at')
+        # Search ranks are not stable keys, so relevance keeps page numbers
+        paginator = Paginator(jobs.order_by('-search_rank', '-created_at'), JOBS_PER_PAGE)
+        jobs_page = paginator.get_page(page_number)
     
-    # Pagination
-    paginator = Paginator(jobs, 20)  # 20 jobs per page
+    # Facet counts for the sidebar, from one grouped query over the results
+    facets = compute_facets(jobs)
+    
+    return jobs_page, paginator.count, facets
+
+
+def _restore_jobs_page(criteria, entry):
+    """Rebuild a page from cached job ids without re-running the search"""
+    jobs_by_id = Job.objects.select_related('company').in_bulk(entry['ids'])
+    rows = [jobs_by_id[pk] for pk in map(uuid.UUID, entry['ids']) if pk in jobs_by_id]
+    
+    sort_by = criteria['sort_by']
+    if sort_by in JOB_ORDERINGS:
+        paginator = CursorPaginator(Job.objects.none(), JOBS_PER_PAGE, JOB_ORDERINGS[sort_by])
+        jobs_page = CursorPage(rows, paginator, entry['has_next'], entry['has_previous'])
+    else:
+        paginator = Paginator(Job.objects.none(), JOBS_PER_PAGE)
+        paginator.count = entry['total']
+        jobs_page = Page(rows, entry['number'], paginator)
+    
+    facets = {name: Counter(counts) for name, counts in entry['facets'].items()}
+    return jobs_page, entry['total'], facets
+
+
+def job_list(request):
+    """Job listing page with search and filters"""
+    # Initialize search form
+    form = JobSearchForm(request.GET)
+    criteria = normalize_criteria(form.cleaned_data if form.is_valid() else {})
+    
+    cursor = request.GET.get('cursor')
     page_number = request.GET.get('page')
-    jobs_page = paginator.get_page(page_number)
+    position = cursor if criteria['sort_by'] in JOB_ORDERINGS else page_number
+    cache_key = make_key(criteria, position)
     
-    # Get unique categories for filter
-    categories = Job.objects.filter(
-        is_active=True
-    ).values_list('category', flat=True).distinct()
+    # Repeated searches are served from the result cache
+    entry = search_cache.get(cache_key)
+    if entry is not None:
+        jobs_page, total_results, facets = _restore_jobs_page(criteria, entry)
+    else:
+        jobs_page, total_results, facets = _search_jobs_page(criteria, cursor, page_number)
+        search_cache.set(cache_key, criteria, {
+            'ids': [str(job.pk) for job in jobs_page],
+            'total': total_results,
+            'facets': facets,
+            'has_next': jobs_page.has_next(),
+            'has_previous': jobs_page.has_previous(),
+            'number': getattr(jobs_page, 'number', None),
+        })
+    
+    form.apply_facets(facets)
     
     context = {
         'jobs': jobs_page,
         'form': form,
-        'categories': categories,
-        'total_results': paginator.count,
+        'categories': facet_choices(facets, 'category', limit=FACET_LIMIT),
+        'cities': facet_choices(facets, 'city', limit=FACET_LIMIT),
+        'page_obj': jobs_page,
+        'total_results': total_results,
     }
     return render(request, 'jobs/job_list.html', context)
 
 
+def job_autocomplete(request):
+    """Prefix suggestions for the search form fields (JSON, no database queries)"""
+    field = request.GET.get('field', 'keyword')
+    kinds = FIELD_KINDS.get(field)
+    if kinds is None:
+        return JsonResponse({'results': [], 'error': 'Unknown field'}, status=400)
+    
+    results = autocomplete_index.suggest(request.GET.get('q', ''), kinds=kinds)
+    return JsonResponse({'results': results})
+
+
 def job_detail(request, pk):
     """Job detail page"""
     job = get_object_or_404(
@@ -131,17 +194,24 @@ def job_detail(request, pk):
             user=request.user
         ).exists()
         
-        is_saved = SavedJob.objects.filter(
-            job=job,
-            user=request.user
-        ).exists()
+        is_saved = job.pk in get_saved_job_ids(request.user)
     
-    # Get similar jobs
-    similar_jobs = Job.objects.filter(
-        category=job.category,
-        is_active=True,
-        is_published=True
-    ).exclude(pk=job.pk).select_related('company')[:4]
+    # Get similar jobs from the precomputed index, best match first
+    neighbour_ids = similar_job_ids(job.pk, limit=SIMILAR_JOBS_SHOWN)
+    if neighbour_ids is not None:
+        neighbours = Job.objects.filter(
+            pk__in=neighbour_ids,
+            is_active=True,
+            is_published=True
+        ).select_related('company').in_bulk()
+        similar_jobs = [neighbours[pk] for pk in neighbour_ids if pk in neighbours]
+    else:
+        # Not indexed yet (new job, or build_similar_jobs has not run)
+        similar_jobs = Job.objects.filter(
+            category=job.category,
+            is_active=True,
+            is_published=True
+        ).exclude(pk=job.pk).select_related('company')[:SIMILAR_JOBS_SHOWN]
     
     context = {
         'job': job,
@@ -170,32 +240,30 @@ def job_apply(request, pk):
         messages.error(request, 'The application deadline for this job has passed.')
         return redirect('job_detail', pk=pk)
     
+    # The profile resume is used unless another file is uploaded
+    initial_data = {}
+    profile = getattr(request.user, 'jobseeker_profile', None)
+    if profile and profile.resume:
+        initial_data['resume_url'] = profile.resume
+    
     if request.method == 'POST':
-        form = JobApplicationForm(request.POST, request.FILES)
+        form = JobApplicationForm(request.POST, request.FILES, initial=initial_data)
         if form.is_valid():
             application = form.save(commit=False)
             application.job = job
             application.user = request.user
             application.company = job.company
-            application.save()
-            
-            # Send notification to company
-            notify_new_application(application)
+            with transaction.atomic():
+                application.save()
+                
+                # Send notification to company
+                notify_new_application(application)
             
             messages.success(request, 'Application submitted successfully!')
             return redirect('my_applications')
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
-        # Pre-fill resume from profile if available
-        initial_data = {}
-        try:
-            profile = request.user.jobseeker_profile
-            if profile.resume:
-                initial_data['resume_url'] = profile.resume
-        except:
-            pass
-        
         form = JobApplicationForm(initial=initial_data)
     
     context = {
@@ -227,6 +295,25 @@ def my_applications(request):
     return render(request, 'jobs/my_applications.html', context)
 
 
+@login_required
+@jobseeker_required
+def recommended_jobs(request):
+    """Jobs matching the user's skills, precomputed by build_recommendations"""
+    recommendations = JobRecommendation.objects.filter(
+        user=request.user,
+        job__is_active=True,
+        job__is_published=True,
+        job__company__status='approved'
+    ).select_related('job', 'job__company').order_by('-score')
+    
+    profile = getattr(request.user, 'jobseeker_profile', None)
+    context = {
+        'recommendations': recommendations,
+        'has_skills': bool(profile and profile.skills.strip()),
+    }
+    return render(request, 'jobs/recommended_jobs.html', context)
+
+
 @login_required
 @jobseeker_required
 def saved_jobs(request):
@@ -252,6 +339,8 @@ def save_job(request, pk):
         user=request.user,
         job=job
     )
+    if created:
+        invalidate_saved_job_ids(request.user)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
@@ -279,6 +368,8 @@ def unsave_job(request, pk):
         user=request.user,
         job=job
     ).delete()
+    if deleted_count:
+        invalidate_saved_job_ids(request.user)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
@@ -292,21 +383,66 @@ def unsave_job(request, pk):
     return redirect('saved_jobs')
 
 
+@login_required
+@jobseeker_required
+def saved_searches(request):
+    """Saved searches with their job alerts"""
+    searches = SavedSearch.objects.filter(user=request.user).annotate(match_count=Count('matches'))
+    
+    context = {
+        'saved_searches': searches,
+        'max_saved_searches': MAX_SAVED_SEARCHES,
+    }
+    return render(request, 'jobs/saved_searches.html', context)
+
+
+@login_required
+@jobseeker_required
+@require_POST
+def save_search(request):
+    """Save the current job_list search for job alerts"""
+    form = JobSearchForm(request.POST)
+    if not form.is_valid():
+        errors = ' '.join(error for field_errors in form.errors.values() for error in field_errors)
+        messages.error(request, f'This search could not be saved. {errors}')
+        return redirect('job_list')
+    
+    criteria = normalize_criteria(form.cleaned_data)
+    criteria.pop('sort_by')
+    saved_search = SavedSearch(user=request.user, **criteria)
+    
+    if SavedSearch.objects.filter(user=request.user, **criteria).exists():
+        messages.info(request, 'You have already saved this search.')
+    elif SavedSearch.objects.filter(user=request.user).count() >= MAX_SAVED_SEARCHES:
+        messages.error(request, f'You can save up to {MAX_SAVED_SEARCHES} searches. Delete one to add another.')
+    else:
+        saved_search.save()
+        messages.success(request, 'Search saved. We will let you know when new jobs match it.')
+    
+    return redirect(saved_search.get_search_url())
+
+
+@login_required
+@jobseeker_required
+@require_POST
+def delete_saved_search(request, pk):
+    """Delete a saved search and stop its alerts"""
+    deleted_count, _ = SavedSearch.objects.filter(user=request.user, pk=pk).delete()
+    if deleted_count:
+        messages.success(request, 'Saved search deleted.')
+    
+    return redirect('saved_searches')
+
+
 def about(request):
     """About page with statistics"""
-    from accounts.models import User
-
-    # Get statistics
-    total_jobs = Job.objects.filter(is_active=True, is_published=True).count()
-    total_companies = Company.objects.filter(status='approved').count()
-    total_users = User.objects.filter(user_type='jobseeker', is_active=True).count()
-    total_applications = Application.objects.count()
+    stats = get_site_stats()
 
     context = {
-        'total_jobs': total_jobs,
-        'total_companies': total_companies,
-        'total_users': total_users,
-        'total_applications': total_applications,
+        'total_jobs': stats.active_jobs,
+        'total_companies': stats.approved_companies,
+        'total_users': stats.active_jobseekers,
+        'total_applications': stats.total_applications,
     }
     return render(request, 'jobs/about.html', context)
 
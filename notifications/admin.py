@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Notification, EmailVerificationToken
+from django.utils import timezone
+from .models import Notification, NotificationArchive, NotificationOutbox, EmailVerificationToken
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
@@ -7,6 +8,23 @@ class NotificationAdmin(admin.ModelAdmin):
     list_filter = ['notification_type', 'is_read']
     search_fields = ['title', 'user__username']
 
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ['title', 'user', 'notification_type', 'status', 'attempts', 'available_at', 'created_at']
+    list_filter = ['status', 'notification_type']
+    search_fields = ['title', 'user__username']
+    actions = ['requeue']
+
+    @admin.action(description='Retry selected notifications')
+    def requeue(self, request, queryset):
+        queryset.update(status='pending', attempts=0, available_at=timezone.now())
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    list_display = ['title', 'user', 'notification_type', 'count', 'created_at', 'archived_at']
+    list_filter = ['notification_type']
+    search_fields = ['title', 'user__username']
+
 @admin.register(EmailVerificationToken)
 class EmailVerificationTokenAdmin(admin.ModelAdmin):
     list_display = ['purpose', 'user', 'expires_at', 'created_at']
@@ -0,0 +1,17 @@
+"""
+Template context processors for the notifications app
+"""
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.functional import SimpleLazyObject
+from .unread import get_unread_count
+
+
+def unread_notifications(request):
+    """
+    Unread notification count for the navbar (only looked up if a template
+    uses it), and whether live notification streams can be opened
+    """
+    return {
+        'unread_notification_count': SimpleLazyObject(lambda: get_unread_count(request.user)),
+        'notification_stream_live': isinstance(request, ASGIRequest),
+    }
@@ -0,0 +1,213 @@
+"""
+Live notification events for server-sent event streams
+
+``publish`` sends an event to every open stream of a user. Streams subscribe
+to an in-process broker with one small asyncio queue per connection, so an
+idle connection costs a suspended coroutine and no thread.
+
+Events published in another process (e.g. the process_notifications
+worker) reach this process over loopback UDP. Each process with open
+streams binds a UDP port on 127.0.0.1 and registers it as a file in
+NOTIFICATION_EVENTS_DIR, refreshing the file while it lives. Publishers send
+one datagram to every registered port. This is a local stand-in for a
+shared message bus, and it is enough for several workers on one machine.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+REGISTRATION_SUFFIX = '.port'
+MAX_DATAGRAM = 60000
+
+
+class _Subscription:
+    """One open stream: an asyncio queue and the loop that owns it"""
+
+    def __init__(self, user_id, loop, maxsize):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, event):
+        # Runs on the subscription's loop; a slow client loses its oldest events
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class Broker:
+    """In-process fan-out of events to the subscriptions of each user"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = _Subscription(
+            str(user_id), asyncio.get_running_loop(), settings.NOTIFICATION_STREAM_QUEUE_SIZE
+        )
+        with self._lock:
+            self._subscriptions[subscription.user_id].add(subscription)
+        _listener.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def dispatch(self, user_id, event):
+        """Hand an event to the user's subscriptions; safe to call from any thread"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(str(user_id), ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                self.unsubscribe(subscription)  # Its loop is gone
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+broker = Broker()
+
+
+def _events_dir():
+    return str(settings.NOTIFICATION_EVENTS_DIR)
+
+
+class _Listener:
+    """Receives events published by other processes and feeds them to the broker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = False
+        self.port = None
+        self._registration = None
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        sock.settimeout(settings.NOTIFICATION_EVENTS_REFRESH_INTERVAL)
+        self.port = sock.getsockname()[1]
+
+        os.makedirs(_events_dir(), exist_ok=True)
+        self._registration = os.path.join(_events_dir(), f'{self.port}{REGISTRATION_SUFFIX}')
+        with open(self._registration, 'w') as f:
+            f.write(str(os.getpid()))
+        threading.Thread(target=self._run, args=(sock,), name='notification-events', daemon=True).start()
+
+    def _run(self, sock):
+        while True:
+            try:
+                data = sock.recv(MAX_DATAGRAM)
+            except socket.timeout:
+                data = None
+            except OSError:
+                logger.exception('Notification event listener stopped')
+                return
+
+            if data:
+                try:
+                    message = json.loads(data)
+                    broker.dispatch(message['user'], message['event'])
+                except (ValueError, KeyError):
+                    continue
+            self._refresh()
+
+    def _refresh(self):
+        # Keep the registration fresh so publishers know this process is alive
+        try:
+            if time.time() - os.path.getmtime(self._registration) >= settings.NOTIFICATION_EVENTS_REFRESH_INTERVAL:
+                os.utime(self._registration)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(self._registration), exist_ok=True)
+            with open(self._registration, 'w') as f:
+                f.write(str(os.getpid()))
+
+
+_listener = _Listener()
+
+_sender = None
+_sender_lock = threading.Lock()
+
+
+def _remote_ports():
+    """Ports of the other live processes with open streams"""
+    try:
+        names = os.listdir(_events_dir())
+    except FileNotFoundError:
+        return []
+
+    stale_before = time.time() - 3 * settings.NOTIFICATION_EVENTS_REFRESH_INTERVAL
+    ports = []
+    for name in names:
+        if not name.endswith(REGISTRATION_SUFFIX):
+            continue
+        path = os.path.join(_events_dir(), name)
+        try:
+            if os.path.getmtime(path) < stale_before:
+                os.remove(path)
+                continue
+            port = int(name[:-len(REGISTRATION_SUFFIX)])
+        except (OSError, ValueError):
+            continue
+        if port != _listener.port:
+            ports.append(port)
+    return ports
+
+
+def _send(payload):
+    global _sender
+    with _sender_lock:
+        if _sender is None:
+            _sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            _sender.setblocking(False)
+        for port in _remote_ports():
+            try:
+                _sender.sendto(payload, ('127.0.0.1', port))
+            except OSError:
+                continue  # Receiver gone or its buffer is full; events are best effort
+
+
+def publish(user_id, event_type, data):
+    """Push an event to the user's open streams in every process"""
+    publish_many([(user_id, event_type, data)])
+
+
+def publish_many(events):
+    """Push (user id, event type, data) triples"""
+    for user_id, event_type, data in events:
+        event = {'id': uuid.uuid4().hex, 'type': event_type, 'data': data}
+        broker.dispatch(user_id, event)
+        payload = json.dumps({'user': str(user_id), 'event': event}).encode()
+        if len(payload) <= MAX_DATAGRAM:
+            _send(payload)
+
+
+def format_event(event_type, data, event_id=None):
+    """One server-sent event frame"""
+    lines = []
+    if event_id:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_type}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,46 @@
+"""
+Management command to deliver queued notifications
+"""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from notifications import outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver notifications from the outbox (run continuously with --loop)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.NOTIFICATION_OUTBOX_BATCH_SIZE,
+            help='Notifications delivered per transaction'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the outbox instead of exiting once it is drained'
+        )
+        parser.add_argument(
+            '--requeue-dead',
+            action='store_true',
+            help='Retry dead-lettered notifications'
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue_dead']:
+            count = outbox.requeue_dead()
+            self.stdout.write(f'  - {count} dead-lettered notifications requeued')
+
+        while True:
+            started = time.monotonic()
+            delivered, failed = outbox.drain(options['batch_size'])
+            if delivered or failed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'[OK] Delivered {delivered} notifications, {failed} failed, '
+                    f'in {time.monotonic() - started:.2f}s'
+                ))
+            if not options['loop']:
+                break
+            time.sleep(settings.NOTIFICATION_OUTBOX_POLL_INTERVAL)
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_notification_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='count',
+            field=models.PositiveIntegerField(default=1, help_text='Events coalesced into this notification'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='group_key',
+            field=models.CharField(blank=True, help_text='Notifications with the same key are coalesced', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(blank=True, help_text='Last time another event was coalesced', null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='group_key',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='group_subject',
+            field=models.CharField(blank=True, help_text='Target named in coalesced messages', max_length=200),
+        ),
+    ]
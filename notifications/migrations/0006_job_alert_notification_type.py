@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_notification_retention'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('approval', 'Company Approval'), ('rejection', 'Company Rejection'), ('application', 'New Application'), ('status_change', 'Application Status Change'), ('job_posted', 'New Job Posted'), ('job_alert', 'Job Alert'), ('system', 'System Notification')], max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='notificationarchive',
+            name='notification_type',
+            field=models.CharField(choices=[('approval', 'Company Approval'), ('rejection', 'Company Rejection'), ('application', 'New Application'), ('status_change', 'Application Status Change'), ('job_posted', 'New Job Posted'), ('job_alert', 'Job Alert'), ('system', 'System Notification')], max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='notificationoutbox',
+            name='notification_type',
+            field=models.CharField(choices=[('approval', 'Company Approval'), ('rejection', 'Company Rejection'), ('application', 'New Application'), ('status_change', 'Application Status Change'), ('job_posted', 'New Job Posted'), ('job_alert', 'Job Alert'), ('system', 'System Notification')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_jobseeker_resume_storage'),
+        ('notifications', '0006_job_alert_notification_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadNotificationCount',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('count', models.IntegerField(default=0)),
+                ('counted_at', models.DateTimeField(help_text='Last recount from the notifications table')),
+            ],
+            options={
+                'verbose_name': 'Unread Notification Count',
+                'verbose_name_plural': 'Unread Notification Counts',
+                'db_table': 'unread_notification_counts',
+            },
+        ),
+    ]
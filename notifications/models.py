@@ -2,7 +2,9 @@
 Notifications Model
 """
 from django.db import models
+from django.utils import timezone
 from accounts.models import User
+from .unread import adjust_unread_counts
 import uuid
 
 class Notification(models.Model):
@@ -14,6 +16,7 @@ class Notification(models.Model):
         ('application', 'New Application'),
         ('status_change', 'Application Status Change'),
         ('job_posted', 'New Job Posted'),
+        ('job_alert', 'Job Alert'),
         ('system', 'System Notification'),
     )
     
@@ -23,21 +26,111 @@ class Notification(models.Model):
     message = models.TextField()
     notification_type = models.CharField(max_length=50, choices=NOTIFICATION_TYPES)
     is_read = models.BooleanField(default=False)
+    group_key = models.CharField(max_length=100, blank=True, help_text="Notifications with the same key are coalesced")
+    count = models.PositiveIntegerField(default=1, help_text="Events coalesced into this notification")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(null=True, blank=True, help_text="Last time another event was coalesced")
     
     class Meta:
         db_table = 'notifications'
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
         ordering = ['-created_at']
+        indexes = [
+            # Inbox and unread counts, keyset-paginated on (-created_at, -id)
+            models.Index(fields=['user', 'is_read', '-created_at', '-id']),
+            models.Index(fields=['user', '-created_at', '-id']),
+            # Retention scans for old read notifications
+            models.Index(fields=['is_read', 'created_at']),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.user.username}"
     
     def mark_as_read(self):
         """Mark notification as read"""
+        if Notification.objects.filter(pk=self.pk, is_read=False).update(is_read=True):
+            adjust_unread_counts({self.user_id: -1})
         self.is_read = True
-        self.save(update_fields=['is_read'])
+
+
+class UnreadNotificationCount(models.Model):
+    """Per-user unread notification count, adjusted with F() (see notifications/unread.py)"""
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    count = models.IntegerField(default=0)
+    counted_at = models.DateTimeField(help_text="Last recount from the notifications table")
+    
+    class Meta:
+        db_table = 'unread_notification_counts'
+        verbose_name = 'Unread Notification Count'
+        verbose_name_plural = 'Unread Notification Counts'
+    
+    def __str__(self):
+        return f"{self.user_id}: {self.count}"
+
+
+class NotificationOutbox(models.Model):
+    """
+    Notifications waiting to be delivered. Rows are written in the same
+    transaction as the change they announce and turned into Notification
+    rows by the process_notifications worker (see notifications/outbox.py).
+    """
+    
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('dead', 'Dead Letter'),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    notification_type = models.CharField(max_length=50, choices=Notification.NOTIFICATION_TYPES)
+    group_key = models.CharField(max_length=100, blank=True)
+    group_subject = models.CharField(max_length=200, blank=True, help_text="Target named in coalesced messages")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Not delivered before this time")
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'notification_outbox'
+        verbose_name = 'Outbox Notification'
+        verbose_name_plural = 'Notification Outbox'
+        indexes = [
+            models.Index(fields=['status', 'available_at', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.title} - {self.get_status_display()}"
+
+
+class NotificationArchive(models.Model):
+    """
+    Read notifications past the retention period, without their message
+    (moved here by prune_notifications, see notifications/retention.py)
+    """
+    
+    id = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    title = models.CharField(max_length=200)
+    notification_type = models.CharField(max_length=50, choices=Notification.NOTIFICATION_TYPES)
+    count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'notification_archive'
+        verbose_name = 'Archived Notification'
+        verbose_name_plural = 'Archived Notifications'
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.title} - {self.created_at:%Y-%m-%d}"
 
 
 class EmailVerificationToken(models.Model):
@@ -62,6 +155,9 @@ class EmailVerificationToken(models.Model):
         db_table = 'email_verification_tokens'
         verbose_name = 'Email Verification Token'
         verbose_name_plural = 'Email Verification Tokens'
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
     
     def __str__(self):
         return f"{self.get_purpose_display()} - {self.token[:10]}..."
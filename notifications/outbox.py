@@ -0,0 +1,228 @@
+"""
+Transactional outbox for notifications
+
+``enqueue`` and ``enqueue_many`` write NotificationOutbox rows inside the
+caller's transaction, so a notification exists exactly when the change it
+announces was committed. The process_notifications worker drains the outbox
+in batches: each batch is turned into Notification rows with one bulk insert
+(coalescing notifications about the same target, see ``_write``) and
+removed from the outbox in the same transaction. If that fails the batch is
+delivered row by row; rows that keep failing are retried
+with exponential backoff and dead-lettered after
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS attempts.
+"""
+import logging
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from . import events
+from .models import Notification, NotificationOutbox
+from .unread import adjust_unread_counts
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(user_id, title, message, notification_type, group_key='', group_subject=''):
+    return NotificationOutbox.objects.create(
+        user_id=user_id, title=title, message=message, notification_type=notification_type,
+        group_key=group_key, group_subject=group_subject
+    )
+
+
+def enqueue_many(notifications):
+    """Queue unsaved Notification objects with one insert"""
+    rows = [
+        NotificationOutbox(
+            user_id=n.user_id, title=n.title, message=n.message, notification_type=n.notification_type,
+            group_key=n.group_key, group_subject=getattr(n, 'group_subject', '')
+        )
+        for n in notifications
+    ]
+    return NotificationOutbox.objects.bulk_create(rows, batch_size=500)
+
+
+def _notification(row):
+    # The notification keeps the id of its outbox row
+    return Notification(
+        id=row.id,
+        user_id=row.user_id,
+        title=row.title,
+        message=row.message,
+        notification_type=row.notification_type,
+        group_key=row.group_key,
+    )
+
+
+def _throttled_users(user_ids, now):
+    """Users who already got NOTIFICATION_THROTTLE_LIMIT notifications in the throttle window"""
+    if not user_ids:
+        return set()
+    recent = Notification.objects.filter(
+        user_id__in=user_ids,
+        created_at__gte=now - timedelta(seconds=settings.NOTIFICATION_THROTTLE_WINDOW)
+    ).values('user_id').annotate(received=Count('id')).filter(
+        received__gte=settings.NOTIFICATION_THROTTLE_LIMIT
+    )
+    return {row['user_id'] for row in recent}
+
+
+def _write(rows):
+    """
+    Turn outbox rows into notifications. Rows sharing a group key (same user,
+    type and target) become one notification, merged into an unread one from
+    the coalescing window when there is one (one UPDATE per group). Throttled
+    users get their ungrouped notifications grouped per type. Returns
+    (created, merged).
+    """
+    from .utils import coalesced_text
+
+    now = timezone.now()
+    throttled = _throttled_users({row.user_id for row in rows if not row.group_key}, now)
+
+    groups, created = {}, []
+    for row in rows:
+        group_key = row.group_key or (f'{row.notification_type}:throttled' if row.user_id in throttled else '')
+        if group_key:
+            groups.setdefault((row.user_id, row.notification_type, group_key), []).append(row)
+        else:
+            created.append(_notification(row))
+
+    existing = {}
+    if groups:
+        # Locked so that workers merging into the same notification take turns,
+        # and one being marked read meanwhile is left alone
+        candidates = Notification.objects.select_for_update().filter(
+            user_id__in={user_id for user_id, _, _ in groups},
+            group_key__in={group_key for _, _, group_key in groups},
+            is_read=False,
+            created_at__gte=now - timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW),
+        ).order_by('created_at')
+        for notification in candidates:
+            existing[(notification.user_id, notification.notification_type, notification.group_key)] = notification
+
+    merged = []
+    for key, group_rows in groups.items():
+        latest = group_rows[-1]
+        notification = existing.get(key)
+        if notification is not None:
+            count = notification.count + len(group_rows)
+            title, message = coalesced_text(
+                latest.notification_type, count, latest.group_subject, latest.title, latest.message
+            )
+            # is_read is checked again for databases without row locks (SQLite)
+            if Notification.objects.filter(pk=notification.pk, is_read=False).update(
+                count=F('count') + len(group_rows), title=title, message=message, updated_at=now
+            ):
+                notification.count, notification.title, notification.message = count, title, message
+                notification.updated_at = now
+                merged.append(notification)
+                continue
+
+        notification = _notification(group_rows[0])
+        notification.group_key = key[2]
+        notification.count = len(group_rows)
+        notification.title, notification.message = coalesced_text(
+            latest.notification_type, notification.count, latest.group_subject, latest.title, latest.message
+        )
+        created.append(notification)
+
+    Notification.objects.bulk_create(created)
+    return created, merged
+
+
+def _retry_later(row, error, retryable=True):
+    """Schedule another attempt, or dead-letter the row if it cannot succeed"""
+    row.attempts += 1
+    row.last_error = f'{type(error).__name__}: {error}'
+    if not retryable or row.attempts >= settings.NOTIFICATION_OUTBOX_MAX_ATTEMPTS:
+        row.status = 'dead'
+        logger.error('Notification %s dead-lettered after %d attempts: %s', row.pk, row.attempts, error)
+    else:
+        delay = settings.NOTIFICATION_OUTBOX_RETRY_DELAY * 2 ** (row.attempts - 1)
+        row.available_at = timezone.now() + timedelta(seconds=delay)
+    row.save(update_fields=['attempts', 'last_error', 'status', 'available_at'])
+
+
+def _delivered(created, merged):
+    """Count new notifications into the unread counters and push changes to open streams"""
+    deltas = Counter(notification.user_id for notification in created)
+    live = [
+        (notification.user_id, event_type, {
+            'id': str(notification.id),
+            'title': notification.title,
+            'message': notification.message,
+            'type': notification.notification_type,
+            'count': notification.count,
+        })
+        for event_type, notifications in (('notification', created), ('notification_updated', merged))
+        for notification in notifications
+    ]
+
+    adjust_unread_counts(deltas)
+    transaction.on_commit(lambda: events.publish_many(live))
+
+
+def deliver_batch(batch_size=None):
+    """
+    Deliver up to ``batch_size`` due notifications.
+    Returns (delivered, failed) outbox row counts; (0, 0) means the outbox is drained.
+    """
+    batch_size = batch_size or settings.NOTIFICATION_OUTBOX_BATCH_SIZE
+    with transaction.atomic():
+        rows = list(
+            NotificationOutbox.objects.select_for_update(skip_locked=True).filter(
+                status='pending', available_at__lte=timezone.now()
+            ).order_by('created_at')[:batch_size]
+        )
+        if not rows:
+            return 0, 0
+
+        try:
+            with transaction.atomic():
+                created, merged = _write(rows)
+                NotificationOutbox.objects.filter(pk__in=[row.pk for row in rows]).delete()
+                _delivered(created, merged)
+            return len(rows), 0
+        except Exception:
+            logger.warning('Bulk notification delivery failed; delivering one by one', exc_info=True)
+
+        delivered = failed = 0
+        for row in rows:
+            try:
+                with transaction.atomic():
+                    created, merged = _write([row])
+                    row.delete()
+                    _delivered(created, merged)
+                delivered += 1
+            except DatabaseError as e:
+                _retry_later(row, e)
+                failed += 1
+            except Exception as e:
+                # A bad payload fails the same way every time; keep the worker alive
+                logger.exception('Notification %s could not be delivered', row.pk)
+                _retry_later(row, e, retryable=False)
+                failed += 1
+        return delivered, failed
+
+
+def drain(batch_size=None, max_batches=None):
+    """Deliver batches until nothing is due; returns (delivered, failed)"""
+    delivered = failed = batches = 0
+    while max_batches is None or batches < max_batches:
+        ok, bad = deliver_batch(batch_size)
+        if not ok and not bad:
+            break
+        delivered += ok
+        failed += bad
+        batches += 1
+    return delivered, failed
+
+
+def requeue_dead():
+    """Give dead-lettered notifications another round of attempts"""
+    return NotificationOutbox.objects.filter(status='dead').update(
+        status='pending', attempts=0, available_at=timezone.now()
+    )
@@ -0,0 +1,83 @@
+"""
+Retention for the notifications tables
+
+Read notifications older than NOTIFICATION_RETENTION_DAYS are moved to the
+compact NotificationArchive table (or deleted), and expired verification
+tokens are purged. Rows are handled NOTIFICATION_RETENTION_BATCH_SIZE at a
+time, each batch in its own short transaction, so no lock is held for long.
+"""
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import EmailVerificationToken, Notification, NotificationArchive
+
+ARCHIVE_FIELDS = ('id', 'user_id', 'title', 'notification_type', 'count', 'created_at')
+
+
+def _in_batches(queryset, process, batch_size, pause):
+    """Apply ``process`` to the ids of ``queryset`` batch by batch; returns (rows, batches)"""
+    rows = batches = 0
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            process(ids)
+        rows += len(ids)
+        batches += 1
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return rows, batches
+
+
+def prune_notifications(days=None, archive=True, batch_size=None, pause=0):
+    """Archive or delete read notifications older than ``days``; returns (rows, batches)"""
+    days = settings.NOTIFICATION_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    old = Notification.objects.filter(is_read=True, created_at__lt=cutoff).order_by('created_at')
+
+    def process(ids):
+        batch = Notification.objects.filter(pk__in=ids)
+        if archive:
+            NotificationArchive.objects.bulk_create(
+                [NotificationArchive(**row) for row in batch.values(*ARCHIVE_FIELDS)],
+                ignore_conflicts=True,
+            )
+        batch.delete()
+
+    return _in_batches(
+        old, process, batch_size or settings.NOTIFICATION_RETENTION_BATCH_SIZE, pause
+    )
+
+
+def purge_expired_tokens(batch_size=None, pause=0):
+    """Delete expired email verification and password reset tokens; returns (rows, batches)"""
+    expired = EmailVerificationToken.objects.filter(expires_at__lt=timezone.now()).order_by('expires_at')
+
+    def process(ids):
+        EmailVerificationToken.objects.filter(pk__in=ids).delete()
+
+    return _in_batches(
+        expired, process, batch_size or settings.NOTIFICATION_RETENTION_BATCH_SIZE, pause
+    )
+
+
+def compact_tables(models):
+    """
+    Return freed space to the database: VACUUM on SQLite, VACUUM ANALYZE per
+    table on PostgreSQL. VACUUM cannot run inside a transaction; returns
+    whether it ran.
+    """
+    if connection.in_atomic_block or connection.vendor not in ('sqlite', 'postgresql'):
+        return False
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('VACUUM')
+        elif connection.vendor == 'postgresql':
+            for model in models:
+                cursor.execute(f'VACUUM ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+    return True
@@ -1 +1,324 @@
- 
+import asyncio
+import json
+import os
+import socket
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from jobs.tests import PASSWORD, PortalTestCase, create_company
+from . import events, outbox, retention, utils
+from .models import (
+    EmailVerificationToken, Notification, NotificationArchive, NotificationOutbox, UnreadNotificationCount
+)
+from .unread import get_unread_count
+
+
+class NotificationTestCase(PortalTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = create_company()
+        self.user = self.company.user
+
+    def deliver(self, count=1, **fields):
+        """Queue ``count`` notifications for self.user and run the outbox worker"""
+        for number in range(count):
+            outbox.enqueue(self.user.pk, f'Notice {number}', 'Something happened', 'system', **fields)
+        with self.captureOnCommitCallbacks(execute=True):
+            outbox.drain()
+
+
+class UnreadCountTests(NotificationTestCase):
+
+    def test_counts_delivered_and_read_notifications(self):
+        self.assertEqual(get_unread_count(self.user), 0)
+        self.deliver(3)
+        self.assertEqual(get_unread_count(self.user), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.filter(user=self.user).first().mark_as_read()
+        self.assertEqual(get_unread_count(self.user), 2)
+
+    def test_cached_count_costs_no_query(self):
+        get_unread_count(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.user), 0)
+
+    def test_navbar_reads_the_cache(self):
+        self.client.login(username=self.user.username, password=PASSWORD)
+        self.client.get('/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/about/')
+        self.assertContains(response, 'Notifications')
+        self.assertFalse([query for query in queries if 'notification' in query['sql']])
+
+    def test_drifted_counter_is_recounted(self):
+        self.deliver(2)
+        get_unread_count(self.user)
+        UnreadNotificationCount.objects.filter(user=self.user).update(count=-1)
+        cache.clear()
+        self.assertEqual(get_unread_count(self.user), 2)
+
+    def test_mark_all_read_keeps_notifications_delivered_meanwhile(self):
+        self.deliver(3)
+        self.assertEqual(get_unread_count(self.user), 3)
+        # A fourth notification counted after mark-all-read picked its rows
+        UnreadNotificationCount.objects.filter(user=self.user).update(count=4)
+
+        self.client.login(username=self.user.username, password=PASSWORD)
+        response = self.client.post('/notifications/read-all/', HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json()['updated'], 3)
+        self.assertEqual(response.json()['unread_count'], 1)
+        self.assertEqual(UnreadNotificationCount.objects.get(user=self.user).count, 1)
+
+    def test_inbox_pages_by_cursor(self):
+        self.deliver(25)
+        self.client.login(username=self.user.username, password=PASSWORD)
+        ids, cursor = [], ''
+        while True:
+            data = self.client.get('/notifications/feed/', {'cursor': cursor}).json()
+            ids += [row['id'] for row in data['results']]
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(set(ids)), 25)
+        self.assertEqual(data['unread_count'], 25)
+
+
+class CoalescingTests(NotificationTestCase):
+
+    def apply(self, count=1):
+        """Queue ``count`` applications to one job for self.user"""
+        for number in range(count):
+            outbox.enqueue(
+                self.user.pk, 'New Job Application', f'Application {number} for Go Developer',
+                'application', group_key='job:1', group_subject='Go Developer'
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            outbox.drain()
+
+    def test_burst_becomes_one_notification(self):
+        self.apply(5)
+        notification = Notification.objects.get(user=self.user)
+        self.assertEqual(notification.count, 5)
+        self.assertEqual(notification.message, '5 new applications for Go Developer')
+        self.assertEqual(get_unread_count(self.user), 1)
+
+    def test_later_events_merge_into_the_unread_notification(self):
+        self.apply(2)
+        self.apply(3)
+        notification = Notification.objects.get(user=self.user)
+        self.assertEqual(notification.count, 5)
+        self.assertIsNotNone(notification.updated_at)
+        self.assertEqual(get_unread_count(self.user), 1)
+
+    def test_read_or_old_notifications_are_not_merged_into(self):
+        self.apply()
+        Notification.objects.get(user=self.user).mark_as_read()
+        self.apply()
+        Notification.objects.filter(user=self.user, is_read=False).update(
+            created_at=timezone.now() - timedelta(hours=2)
+        )
+        self.apply()
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 3)
+
+    def test_merge_adds_to_the_stored_count(self):
+        self.apply()
+        notification = Notification.objects.get(user=self.user)
+        real_text = utils.coalesced_text
+
+        def merged_by_another_worker(*args):
+            Notification.objects.filter(pk=notification.pk).update(count=F('count') + 4)
+            return real_text(*args)
+
+        with mock.patch.object(utils, 'coalesced_text', side_effect=merged_by_another_worker):
+            self.apply(2)
+        self.assertEqual(Notification.objects.get(pk=notification.pk).count, 7)
+
+    def test_notification_read_while_merging_is_left_alone(self):
+        self.apply()
+        notification = Notification.objects.get(user=self.user)
+        real_text = utils.coalesced_text
+
+        def read_meanwhile(*args):
+            notification.mark_as_read()
+            return real_text(*args)
+
+        with mock.patch.object(utils, 'coalesced_text', side_effect=read_meanwhile):
+            self.apply(2)
+        self.assertEqual(Notification.objects.get(pk=notification.pk).count, 1)
+        fresh = Notification.objects.get(user=self.user, is_read=False)
+        self.assertEqual(fresh.count, 2)
+        self.assertEqual(get_unread_count(self.user), 1)
+
+    def test_busy_users_are_throttled(self):
+        with self.settings(NOTIFICATION_THROTTLE_LIMIT=3):
+            self.deliver(3)
+            self.deliver(4)
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(Notification.objects.get(group_key='system:throttled').count, 4)
+
+
+class OutboxTests(NotificationTestCase):
+
+    def queue(self, count):
+        for number in range(count):
+            outbox.enqueue(self.user.pk, f'Notice {number}', 'Something happened', 'system')
+        return list(NotificationOutbox.objects.order_by('created_at'))
+
+    def failing(self, bad_row, error):
+        """bulk_create that fails for any batch containing ``bad_row``"""
+        bulk_create = Notification.objects.bulk_create
+
+        def create(notifications, *args, **kwargs):
+            if any(notification.pk == bad_row.pk for notification in notifications):
+                raise error
+            return bulk_create(notifications, *args, **kwargs)
+        return mock.patch.object(Notification.objects, 'bulk_create', side_effect=create)
+
+    def test_rolled_back_change_sends_nothing(self):
+        with self.assertRaises(ValueError), transaction.atomic():
+            outbox.enqueue(self.user.pk, 'Notice', 'Something happened', 'system')
+            raise ValueError
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+    def test_batches_are_delivered_and_removed(self):
+        self.queue(5)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(outbox.drain(batch_size=2), (5, 0))
+        self.assertFalse(NotificationOutbox.objects.exists())
+        self.assertEqual(Notification.objects.count(), 5)
+
+    def test_failing_row_backs_off_and_is_dead_lettered(self):
+        bad_row = self.queue(3)[0]
+        with self.failing(bad_row, DatabaseError('locked')), self.assertLogs('notifications.outbox'):
+            self.assertEqual(outbox.deliver_batch(), (2, 1))
+            row = NotificationOutbox.objects.get()
+            self.assertEqual(row.attempts, 1)
+            self.assertIn('locked', row.last_error)
+            self.assertGreater(row.available_at, timezone.now())
+            self.assertEqual(outbox.drain(), (0, 0))
+
+            for _ in range(settings.NOTIFICATION_OUTBOX_MAX_ATTEMPTS - 1):
+                NotificationOutbox.objects.update(available_at=timezone.now())
+                outbox.deliver_batch()
+        self.assertEqual(NotificationOutbox.objects.get().status, 'dead')
+        self.assertEqual(outbox.drain(), (0, 0))
+
+        self.assertEqual(outbox.requeue_dead(), 1)
+        self.assertEqual(outbox.drain(), (1, 0))
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_bad_payload_is_dead_lettered_at_once(self):
+        bad_row = self.queue(2)[0]
+        with self.failing(bad_row, ValueError('bad payload')), self.assertLogs('notifications.outbox'):
+            self.assertEqual(outbox.deliver_batch(), (1, 1))
+        row = NotificationOutbox.objects.get()
+        self.assertEqual((row.status, row.attempts), ('dead', 1))
+        self.assertIn('ValueError', row.last_error)
+
+
+class EventStreamTests(NotificationTestCase):
+
+    async def open_stream(self):
+        client = AsyncClient()
+        await sync_to_async(client.force_login)(self.user)
+        response = await client.get('/notifications/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        frames = response.streaming_content.__aiter__()
+        self.assertTrue((await frames.__anext__()).startswith(b'retry:'))
+        self.assertIn(b'"count":0', await frames.__anext__())
+        return frames
+
+    async def next_frame(self, frames):
+        return await asyncio.wait_for(frames.__anext__(), 3)
+
+    async def test_published_events_reach_the_stream(self):
+        frames = await self.open_stream()
+        self.assertEqual(events.broker.connection_count(), 1)
+
+        # Published from a worker thread, as a view or signal handler would
+        threading.Thread(target=events.publish, args=(self.user.pk, 'notification', {'title': 'Hi'})).start()
+        self.assertIn(b'event: notification', await self.next_frame(frames))
+        self.assertIn(b'"count":1', await self.next_frame(frames))
+        await frames.aclose()
+
+    async def test_events_from_other_processes_arrive_over_udp(self):
+        frames = await self.open_stream()
+        payload = {'user': str(self.user.pk), 'event': {'id': 'x', 'type': 'application_status', 'data': {}}}
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(json.dumps(payload).encode(), ('127.0.0.1', events._listener.port))
+        self.assertIn(b'event: application_status', await self.next_frame(frames))
+        await frames.aclose()
+
+    @override_settings(NOTIFICATION_STREAM_MAX_AGE=0.35, NOTIFICATION_STREAM_HEARTBEAT=0.1)
+    async def test_idle_stream_sends_keepalives_and_closes(self):
+        frames = await self.open_stream()
+        rest = [frame async for frame in frames]
+        self.assertGreaterEqual(rest.count(b': keepalive\n\n'), 2)
+        self.assertEqual(events.broker.connection_count(), 0)
+
+    def test_wsgi_requests_are_told_not_to_reconnect(self):
+        self.assertEqual(self.client.get('/notifications/stream/').status_code, 401)
+        self.client.login(username=self.user.username, password=PASSWORD)
+        self.assertEqual(self.client.get('/notifications/stream/').status_code, 204)
+        self.assertNotContains(self.client.get('/'), 'EventSource(')
+
+    def test_stale_registrations_are_dropped(self):
+        os.makedirs(settings.NOTIFICATION_EVENTS_DIR)
+        live = os.path.join(settings.NOTIFICATION_EVENTS_DIR, '40001.port')
+        stale = os.path.join(settings.NOTIFICATION_EVENTS_DIR, '40002.port')
+        for path in (live, stale):
+            open(path, 'w').close()
+        os.utime(stale, (0, 0))
+        self.assertEqual(events._remote_ports(), [40001])
+        self.assertFalse(os.path.exists(stale))
+
+
+class RetentionTests(NotificationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        old = timezone.now() - timedelta(days=100)
+        for number in range(7):
+            notification = Notification.objects.create(
+                user=self.user, notification_type='system', title=f'Notice {number}', message='Old news',
+                is_read=number < 5
+            )
+            Notification.objects.filter(pk=notification.pk).update(created_at=old)
+        Notification.objects.create(
+            user=self.user, notification_type='system', title='Recent', message='News', is_read=True
+        )
+        for number in range(3):
+            EmailVerificationToken.objects.create(
+                user=self.user, token=f'token{number}', purpose='email_verification',
+                expires_at=timezone.now() + timedelta(hours=-1 if number < 2 else 1)
+            )
+
+    def test_command_archives_old_read_notifications_and_purges_tokens(self):
+        out = StringIO()
+        call_command('prune_notifications', '--batch-size', '2', '--compact', stdout=out)
+        self.assertIn('5 notifications archived in 3 batches', out.getvalue())
+        self.assertIn('2 expired tokens purged', out.getvalue())
+        self.assertIn('[OK] Reclaimed 7 rows', out.getvalue())
+        self.assertEqual(NotificationArchive.objects.count(), 5)
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(EmailVerificationToken.objects.count(), 1)
+
+    def test_unread_notifications_are_kept(self):
+        retention.prune_notifications()
+        self.assertEqual(Notification.objects.filter(is_read=False).count(), 2)
+
+    def test_notifications_can_be_deleted_without_archiving(self):
+        self.assertEqual(retention.prune_notifications(archive=False, batch_size=10), (5, 1))
+        self.assertFalse(NotificationArchive.objects.exists())
@@ -0,0 +1,88 @@
+"""
+Per-user unread notification counts
+
+The navbar shows the count on every page, so it is kept in a counter row per
+user (UnreadNotificationCount) instead of being counted for each request.
+The code that delivers or reads notifications adjusts the row with F()
+updates in the same transaction, so every process sees the same count. A
+missing row is counted with one query; rows are recounted after
+UNREAD_NOTIFICATIONS_RECOUNT_INTERVAL to repair drift from changes made
+elsewhere (e.g. the admin).
+
+Reads go through the cache first, so a page usually costs no query for the
+count. Adjusting a counter evicts its cache entry, and again once the
+transaction commits; with a per-process cache other processes can show the old count for
+up to UNREAD_NOTIFICATIONS_CACHE_TIMEOUT seconds.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+CACHE_KEY = 'unread_notifications:{}'
+
+
+def _store(user_id, count, exists=True):
+    from .models import UnreadNotificationCount
+
+    now = timezone.now()
+    if exists and UnreadNotificationCount.objects.filter(user_id=user_id).update(count=count, counted_at=now):
+        return
+    UnreadNotificationCount.objects.bulk_create(
+        [UnreadNotificationCount(user_id=user_id, count=count, counted_at=now)], ignore_conflicts=True
+    )
+
+
+def _recount(user_id, exists):
+    from .models import Notification
+
+    count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+    _store(user_id, count, exists)
+    return count
+
+
+def _load(user_id):
+    from .models import UnreadNotificationCount
+
+    row = UnreadNotificationCount.objects.filter(user_id=user_id).values_list('count', 'counted_at').first()
+    if row is None:
+        return _recount(user_id, exists=False)
+    count, counted_at = row
+    if count < 0 or counted_at < timezone.now() - timedelta(seconds=settings.UNREAD_NOTIFICATIONS_RECOUNT_INTERVAL):
+        return _recount(user_id, exists=True)
+    return count
+
+
+def _forget(user_ids):
+    # Again after commit, in case another request cached the old count meanwhile
+    keys = [CACHE_KEY.format(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_unread_count(user):
+    if not user.is_authenticated:
+        return 0
+
+    key = CACHE_KEY.format(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = _load(user.pk)
+        cache.set(key, count, settings.UNREAD_NOTIFICATIONS_CACHE_TIMEOUT)
+    return count
+
+
+def adjust_unread_counts(deltas):
+    """Apply {user id: change} to the existing counters; one UPDATE per distinct change"""
+    from .models import UnreadNotificationCount
+
+    users_by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            users_by_delta[delta].append(user_id)
+    for delta, user_ids in users_by_delta.items():
+        UnreadNotificationCount.objects.filter(user_id__in=user_ids).update(count=F('count') + delta)
+        _forget(user_ids)
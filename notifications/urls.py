@@ -0,0 +1,13 @@
+"""
+URL configuration for notifications app
+"""
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.notification_list, name='notification_list'),
+    path('feed/', views.notification_feed, name='notification_feed'),
+    path('stream/', views.notification_stream, name='notification_stream'),
+    path('<uuid:pk>/read/', views.notification_mark_read, name='notification_mark_read'),
+    path('read-all/', views.notification_mark_all_read, name='notification_mark_all_read'),
+]
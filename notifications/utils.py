@@ -1,98 +1,163 @@
 """
 Utility functions for notifications
+
+Notifications are queued in the outbox (notifications/outbox.py) in the
+caller's transaction and delivered by the process_notifications worker.
 """
+from django.db import transaction
+from . import events
 from .models import Notification
+from .outbox import enqueue, enqueue_many
 
 
 def notify_new_application(application):
     """
-    Create a notification when a new job application is submitted
+    Queue a notification when a new job application is submitted
     """
-    try:
-        # Notify the company about the new application
-        Notification.objects.create(
-            user=application.company.user,
-            title='New Job Application',
-            message=f'New application received for {application.job.title} from {application.user.username}',
-            notification_type='application'
-        )
-    except Exception as e:
-        # Log error but don't raise to prevent application submission from failing
-        print(f"Error creating notification: {e}")
+    # Notify the company about the new application
+    enqueue(
+        application.company.user_id,
+        title='New Job Application',
+        message=f'New application received for {application.job.title} from {application.user.username}',
+        notification_type='application',
+        group_key=f'job:{application.job_id}',
+        group_subject=application.job.title
+    )
+
+
+STATUS_CHANGE_MESSAGES = {
+    'under_review': 'Your application is now under review',
+    'shortlisted': 'Congratulations! You have been shortlisted',
+    'interview_scheduled': 'An interview has been scheduled for your application',
+    'accepted': 'Congratulations! Your application has been accepted',
+    'rejected': 'Unfortunately, your application was not successful this time'
+}
+
+
+def status_change_notification(user_id, job_title, new_status, application_id=None):
+    """Unsaved status-change notification for an applicant"""
+    message = STATUS_CHANGE_MESSAGES.get(
+        new_status,
+        f'Your application status has been updated to {new_status}'
+    )
+    return Notification(
+        user_id=user_id,
+        title=f'Application Status Updated - {job_title}',
+        message=message,
+        notification_type='status_change',
+        # Quick successive changes of one application leave only the latest
+        group_key=f'application:{application_id}' if application_id else ''
+    )
+
+
+# Title and message of notifications coalesced from several events; types
+# not listed show the latest event
+COALESCED_MESSAGES = {
+    'application': ('New Job Applications', '{count} new applications for {subject}'),
+    'job_alert': ('New Job Alerts', '{count} new jobs match your saved search "{subject}"'),
+}
+
+
+def coalesced_text(notification_type, count, subject, latest_title, latest_message):
+    """(title, message) of a notification standing for ``count`` events"""
+    if count == 1:
+        return latest_title, latest_message
+    if notification_type in COALESCED_MESSAGES and subject:
+        title, message = COALESCED_MESSAGES[notification_type]
+        return title, message.format(count=count, subject=subject)
+    return latest_title, f'{latest_message} (and {count - 1} earlier)'
 
 
 def notify_application_status_change(application, old_status, new_status):
     """
-    Create a notification when application status changes
+    Queue a notification when application status changes
     """
-    try:
-        status_messages = {
-            'under_review': 'Your application is now under review',
-            'shortlisted': 'Congratulations! You have been shortlisted',
-            'interview_scheduled': 'An interview has been scheduled for your application',
-            'accepted': 'Congratulations! Your application has been accepted',
-            'rejected': 'Unfortunately, your application was not successful this time'
-        }
+    enqueue_many([
+        status_change_notification(application.user_id, application.job.title, new_status, application.pk)
+    ])
 
-        message = status_messages.get(
-            new_status,
-            f'Your application status has been updated to {new_status}'
-        )
 
-        Notification.objects.create(
-            user=application.user,
-            title=f'Application Status Updated - {application.job.title}',
-            message=message,
-            notification_type='status_change'
-        )
-    except Exception as e:
-        print(f"Error creating notification: {e}")
+def notify_application_status_changes(applicants, new_status):
+    """
+    Queue the same status change for many applicants with one bulk insert.
+    ``applicants`` is an iterable of (user id, job title, application id) triples.
+    """
+    return enqueue_many(
+        status_change_notification(user_id, job_title, new_status, application_id)
+        for user_id, job_title, application_id in applicants
+    )
+
+
+def announce_application_status_changes(changes, new_status):
+    """
+    Push a status change to the applicants' open notification streams once
+    the transaction commits. ``changes`` holds (application id, user id, job title).
+    """
+    live = [
+        (user_id, 'application_status', {
+            'application_id': str(application_id),
+            'job_title': job_title,
+            'status': new_status,
+        })
+        for application_id, user_id, job_title in changes
+    ]
+    transaction.on_commit(lambda: events.publish_many(live))
 
 
 def notify_company_approved(company):
     """
-    Create a notification when a company is approved
+    Queue a notification when a company is approved
     """
-    try:
-        Notification.objects.create(
-            user=company.user,
-            title='Company Approved',
-            message=f'Your company "{company.name}" has been approved! You can now start posting jobs.',
-            notification_type='approval'
-        )
-    except Exception as e:
-        print(f"Error creating notification: {e}")
+    enqueue(
+        company.user_id,
+        title='Company Approved',
+        message=f'Your company "{company.name}" has been approved! You can now start posting jobs.',
+        notification_type='approval'
+    )
 
 
 def notify_company_rejected(company, reason=''):
     """
-    Create a notification when a company is rejected
+    Queue a notification when a company is rejected
     """
-    try:
-        message = f'Your company registration for "{company.name}" has been rejected.'
-        if reason:
-            message += f' Reason: {reason}'
+    message = f'Your company registration for "{company.name}" has been rejected.'
+    if reason:
+        message += f' Reason: {reason}'
 
-        Notification.objects.create(
-            user=company.user,
-            title='Company Registration Rejected',
-            message=message,
-            notification_type='rejection'
-        )
-    except Exception as e:
-        print(f"Error creating notification: {e}")
+    enqueue(
+        company.user_id,
+        title='Company Registration Rejected',
+        message=message,
+        notification_type='rejection'
+    )
 
 
 def notify_job_posted(job):
     """
-    Create a notification when a job is successfully posted
+    Queue a notification when a job is successfully posted
+    """
+    enqueue(
+        job.company.user_id,
+        title='Job Posted Successfully',
+        message=f'Your job posting "{job.title}" is now live and visible to job seekers.',
+        notification_type='job_posted'
+    )
+
+
+def notify_job_alerts(matches):
+    """
+    Queue job alerts for (saved search, job) pairs. Alerts of one search are
+    grouped, so several matches read as one digest until it is read.
     """
-    try:
-        Notification.objects.create(
-            user=job.company.user,
-            title='Job Posted Successfully',
-            message=f'Your job posting "{job.title}" is now live and visible to job seekers.',
-            notification_type='job_posted'
+    alerts = []
+    for saved_search, job in matches:
+        alert = Notification(
+            user_id=saved_search.user_id,
+            title='New Job Alert',
+            message=f'{job.title} at {job.company.name} matches your saved search "{saved_search.name}"',
+            notification_type='job_alert',
+            group_key=f'search:{saved_search.pk}'
         )
-    except Exception as e:
-        print(f"Error creating notification: {e}")
+        alert.group_subject = saved_search.name
+        alerts.append(alert)
+    return enqueue_many(alerts)
@@ -0,0 +1,143 @@
+"""
+Views for the notification inbox
+"""
+import asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect
+from django.views.decorators.http import require_POST
+from jobs.pagination import CursorPaginator
+from . import events
+from .models import Notification
+from .unread import adjust_unread_counts, get_unread_count
+
+NOTIFICATIONS_PER_PAGE = 20
+
+
+def _inbox_page(request):
+    """Current keyset page of the user's notifications and the active filter"""
+    current_filter = 'unread' if request.GET.get('filter') == 'unread' else ''
+    notifications = Notification.objects.filter(user=request.user)
+    if current_filter:
+        notifications = notifications.filter(is_read=False)
+    
+    paginator = CursorPaginator(notifications, NOTIFICATIONS_PER_PAGE, ('-created_at', '-id'))
+    return paginator.get_page(request.GET.get('cursor')), current_filter
+
+
+@login_required
+def notification_list(request):
+    """Notification inbox"""
+    page, current_filter = _inbox_page(request)
+    context = {
+        'notifications': page,
+        'page_obj': page,
+        'current_filter': current_filter,
+    }
+    return render(request, 'notifications/notification_list.html', context)
+
+
+@login_required
+def notification_feed(request):
+    """Notification inbox as JSON (?cursor= pages through it)"""
+    page, _ = _inbox_page(request)
+    return JsonResponse({
+        'results': [
+            {
+                'id': str(notification.id),
+                'title': notification.title,
+                'message': notification.message,
+                'type': notification.notification_type,
+                'count': notification.count,
+                'is_read': notification.is_read,
+                'created_at': notification.created_at.isoformat(),
+            }
+            for notification in page
+        ],
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+        'unread_count': get_unread_count(request.user),
+    })
+
+
+@login_required
+@require_POST
+def notification_mark_read(request, pk):
+    """Mark one notification as read"""
+    if Notification.objects.filter(pk=pk, user=request.user, is_read=False).update(is_read=True):
+        adjust_unread_counts({request.user.pk: -1})
+        events.publish(request.user.pk, 'notifications_read', {'count': 1})
+    
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse({'success': True, 'unread_count': get_unread_count(request.user)})
+    return redirect('notification_list')
+
+
+@login_required
+@require_POST
+def notification_mark_all_read(request):
+    """Mark every unread notification as read with one UPDATE"""
+    updated = Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    # Subtract rather than write 0: a notification delivered meanwhile stays counted
+    adjust_unread_counts({request.user.pk: -updated})
+    if updated:
+        events.publish(request.user.pk, 'notifications_read', {'all': True})
+    
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse({'success': True, 'updated': updated, 'unread_count': get_unread_count(request.user)})
+    return redirect('notification_list')
+
+
+async def _event_stream(user):
+    """Unread count first, then events as they are published, with keepalives"""
+    loop = asyncio.get_running_loop()
+    subscription = events.broker.subscribe(user.pk)
+    try:
+        unread = await sync_to_async(get_unread_count)(user)
+        yield f'retry: {settings.NOTIFICATION_STREAM_RETRY * 1000}\n\n'
+        yield events.format_event('unread_count', {'count': unread})
+        
+        # Streams are recycled so connections dropped without notice do not pile up
+        closes_at = loop.time() + settings.NOTIFICATION_STREAM_MAX_AGE
+        while True:
+            remaining = closes_at - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), min(settings.NOTIFICATION_STREAM_HEARTBEAT, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            
+            yield events.format_event(event['type'], event['data'], event['id'])
+            if event['type'] == 'notification':
+                unread += 1
+            elif event['type'] == 'notifications_read':
+                unread = 0 if event['data'].get('all') else max(0, unread - event['data'].get('count', 1))
+            else:
+                continue
+            yield events.format_event('unread_count', {'count': unread})
+    finally:
+        events.broker.unsubscribe(subscription)
+
+
+async def notification_stream(request):
+    """Server-sent events: new notifications, application status changes and unread counts"""
+    user = await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+    if user is None:
+        return HttpResponse(status=401)
+    
+    # A WSGI server would hold a thread per stream; 204 tells EventSource
+    # clients not to reconnect (base.html only opens streams under ASGI)
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    
+    response = StreamingHttpResponse(_event_stream(user), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response